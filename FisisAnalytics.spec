@@ -12,11 +12,15 @@ a = Analysis(
     "dash.dependencies",
     "dash.exceptions",
     "diskcache",
+    "flask_compress",
     "pandas",
     "plotly.colors",
     "plotly.express",
     "plotly.graph_objects",
     "plotly.subplots",
+    "pyarrow",
+    "pyarrow.parquet",
+    "pyarrow.feather",
     "requests",
     "openpyxl"],
     hookspath=[],
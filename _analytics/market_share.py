@@ -5,6 +5,10 @@ import pandas as pd
 
 # reuse your existing helpers so the "current level" is identical to the chart
 from _visual.graph_hier_bar import node_parent_values, months_sorted 
+from _helpers.master_index import narrow
+
+# the per_firm columns the M/S treemap reads (what ms-data-store keeps client-side)
+TREEMAP_COLUMNS = ["finance_cd", "base_month", "share_pct", "d_prev_pp", "d_1y_pp", "d_2y_pp", "rank", "rank_change"]
 
 
 def _sum_level_by_month(
@@ -110,6 +114,36 @@ def _metrics_from_share(share: pd.Series) -> pd.DataFrame:
     return pd.DataFrame(data, columns=["base_month", "share_pct", "d_prev_pp", "d_1y_pp", "d_2y_pp"])
 
 
+def firm_market_share(
+    df_all: pd.DataFrame,
+    finance_cd: str,
+    *,
+    hier_by_list: dict,
+    list_nos: Iterable[str],
+    colid: str,
+    level_path: List[str],
+    entire_market_cds: Iterable[str],
+    custom_nodes: Optional[dict] = None,
+    s_market: Optional[pd.Series] = None,
+) -> pd.DataFrame:
+    """
+    One firm's rows of compute_full_market_share_data()["per_firm"] (without the
+    ranks), for adding a single firm to a chart without recomputing every firm.
+    `s_market` is that call's "market" series; without it the market is summed here.
+    """
+    market_cds = set(entire_market_cds or [])
+    if finance_cd not in market_cds:
+        return pd.DataFrame(columns=["base_month", "share_pct", "d_prev_pp", "d_1y_pp", "d_2y_pp", "finance_cd"])
+    if s_market is None:
+        df_market = narrow(df_all, finance_cd=sorted(market_cds))
+        s_market = _sum_level_by_month(df_market, hier_by_list, list_nos, colid, level_path, custom_nodes=custom_nodes)
+    s_firm = _sum_level_by_month(narrow(df_all, finance_cd=finance_cd), hier_by_list, list_nos, colid,
+                                 level_path, custom_nodes=custom_nodes)
+    out = _metrics_from_share(_share_series(s_firm, s_market))
+    out["finance_cd"] = finance_cd
+    return out
+
+
 def compute_full_market_share_data(
     df_all: pd.DataFrame,
     *,
@@ -123,10 +157,10 @@ def compute_full_market_share_data(
 ) -> Dict[str, pd.DataFrame]:
     """
     Computes detailed market share metrics for all firms, and aggregate/average
-    metrics for all defined groups.
+    metrics for all defined groups. "market" is the market's level sum by month.
+    `df_all` may be an IndexedMaster (per-firm slices are then row ranges).
     """
-    market_mask = df_all["finance_cd"].isin(list(entire_market_cds or []))
-    df_market = df_all.loc[market_mask].copy()
+    df_market = narrow(df_all, finance_cd=sorted(set(entire_market_cds or [])))
 
     s_market = _sum_level_by_month(
         df_market, hier_by_list, list_nos, colid, level_path, custom_nodes=custom_nodes
@@ -137,7 +171,7 @@ def compute_full_market_share_data(
     market_cds_sorted = sorted(list(entire_market_cds or []))
     
     for cd in market_cds_sorted:
-        df_firm = df_market.loc[df_market["finance_cd"] == cd]
+        df_firm = narrow(df_market, finance_cd=cd)
         s_firm = _sum_level_by_month(
             df_firm, hier_by_list, list_nos, colid, level_path, custom_nodes=custom_nodes
         )
@@ -147,7 +181,7 @@ def compute_full_market_share_data(
         all_firm_stats.append(metrics_df)
 
     if not all_firm_stats:
-        return {"per_firm": pd.DataFrame(), "groups": {}}
+        return {"per_firm": pd.DataFrame(), "groups": {}, "market": s_market}
 
     df_per_firm = pd.concat(all_firm_stats, ignore_index=True)
     df_per_firm["rank"] = df_per_firm.groupby("base_month")["share_pct"].rank(method="min", ascending=False)
@@ -174,4 +208,4 @@ def compute_full_market_share_data(
         
         group_results[gname] = {"agg": agg_metrics, "avg": avg_metrics}
 
-    return {"per_firm": df_per_firm_sorted, "groups": group_results}
\ No newline at end of file
+    return {"per_firm": df_per_firm_sorted, "groups": group_results, "market": s_market}
\ No newline at end of file
@@ -0,0 +1,101 @@
+# bench_cube.py
+"""
+MasterCube vs the long frame (and the IndexedMaster) on a master built from
+the local FISIS stub.
+
+- memory     : frame (deep), cube values + presence mask, cube cells / frame rows
+- node_values: node_parent_values for every firm at the top level of --list-no
+- list_total : parent_series_for_list for every firm and every list in the master
+- ms_data    : compute_full_market_share_data over the whole market
+- max_abs_diff of each result against the frame path (sums in another order
+  may differ in the last bits)
+
+Seconds per round, best of --repeat. Prints one JSON line.
+
+Run:  python -m _bench.bench_cube --firms 40
+"""
+
+from __future__ import annotations
+import argparse
+import json
+import time
+
+import numpy as np
+
+from settings import DEFAULTS, PATHS, RESPONSE_CACHE
+from _bench.fisis_stub import FisisStub, StubConfig
+from _bench.make_fixtures import synthetic_firms
+
+
+def _best(fn, repeat: int):
+    best, out = float("inf"), None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - t0)
+    return round(best, 4), out
+
+def _max_diff(a, b) -> float:
+    a = np.asarray(a, dtype="float64"); b = np.asarray(b, dtype="float64")
+    return float(np.nanmax(np.abs(a - b))) if a.size and a.shape == b.shape else (0.0 if a.shape == b.shape else float("inf"))
+
+
+def run(args: argparse.Namespace) -> dict:
+    RESPONSE_CACHE["enabled"] = False
+    import app
+    from _analytics.market_share import compute_full_market_share_data
+    from _helpers.master_cube import MasterCube
+    from _helpers.master_index import IndexedMaster, narrow
+    from _utils.build_master import _get_required_terms_per_list, build_master_for_codes
+    from _utils.datasets import materialize
+    from _utils.fetch_engine import FetchEngine
+    from _visual.graph_hier_bar import node_parent_values, parent_series_for_list
+
+    hier, _, _ = app.load_app_resources(PATHS)
+    cfgs = [c for g in DEFAULTS["sections"] for c in g["content"]]
+    terms_by_list = _get_required_terms_per_list(cfgs, global_term=args.term)
+    with FisisStub(StubConfig()) as stub:
+        firms = synthetic_firms(stub.fixtures, args.firms)
+        df = build_master_for_codes(firms, startBaseMm=args.start, endBaseMm=args.end, terms_by_list=terms_by_list,
+                                    hierarchy_json_path=PATHS["hier_json"], url=stub.info_url,
+                                    engine=FetchEngine(max_workers=16, per_host=16, rate_per_sec=0))
+    df = materialize(df)
+    t0 = time.perf_counter(); ix = IndexedMaster.build(df); t_ix = time.perf_counter() - t0
+    t0 = time.perf_counter(); cube = MasterCube.build(df); t_cube = time.perf_counter() - t0
+    present = int(cube.present.sum())
+    report = {
+        "rows": int(len(df)), "firms": int(df["finance_cd"].nunique()),
+        "memory": {"frame_mb": round(df.memory_usage(deep=True).sum() / 1e6, 1), "cube_mb": round(cube.nbytes / 1e6, 1),
+                   "cube_shape": list(cube.values.shape), "filled": round(present / max(cube.present.size, 1), 3)},
+        "build_s": {"index": round(t_ix, 3), "cube": round(t_cube, 3)},
+    }
+
+    cds = sorted(df["finance_cd"].unique())
+    lists = sorted(ln for ln in df["list_no"].unique() if ln in hier)
+    cases = {
+        "node_values": lambda d: [node_parent_values(narrow(d, finance_cd=cd), hier, [args.list_no], args.colid, [])[2]["value"].to_numpy()
+                                  for cd in cds],
+        "list_total": lambda d: [parent_series_for_list(narrow(d, finance_cd=cd), hier[ln], args.colid).to_numpy()
+                                 for cd in cds for ln in lists],
+        "ms_data": lambda d: [compute_full_market_share_data(d, hier_by_list=hier, list_nos=[args.list_no], colid=args.colid, level_path=[],
+                                                             entire_market_cds=cds, groups={})["per_firm"]["share_pct"].to_numpy()],
+    }
+    for name, fn in cases.items():
+        t_frame, ref = _best(lambda: fn(df), args.repeat)
+        t_index, got_ix = _best(lambda: fn(ix), args.repeat)
+        t_cube_, got_cube = _best(lambda: fn(cube), args.repeat)
+        report[name] = {"frame_s": t_frame, "index_s": t_index, "cube_s": t_cube_,
+                        "max_abs_diff": max([_max_diff(a, b) for a, b in zip(ref, got_cube)] + [_max_diff(a, b) for a, b in zip(ref, got_ix)] + [0.0])}
+    return report
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="MasterCube vs frame / IndexedMaster: memory and aggregation speed")
+    ap.add_argument("--firms", type=int, default=40)
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--term", default="Q")
+    ap.add_argument("--start", default="201501")
+    ap.add_argument("--end", default="202312")
+    ap.add_argument("--list-no", default="SH001")
+    ap.add_argument("--colid", default="a")
+    print(json.dumps(run(ap.parse_args()), ensure_ascii=False))
@@ -0,0 +1,88 @@
+# bench_fetch.py
+"""
+Reproducible fetch-path benchmark against the local FISIS stub (no key, no network).
+
+Starts the stub in-process, then builds the master for --firms x --lists with
+build_master_for_codes and prints one JSON line:
+wall time, HTTP requests, rows, rows/s, stub-side counters, peak RSS.
+
+The raw-response cache is off unless --response-cache is given (it would turn
+repeat runs into disk reads).
+
+Run:  python -m _bench.bench_fetch --firms 40 --latency-ms 80 --workers 8
+      python -m _bench.bench_fetch --firms 40 --latency-ms 80 --workers 1      # serial baseline
+      python -m _bench.bench_fetch --error-rate 0.05 --throttle-rps 20          # retry / breaker path
+"""
+
+from __future__ import annotations
+import argparse
+import json
+import sys
+import tempfile
+import time
+
+from settings import DEFAULTS, PATHS, RESPONSE_CACHE
+from _bench.fisis_stub import FisisStub, add_stub_args, stub_config_from_args
+from _bench.make_fixtures import synthetic_firms
+
+
+def _peak_rss_mb() -> float:
+    try:
+        import resource
+    except ImportError:  # Windows
+        return float("nan")
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def run(args: argparse.Namespace) -> dict:
+    if not args.response_cache:
+        RESPONSE_CACHE["enabled"] = False
+    else:
+        RESPONSE_CACHE["dir"] = tempfile.mkdtemp(prefix="fisis-http-")
+
+    from _utils.build_master import _get_required_terms_per_list, build_master_for_codes
+    from _utils.fetch_engine import FetchEngine
+    from _utils.http_session import get_session
+
+    cfgs = [c for g in DEFAULTS["sections"] for c in g["content"]]
+    terms_by_list = _get_required_terms_per_list(cfgs, global_term=args.term)
+    if args.lists:
+        terms_by_list = {ln: terms_by_list.get(ln, args.term) for ln in args.lists}
+
+    with FisisStub(stub_config_from_args(args)) as stub:
+        firms = synthetic_firms(stub.fixtures, args.firms)
+        engine = FetchEngine(max_workers=args.workers, per_host=args.per_host or args.workers,
+                             rate_per_sec=args.rate, burst=args.rate or None)
+        get_session().reset_stats()
+        results = []
+        for _ in range(args.repeat):
+            t0 = time.perf_counter()
+            df = build_master_for_codes(firms, startBaseMm=args.start, endBaseMm=args.end, terms_by_list=terms_by_list,
+                                        hierarchy_json_path=PATHS["hier_json"], url=stub.info_url, engine=engine)
+            results.append(time.perf_counter() - t0)
+
+        st = get_session().stats()
+        return {
+            "firms": len(firms), "lists": len(terms_by_list), "workers": args.workers,
+            "latency_ms": args.latency_ms, "wall_s": [round(x, 3) for x in results],
+            "rows": int(len(df)), "rows_per_s": round(len(df) / min(results), 1) if results and min(results) else None,
+            "http": {k: (round(v, 4) if isinstance(v, float) else v) for k, v in st.items()},
+            "stub": dict(stub.stats), "peak_rss_mb": round(_peak_rss_mb(), 1),
+        }
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Benchmark the FISIS fetch path against the local stub")
+    ap.add_argument("--firms", type=int, default=20)
+    ap.add_argument("--lists", nargs="*", default=None, help="default: every list used by the sections")
+    ap.add_argument("--term", default="Q")
+    ap.add_argument("--start", default="202001")
+    ap.add_argument("--end", default="202312")
+    ap.add_argument("--workers", type=int, default=8)
+    ap.add_argument("--per-host", type=int, default=0)
+    ap.add_argument("--rate", type=float, default=0.0, help="client token bucket (0 = off)")
+    ap.add_argument("--repeat", type=int, default=1)
+    ap.add_argument("--response-cache", action="store_true")
+    add_stub_args(ap)
+    print(json.dumps(run(ap.parse_args()), ensure_ascii=False))
@@ -0,0 +1,90 @@
+# bench_normalize.py
+"""
+Memory of the master as built vs as the registry keeps it, on a market-wide,
+multi-year master from the local FISIS stub.
+
+- raw        : build_master_for_codes output (object columns, names on every row)
+- wide       : materialize() (typed codes, float value, names as categoricals)
+- fact+dims  : normalize() (names split into MasterDims)
+- per column : deep bytes of each column in raw / wide / fact
+- y_label    : make_hier_stacked_figure's column_nm lookup, frame rows vs dims
+
+Bytes are pandas deep memory_usage; dims are the sizes of their dict keys and
+strings (sys.getsizeof). Prints one JSON line.
+
+Run:  python -m _bench.bench_normalize --firms 60 --start 201501 --end 202312
+"""
+
+from __future__ import annotations
+import argparse
+import json
+import sys
+import time
+
+from settings import DEFAULTS, PATHS, RESPONSE_CACHE
+from _bench.fisis_stub import FisisStub, StubConfig
+from _bench.make_fixtures import synthetic_firms
+
+
+def _mb(n: int) -> float:
+    return round(n / 1e6, 2)
+
+def _dims_bytes(dims) -> int:
+    n = 0
+    for table in (dims.lists, dims.accounts, dims.columns):
+        n += sys.getsizeof(table)
+        for k, v in table.items():
+            n += sum(sys.getsizeof(x) for x in (k if isinstance(k, tuple) else (k,)))
+            n += sum(sys.getsizeof(x) for x in (v if isinstance(v, list) else [v]))
+    return n
+
+
+def run(args: argparse.Namespace) -> dict:
+    RESPONSE_CACHE["enabled"] = False
+    from _helpers.master_index import IndexedMaster, as_frame, narrow
+    from _utils.build_master import _get_required_terms_per_list, build_master_for_codes
+    from _utils.datasets import materialize, normalize
+    from _utils.fetch_engine import FetchEngine
+
+    cfgs = [c for g in DEFAULTS["sections"] for c in g["content"]]
+    terms_by_list = _get_required_terms_per_list(cfgs, global_term=args.term)
+    with FisisStub(StubConfig()) as stub:
+        firms = synthetic_firms(stub.fixtures, args.firms)
+        raw = build_master_for_codes(firms, startBaseMm=args.start, endBaseMm=args.end, terms_by_list=terms_by_list,
+                                     hierarchy_json_path=PATHS["hier_json"], url=stub.info_url,
+                                     engine=FetchEngine(max_workers=16, per_host=16, rate_per_sec=0))
+    wide = materialize(raw)
+    t0 = time.perf_counter()
+    fact, dims = normalize(raw)
+    t_norm = time.perf_counter() - t0
+
+    cols = {name: d.memory_usage(deep=True, index=False) for name, d in (("raw", raw), ("wide", wide), ("fact", fact))}
+    report = {
+        "rows": int(len(raw)), "firms": int(raw["finance_cd"].nunique()),
+        "months": int(raw["base_month"].nunique()), "normalize_s": round(t_norm, 3),
+        "memory_mb": {"raw": _mb(cols["raw"].sum()), "wide": _mb(cols["wide"].sum()),
+                      "fact": _mb(cols["fact"].sum()), "dims": _mb(_dims_bytes(dims))},
+        "dims_rows": {"lists": len(dims.lists), "accounts": len(dims.accounts), "columns": len(dims.columns)},
+        "per_column_mb": {c: [_mb(cols[k].get(c, 0)) for k in ("raw", "wide", "fact")] for c in cols["raw"].index},
+    }
+
+    lists = sorted(fact["list_no"].unique())
+    ix_wide, ix_fact = IndexedMaster.build(wide), IndexedMaster.build(fact, dims)
+    def from_rows():
+        return [list(as_frame(narrow(ix_wide, list_no=ln, column_id=args.colid))["column_nm"].unique()) for ln in lists]
+    def from_dims():
+        return [ix_fact.dims.column_label([ln], args.colid) for ln in lists]
+    for name, fn in (("y_label_rows_s", from_rows), ("y_label_dims_s", from_dims)):
+        t0 = time.perf_counter(); out = fn(); report[name] = round(time.perf_counter() - t0, 4)
+    report["y_label_same"] = [[str(x) for x in v] for v in from_rows()] == from_dims()
+    return report
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Master memory: raw vs materialized vs fact + dims")
+    ap.add_argument("--firms", type=int, default=60)
+    ap.add_argument("--term", default="Q")
+    ap.add_argument("--start", default="201501")
+    ap.add_argument("--end", default="202312")
+    ap.add_argument("--colid", default="a")
+    print(json.dumps(run(ap.parse_args()), ensure_ascii=False))
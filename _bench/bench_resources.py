@@ -0,0 +1,60 @@
+# bench_resources.py
+"""
+Cold / warm startup cost of app.load_app_resources.
+
+Each measurement runs in a fresh interpreter (imports excluded from the timing):
+cold = no cache file, warm = cache present and valid, touched = a source's
+mtime changed but not its content. The cache is written to a temp path, so
+the real one under _local is left alone. Prints one JSON line.
+
+Run:  python -m _bench.bench_resources --repeat 5
+"""
+
+from __future__ import annotations
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+_CHILD = r"""
+import json, sys, time
+from settings import PATHS
+import app
+paths = dict(PATHS, app_resources=sys.argv[1])
+t0 = time.perf_counter()
+app.load_app_resources(paths)
+print("RESULT", json.dumps(time.perf_counter() - t0))
+"""
+
+
+def _one(cache_path: str) -> float:
+    out = subprocess.run([sys.executable, "-c", _CHILD, cache_path], capture_output=True, text=True, check=True,
+                         cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    line = next(l for l in out.stdout.splitlines() if l.startswith("RESULT "))
+    return json.loads(line[len("RESULT "):]) * 1000
+
+
+def run(args: argparse.Namespace) -> dict:
+    from settings import PATHS
+    cache_path = os.path.join(tempfile.mkdtemp(prefix="fisis-res-"), "app_resources.bin")
+    cold, warm = [], []
+    for _ in range(args.repeat):
+        if os.path.exists(cache_path):
+            os.remove(cache_path)
+        cold.append(_one(cache_path))
+        warm.append(_one(cache_path))
+    os.utime(PATHS["within_naming_csv"])
+    touched = _one(cache_path)
+    return {
+        "cold_ms": round(statistics.median(cold), 1), "warm_ms": round(statistics.median(warm), 1),
+        "touched_ms": round(touched, 1), "cache_bytes": os.path.getsize(cache_path), "repeat": args.repeat,
+    }
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Benchmark app resource loading (cold vs cached)")
+    ap.add_argument("--repeat", type=int, default=3)
+    print(json.dumps(run(ap.parse_args())))
@@ -0,0 +1,92 @@
+# bench_slices.py
+"""
+Slice and figure costs on a master built from the local FISIS stub: boolean
+masks over the whole frame (before) vs IndexedMaster row ranges (after).
+
+- slice_firm / slice_list / slice_account : the lookups the plots repeat,
+  for every firm (and its first list / column / account)
+- filter_section : _filter_master_data_for_section (a date window and the H
+  term) for every firm, rows read
+- bar_figure : make_hier_stacked_figure for the selected firm + compared ones
+- ms_data    : compute_full_market_share_data over the whole market
+
+Seconds per round, best of --repeat. Prints one JSON line.
+
+Run:  python -m _bench.bench_slices --firms 40
+"""
+
+from __future__ import annotations
+import argparse
+import json
+import time
+
+from settings import DEFAULTS, PATHS, RESPONSE_CACHE
+from _bench.fisis_stub import FisisStub, StubConfig
+from _bench.make_fixtures import synthetic_firms
+
+
+def _best(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return round(best, 4)
+
+
+def run(args: argparse.Namespace) -> dict:
+    RESPONSE_CACHE["enabled"] = False
+    import app
+    from _analytics.market_share import compute_full_market_share_data
+    from _helpers.filter import _filter_master_data_for_section
+    from _helpers.master_index import IndexedMaster, narrow
+    from _utils.build_master import _get_required_terms_per_list, build_master_for_codes
+    from _utils.datasets import materialize
+    from _utils.fetch_engine import FetchEngine
+    from _visual.graph_hier_bar import make_hier_stacked_figure
+
+    hier, _, namer = app.load_app_resources(PATHS)
+    cfgs = [c for g in DEFAULTS["sections"] for c in g["content"]]
+    terms_by_list = _get_required_terms_per_list(cfgs, global_term=args.term)
+    with FisisStub(StubConfig()) as stub:
+        firms = synthetic_firms(stub.fixtures, args.firms)
+        df = build_master_for_codes(firms, startBaseMm=args.start, endBaseMm=args.end, terms_by_list=terms_by_list,
+                                    hierarchy_json_path=PATHS["hier_json"], url=stub.info_url,
+                                    engine=FetchEngine(max_workers=16, per_host=16, rate_per_sec=0))
+    df = materialize(df)
+    t0 = time.perf_counter()
+    ix = IndexedMaster.build(df)
+    report = {"rows": int(len(df)), "firms": len(firms), "build_s": round(time.perf_counter() - t0, 4)}
+
+    window = {"min_d": args.start[:4] + "06", "max_d": "end"}
+    keys = df.drop_duplicates("finance_cd")[["finance_cd", "list_no", "column_id", "account_cd"]].to_dict("records")
+    lookups = {
+        "slice_firm": lambda d: [len(narrow(d, finance_cd=k["finance_cd"])) for k in keys],
+        "slice_list": lambda d: [len(narrow(d, finance_cd=k["finance_cd"], list_no=k["list_no"])) for k in keys],
+        "slice_account": lambda d: [len(narrow(d, **k)) for k in keys],
+        "filter_section": lambda d: [len(_filter_master_data_for_section(narrow(d, finance_cd=k["finance_cd"]), window, args.colid, "H")[0])
+                                     for k in keys],
+    }
+    plotted = {cd: {"pattern": p} for cd, p in zip(firms[: args.compared + 1], ["", "x", "/", ".", "-"])}
+    figures = {
+        "bar_figure": lambda d: make_hier_stacked_figure(hier, d, [args.list_no], args.colid, [], namer=namer, firms_to_plot=plotted),
+        "ms_data": lambda d: compute_full_market_share_data(d, hier_by_list=hier, list_nos=[args.list_no], colid=args.colid,
+                                                            level_path=[], entire_market_cds=firms, groups={}),
+    }
+    for name, fn in {**lookups, **figures}.items():
+        before, after = _best(lambda: fn(df), args.repeat), _best(lambda: fn(ix), args.repeat)
+        report[name] = {"before_s": before, "after_s": after, "speedup": round(before / max(after, 1e-9), 1)}
+    return report
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Mask vs IndexedMaster slices and figure builds")
+    ap.add_argument("--firms", type=int, default=40)
+    ap.add_argument("--compared", type=int, default=4, help="firms plotted next to the selected one")
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--term", default="Q")
+    ap.add_argument("--start", default="201501")
+    ap.add_argument("--end", default="202312")
+    ap.add_argument("--list-no", default="SH001")
+    ap.add_argument("--colid", default="a")
+    print(json.dumps(run(ap.parse_args()), ensure_ascii=False))
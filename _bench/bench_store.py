@@ -0,0 +1,138 @@
+# bench_store.py
+"""
+Legacy master_df.csv vs the partitioned master store, on a master frame built
+from the local FISIS stub.
+
+For each backend: write time, bytes on disk, full read time, a scoped read
+(--scope-lists x --scope-firms, key columns only) -- the read a run does to find
+its missing cells -- and a section slice (the scope firms x one list x one
+column, with peak Python memory). Prints one JSON line.
+
+Run:  python -m _bench.bench_store --firms 60 --start 201501 --end 202312
+      python -m _bench.bench_store --firms 60 --format feather
+      python -m _bench.bench_store --firms 60 --format sqlite
+"""
+
+from __future__ import annotations
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import time
+import tracemalloc
+
+import pandas as pd
+
+from settings import DEFAULTS, PATHS, RESPONSE_CACHE
+from _bench.fisis_stub import FisisStub, StubConfig
+from _bench.make_fixtures import synthetic_firms
+
+_KEY_COLS = ["finance_cd", "list_no", "term", "base_month"]
+
+
+def _du(path: str) -> int:
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    return sum(os.path.getsize(os.path.join(d, f)) for d, _, fs in os.walk(path) for f in fs)
+
+def _timed(fn):
+    t0 = time.perf_counter()
+    out = fn()
+    return out, round(time.perf_counter() - t0, 4)
+
+def _peak_mb(fn) -> float:
+    tracemalloc.start()
+    try:
+        fn()
+        return round(tracemalloc.get_traced_memory()[1] / 1e6, 1)
+    finally:
+        tracemalloc.stop()
+
+def _legacy_read(path: str) -> pd.DataFrame:
+    # what build_master did on every run before the store
+    df = pd.read_csv(path, dtype=str, encoding="utf-8-sig")
+    df["finance_cd"] = df["finance_cd"].str.strip().str.extract(r"(\d+)", expand=False).fillna("").str.zfill(7)
+    df["value"] = pd.to_numeric(df["value"], errors="coerce")
+    return df
+
+
+def run(args: argparse.Namespace) -> dict:
+    RESPONSE_CACHE["enabled"] = False
+    from _utils.build_master import _get_required_terms_per_list, build_master_for_codes
+    from _utils.fetch_engine import FetchEngine
+    from _utils.master_store import MasterStore
+    from _utils.sqlite_store import SqliteMasterStore
+
+    cfgs = [c for g in DEFAULTS["sections"] for c in g["content"]]
+    terms_by_list = _get_required_terms_per_list(cfgs, global_term=args.term)
+
+    with FisisStub(StubConfig(account_scale=args.account_scale)) as stub:
+        firms = synthetic_firms(stub.fixtures, args.firms)
+        df = build_master_for_codes(firms, startBaseMm=args.start, endBaseMm=args.end, terms_by_list=terms_by_list,
+                                    hierarchy_json_path=PATHS["hier_json"], url=stub.info_url,
+                                    engine=FetchEngine(max_workers=16, per_host=16, rate_per_sec=0))
+
+    scope_lists = {ln: terms_by_list[ln] for ln in sorted(terms_by_list)[: args.scope_lists]}
+    scope_cds = firms[: args.scope_firms]
+    tmp = tempfile.mkdtemp(prefix="fisis-store-")
+    try:
+        csv_path = os.path.join(tmp, "master_df.csv")
+        _, csv_write = _timed(lambda: df.to_csv(csv_path, index=False, encoding="utf-8-sig"))
+        _, csv_read = _timed(lambda: _legacy_read(csv_path))
+
+        def csv_scoped():
+            full = _legacy_read(csv_path)
+            m = full["finance_cd"].isin(scope_cds) & full["list_no"].isin(scope_lists)
+            return full.loc[m, _KEY_COLS]
+        scoped_csv, csv_scoped_s = _timed(csv_scoped)
+
+        slice_ln = sorted(scope_lists)[0]
+        slice_col = str(df.loc[df["list_no"] == slice_ln, "column_id"].iloc[0])
+        def csv_slice():
+            full = _legacy_read(csv_path)
+            return full[full["finance_cd"].isin(scope_cds) & (full["list_no"] == slice_ln) & (full["column_id"] == slice_col)]
+        sliced_csv, csv_slice_s = _timed(csv_slice)
+
+        root = os.path.join(tmp, "store")
+        if args.format == "sqlite":
+            store = SqliteMasterStore(root)
+            def store_slice():
+                return store.query(scope_cds, slice_ln, column_id=slice_col)
+        else:
+            store = MasterStore(root, fmt=args.format, read_workers=args.read_workers)
+            def store_slice():
+                part = store.read({slice_ln: scope_lists[slice_ln]}, scope_cds)
+                return part[part["column_id"] == slice_col]
+        parts, st_write = _timed(lambda: store.write(df))
+        full, st_read = _timed(lambda: store.read())
+        scoped, st_scoped = _timed(lambda: store.read(scope_lists, scope_cds, args.start, args.end, columns=_KEY_COLS))
+        sliced, st_slice = _timed(store_slice)
+        assert len(full) == len(df) and len(scoped) == len(scoped_csv), "store lost rows"
+        assert len(sliced) == len(sliced_csv), "section slice differs"
+
+        return {
+            "rows": int(len(df)), "firms": len(firms), "lists": len(terms_by_list), "partitions": parts,
+            "scope": {"lists": len(scope_lists), "firms": len(scope_cds), "rows": int(len(scoped))},
+            "slice": {"list_no": slice_ln, "column_id": slice_col, "rows": int(len(sliced))},
+            "csv": {"bytes": _du(csv_path), "write_s": csv_write, "read_s": csv_read, "scoped_read_s": csv_scoped_s,
+                    "slice_s": csv_slice_s, "slice_peak_mb": _peak_mb(csv_slice)},
+            store.fmt: {"bytes": _du(store.root), "write_s": st_write, "read_s": st_read, "scoped_read_s": st_scoped,
+                        "slice_s": st_slice, "slice_peak_mb": _peak_mb(store_slice)},
+        }
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Benchmark the legacy CSV cache against the master store")
+    ap.add_argument("--firms", type=int, default=40)
+    ap.add_argument("--term", default="Q")
+    ap.add_argument("--start", default="201501")
+    ap.add_argument("--end", default="202312")
+    ap.add_argument("--account-scale", type=int, default=1)
+    ap.add_argument("--format", default="parquet", choices=["parquet", "feather", "csv", "sqlite"])
+    ap.add_argument("--read-workers", type=int, default=8)
+    ap.add_argument("--scope-lists", type=int, default=3)
+    ap.add_argument("--scope-firms", type=int, default=5)
+    print(json.dumps(run(ap.parse_args()), ensure_ascii=False))
@@ -0,0 +1,97 @@
+# bench_wire.py
+"""
+Bytes per callback response, before and after the compact wire formats, on a
+master built from the local FISIS stub.
+
+- ft-store-master : records (before) vs the dataset token
+- bar figure      : _update_fig_section's figure with dict customdata (before)
+                    vs HoverRefs ints plus their table
+- ms-data-store   : per_firm records (before) vs pack_frame(TREEMAP_COLUMNS)
+
+Each entry gives raw JSON bytes and gzip bytes (what flask-compress sends
+when the browser does not accept brotli; brotli too, if installed).
+Prints one JSON line.
+
+Run:  python -m _bench.bench_wire --firms 40 --compared 4
+"""
+
+from __future__ import annotations
+import argparse
+import gzip
+import json
+
+import plotly.io as pio
+
+from settings import DEFAULTS, PATHS, RESPONSE_CACHE
+from _bench.fisis_stub import FisisStub, StubConfig
+from _bench.make_fixtures import synthetic_firms
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def _sizes(text: str) -> dict:
+    raw = text.encode("utf-8")
+    out = {"raw": len(raw), "gzip": len(gzip.compress(raw, 6))}
+    if brotli is not None:
+        out["br"] = len(brotli.compress(raw))
+    return out
+
+def _entry(before: str, after: str) -> dict:
+    b, a = _sizes(before), _sizes(after)
+    return {"before": b, "after": a, "ratio_raw": round(b["raw"] / max(a["raw"], 1), 1),
+            "ratio_vs_gzip_after": round(b["raw"] / max(a["gzip"], 1), 1)}
+
+
+def run(args: argparse.Namespace) -> dict:
+    RESPONSE_CACHE["enabled"] = False
+    import app
+    from _analytics.market_share import TREEMAP_COLUMNS, compute_full_market_share_data
+    from _helpers.graph import _customdata_keys
+    from _helpers.wire import pack_frame
+    from _utils.build_master import _get_required_terms_per_list, build_master_for_codes
+    from _utils.datasets import put_dataset
+    from _utils.fetch_engine import FetchEngine
+    from _visual.graph_hier_bar import make_hier_stacked_figure
+
+    hier, _, namer = app.load_app_resources(PATHS)
+    cfgs = [c for g in DEFAULTS["sections"] for c in g["content"]]
+    terms_by_list = _get_required_terms_per_list(cfgs, global_term=args.term)
+    with FisisStub(StubConfig()) as stub:
+        firms = synthetic_firms(stub.fixtures, args.firms)
+        df = build_master_for_codes(firms, startBaseMm=args.start, endBaseMm=args.end, terms_by_list=terms_by_list,
+                                    hierarchy_json_path=PATHS["hier_json"], url=stub.info_url,
+                                    engine=FetchEngine(max_workers=16, per_host=16, rate_per_sec=0))
+
+    report = {"rows": int(len(df)), "firms": len(firms)}
+    report["ft-store-master"] = _entry(json.dumps(df.to_dict("records"), default=str, ensure_ascii=False),
+                                       json.dumps(put_dataset(df)))
+
+    plotted = {cd: {"pattern": p} for cd, p in zip(firms[: args.compared + 1], ["", "x", "/", ".", "-"] * 4)}
+    info: dict = {}
+    fig = make_hier_stacked_figure(hier, df, [args.list_no], args.colid, [], namer=namer, firms_to_plot=plotted, trace_info=info)
+    after = pio.to_json(fig) + json.dumps(info["hover_refs"], ensure_ascii=False)  # the table travels in bar-owners
+    for tr in fig.data:
+        if tr.customdata is not None:
+            tr.customdata = [dict(zip(("node_key", "firm_cd"), _customdata_keys(c, info["hover_refs"]))) for c in tr.customdata]
+    report["bar-figure"] = _entry(pio.to_json(fig), after)
+
+    per_firm = compute_full_market_share_data(df, hier_by_list=hier, list_nos=[args.list_no], colid=args.colid,
+                                              level_path=[], entire_market_cds=firms, groups={})["per_firm"]
+    report["ms-data-store"] = _entry(json.dumps(per_firm.to_dict("records"), default=str),
+                                     json.dumps(pack_frame(per_firm, TREEMAP_COLUMNS)))
+    return report
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Bytes per callback response, before vs after the compact formats")
+    ap.add_argument("--firms", type=int, default=40)
+    ap.add_argument("--compared", type=int, default=4, help="firms plotted next to the selected one")
+    ap.add_argument("--term", default="Q")
+    ap.add_argument("--start", default="201501")
+    ap.add_argument("--end", default="202312")
+    ap.add_argument("--list-no", default="SH001")
+    ap.add_argument("--colid", default="a")
+    print(json.dumps(run(ap.parse_args()), ensure_ascii=False))
@@ -0,0 +1,233 @@
+# check_node_values.py
+"""
+node_parent_values (one grouped pass over all nodes) against the per-node loop
+it replaced, kept here as the reference, on a master built from the local
+FISIS stub.
+
+Cases, for the whole market and for every firm, on the frame, the
+IndexedMaster and the MasterCube:
+- top        : the top level of each list
+- drill      : each top account of each list (level_path ["acc:LIST:CD"]),
+               two of its children one level further, and the same in
+               side-by-side mode (level_path ["CD"], ["CD", "KID"])
+- multi      : all lists at once (__MULTI__)
+- custom     : "LIST:CD + LIST:CD" across lists, "LIST + LIST", a single list
+               expanded (__CUSTOM__), plus an account that is not in the master
+
+A case passes when parent_listno, nodes, base_month and node_id are equal and
+value differs by at most --tol. Seconds are per full pass over the cases.
+Prints one JSON line; exits 1 on any mismatch.
+
+Run:  python -m _bench.check_node_values --firms 10
+"""
+
+from __future__ import annotations
+import argparse
+import json
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from settings import DEFAULTS, PATHS, RESPONSE_CACHE
+from _bench.fisis_stub import FisisStub, StubConfig
+from _bench.make_fixtures import synthetic_firms
+
+
+# ---------- reference: the per-node loop ----------
+def _ref_series(vals: pd.DataFrame, months: List[str]) -> pd.Series:
+    if vals.empty:
+        return pd.Series(0.0, index=pd.Index(months, name="base_month"))
+    return vals.groupby("base_month")["value"].sum().reindex(months).fillna(0.0)
+
+def _ref_sum_over_nodes(df_master, list_no: str, node_ids: List[str], colid: str) -> pd.DataFrame:
+    from _helpers.master_index import narrow
+    from _visual.graph_hier_bar import months_sorted, values_for_accounts
+    months = months_sorted(df_master)
+    scope = narrow(df_master, list_no=list_no)
+    rows = [pd.DataFrame({"base_month": months, "node_id": nid,
+                          "value": _ref_series(values_for_accounts(scope, [nid], colid), months).values}) for nid in node_ids]
+    return pd.concat(rows, ignore_index=True) if rows else pd.DataFrame(columns=["base_month", "node_id", "value"])
+
+def reference_node_parent_values(
+    df_master: pd.DataFrame,
+    hier_by_list: Dict[str, dict],
+    list_nos: List[str],
+    colid: str,
+    level_path: List[str],
+    custom_nodes: Optional[List[str]] = None,
+    mode: Optional[str] = None,
+) -> Tuple[str, List[str], pd.DataFrame]:
+    from _helpers.master_index import narrow
+    from _visual.graph_hier_bar import (get_children, get_top_level_accounts, months_sorted,
+                                        parent_series_for_list, values_for_accounts)
+    months = months_sorted(df_master)
+
+    if custom_nodes and len(level_path) == 0:
+        nodes = custom_nodes[:]
+        rows = []
+        for key in nodes:
+            if key.startswith("acc:"):
+                _, listno, acd = key.split(":")
+                scope = narrow(df_master, list_no=listno)
+
+                vals = values_for_accounts(scope, [acd], colid)
+
+
+                ser = (vals.groupby("base_month")["value"].sum()
+                       .reindex(months).fillna(0.0)) if not vals.empty else pd.Series(0.0, index=pd.Index(months, name="base_month"))
+                rows.append(pd.DataFrame({"base_month": months, "node_id": key, "value": ser.values}))
+            elif key.startswith("list:"):
+                listno = key.split(":")[1]
+                ser = parent_series_for_list(df_master, hier_by_list[listno], colid)
+                rows.append(pd.DataFrame({"base_month": months, "node_id": key, "value": ser.values}))
+        parent_vals = pd.concat(rows, ignore_index=True) if rows else pd.DataFrame(columns=["base_month","node_id","value"])
+        return "__CUSTOM__", nodes, parent_vals
+
+    if len(list_nos) > 1 and len(level_path) == 0:
+        rows = []
+        for ln in list_nos:
+            ser = parent_series_for_list(df_master, hier_by_list[ln], colid)
+            rows.append(pd.DataFrame({"base_month": months, "node_id": ln, "value": ser.values}))
+        parent_vals = pd.concat(rows, ignore_index=True) if rows else pd.DataFrame(columns=["base_month","node_id","value"])
+        return "__MULTI__", list_nos[:], parent_vals
+
+    if len(level_path) == 0 and len(list_nos) == 1:
+        active = list_nos[0]
+        nodes = get_top_level_accounts(hier_by_list[active])
+        parent_vals = _ref_sum_over_nodes(df_master, active, nodes, colid)
+        return active, nodes, parent_vals
+
+    head = level_path[0]
+    if head.startswith("list:"):
+        active = head.split(":")[1]
+    elif head.startswith("acc:"):
+        _, active, _ = head.split(":", 2) 
+    else:
+        active = list_nos[0]
+
+    if len(level_path) == 1:
+        last = level_path[0]
+        if last.startswith("acc:"):
+            _, listno, acd = last.split(":", 2)
+            nodes = get_children(hier_by_list[listno], acd)
+            parent_vals = _ref_sum_over_nodes(df_master, listno, nodes, colid)
+            return listno, nodes, parent_vals
+        else:
+            nodes = get_top_level_accounts(hier_by_list[active])
+            parent_vals = _ref_sum_over_nodes(df_master, active, nodes, colid)
+            return active, nodes, parent_vals
+            
+    last = level_path[-1]
+    if last.startswith("acc:"):
+        _, listno, acd = last.split(":", 2)
+        nodes = get_children(hier_by_list[listno], acd)
+        parent_vals = _ref_sum_over_nodes(df_master, listno, nodes, colid)
+        return listno, nodes, parent_vals
+    
+    if level_path:
+        active_list_no = list_nos[0] 
+        parent_acd = level_path[-1] 
+
+        if mode != 'side-by-side':
+            try: 
+                _, active_list_no, parent_acd = parent_acd.split(":", 2)
+            except ValueError:
+                pass 
+        nodes = get_children(hier_by_list.get(active_list_no, {}), parent_acd)
+        parent_vals = _ref_sum_over_nodes(df_master, active_list_no, nodes, colid)
+        return active_list_no, nodes, parent_vals
+
+    nodes = get_top_level_accounts(hier_by_list[active])
+    parent_vals = _ref_sum_over_nodes(df_master, active, nodes, colid)
+    return active, nodes, parent_vals
+
+
+# ---------- cases ----------
+def _cases(hier: Dict[str, dict], lists: List[str]) -> List[dict]:
+    from _visual.graph_hier_bar import get_children, get_top_level_accounts, parse_custom_nodes
+    cases = []
+    for ln in lists:
+        cases.append({"list_nos": [ln], "level_path": []})
+        for acd in get_top_level_accounts(hier[ln]):
+            if get_children(hier[ln], acd):
+                cases.append({"list_nos": [ln], "level_path": [f"acc:{ln}:{acd}"]})
+                cases.append({"list_nos": [ln], "level_path": [acd], "mode": "side-by-side"})
+                for kid in get_children(hier[ln], acd)[:2]:
+                    cases.append({"list_nos": [ln], "level_path": [f"acc:{ln}:{acd}", f"acc:{ln}:{kid}"]})
+                    cases.append({"list_nos": [ln], "level_path": [acd, kid], "mode": "side-by-side"})
+    if len(lists) > 1:
+        cases.append({"list_nos": lists, "level_path": []})
+        cases.append({"list_nos": lists[:1], "level_path": [], "custom_nodes": parse_custom_nodes(" + ".join(lists[:3]), hier)})
+    picks = [f"{ln}:{get_top_level_accounts(hier[ln])[0]}" for ln in lists[:3] if get_top_level_accounts(hier[ln])]
+    spec = " + ".join(picks + [f"{lists[0]}:__none__"])
+    cases.append({"list_nos": lists[:1], "level_path": [], "custom_nodes": parse_custom_nodes(spec, hier)})
+    cases.append({"list_nos": lists[:1], "level_path": [], "custom_nodes": parse_custom_nodes(lists[0], hier)})
+    return cases
+
+def _same(a, b, tol: float) -> bool:
+    (pa, na, va), (pb, nb, vb) = a, b
+    if pa != pb or list(na) != list(nb) or len(va) != len(vb):
+        return False
+    if list(va["base_month"].astype(str)) != list(vb["base_month"].astype(str)):
+        return False
+    if list(va["node_id"].astype(str)) != list(vb["node_id"].astype(str)):
+        return False
+    x, y = va["value"].to_numpy(dtype="float64"), vb["value"].to_numpy(dtype="float64")
+    return bool(np.all(np.abs(x - y) <= tol))
+
+
+def run(args: argparse.Namespace) -> dict:
+    RESPONSE_CACHE["enabled"] = False
+    import app
+    from _helpers.master_cube import MasterCube
+    from _helpers.master_index import IndexedMaster, narrow
+    from _utils.build_master import _get_required_terms_per_list, build_master_for_codes
+    from _utils.datasets import normalize
+    from _utils.fetch_engine import FetchEngine
+    from _visual.graph_hier_bar import node_parent_values
+
+    hier, _, _ = app.load_app_resources(PATHS)
+    cfgs = [c for g in DEFAULTS["sections"] for c in g["content"]]
+    terms_by_list = _get_required_terms_per_list(cfgs, global_term=args.term)
+    with FisisStub(StubConfig()) as stub:
+        firms = synthetic_firms(stub.fixtures, args.firms)
+        raw = build_master_for_codes(firms, startBaseMm=args.start, endBaseMm=args.end, terms_by_list=terms_by_list,
+                                     hierarchy_json_path=PATHS["hier_json"], url=stub.info_url,
+                                     engine=FetchEngine(max_workers=16, per_host=16, rate_per_sec=0))
+    df, dims = normalize(raw)
+    sources = {"frame": df, "index": IndexedMaster.build(df, dims), "cube": MasterCube.build(df, dims)}
+
+    lists = sorted(ln for ln in df["list_no"].unique() if ln in hier)
+    cases = _cases(hier, lists)
+    scopes = [None] + sorted(df["finance_cd"].unique())
+    report = {"rows": int(len(df)), "firms": len(scopes) - 1, "cases": len(cases) * len(scopes), "mismatches": {}, "seconds": {}}
+    for name, src in sources.items():
+        bad, t_ref, t_new = [], 0.0, 0.0
+        for cd in scopes:
+            d = src if cd is None else narrow(src, finance_cd=cd)
+            for case in cases:
+                kw = dict(case)
+                t0 = time.perf_counter(); want = reference_node_parent_values(d, hier, colid=args.colid, **kw); t_ref += time.perf_counter() - t0
+                t0 = time.perf_counter(); got = node_parent_values(d, hier, colid=args.colid, **kw); t_new += time.perf_counter() - t0
+                if not _same(want, got, args.tol):
+                    bad.append({"finance_cd": cd, **case})
+        report["mismatches"][name] = bad[:5] + ([f"... {len(bad) - 5} more"] if len(bad) > 5 else [])
+        report["seconds"][name] = {"per_node": round(t_ref, 3), "one_pass": round(t_new, 3)}
+    report["ok"] = not any(report["mismatches"].values())
+    return report
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="node_parent_values: one grouped pass vs the per-node loop")
+    ap.add_argument("--firms", type=int, default=10)
+    ap.add_argument("--term", default="Q")
+    ap.add_argument("--start", default="202001")
+    ap.add_argument("--end", default="202312")
+    ap.add_argument("--colid", default="a")
+    ap.add_argument("--tol", type=float, default=1e-6)
+    out = run(ap.parse_args())
+    print(json.dumps(out, ensure_ascii=False))
+    sys.exit(0 if out["ok"] else 1)
@@ -0,0 +1,93 @@
+# check_scope_memo.py
+"""
+Scope memo answers against the store path, on a temporary store filled from
+the local FISIS stub.
+
+For each list: load it as Q, then request each H/Y term it publishes
+(fisis_list_terms_map.csv) twice, once with the Q scope in memory (memo
+path) and once with the memo cleared (store path).
+The two frames must be equal. A flow-like list (TERM_DERIVATION
+"kinds") is fetched per term, so its H/Y request must miss the memo;
+a stock-like list that publishes Q must hit it.
+
+Prints one JSON line; exits 1 on any mismatch.
+
+Run:  python -m _bench.check_scope_memo --flow SH018 --stock SH001
+"""
+
+from __future__ import annotations
+import argparse
+import json
+import shutil
+import sys
+import tempfile
+
+import pandas as pd
+
+from settings import PATHS, RESPONSE_CACHE
+from _bench.fisis_stub import FisisStub, StubConfig
+from _bench.make_fixtures import synthetic_firms
+
+_KEY = ["list_no", "finance_cd", "term", "base_month", "account_cd", "column_id"]
+
+
+def _sorted(df: pd.DataFrame) -> pd.DataFrame:
+    out = df[_KEY + ["value"]].astype({c: str for c in _KEY})
+    out["value"] = pd.to_numeric(out["value"], errors="coerce")
+    return out.sort_values(_KEY, kind="stable").reset_index(drop=True)
+
+
+def run(args: argparse.Namespace) -> dict:
+    RESPONSE_CACHE["enabled"] = False
+    from _utils.build_master import _open_store, load_or_build_master_for_market
+    from _utils.fetch_planner import load_supported_terms
+    from _utils.fetch_engine import FetchEngine
+    from _utils.scope_memo import get_scope_memo
+    from _utils.term_derivation import list_kind
+
+    tmp = tempfile.mkdtemp(prefix="fisis-memo-")
+    report = {"lists": {}}
+    supported = load_supported_terms(PATHS["terms_map_csv"])
+    try:
+        with FisisStub(StubConfig()) as stub:
+            firms = synthetic_firms(stub.fixtures, args.firms)
+
+            def load(ln: str, term: str) -> tuple:
+                rep: dict = {}
+                df = load_or_build_master_for_market(
+                    firms, term=term, startBaseMm=args.start, endBaseMm=args.end, listNo=[ln], section_cfgs=[],
+                    hierarchy_json_path=PATHS["hier_json"], cache_path=tmp, url=stub.info_url, report=rep,
+                    engine=FetchEngine(max_workers=8, per_host=8, rate_per_sec=0))
+                return df, bool(rep.get("memory"))
+
+            memo = get_scope_memo(_open_store(tmp))
+            for ln in (args.flow, args.stock):
+                out = {"kind": list_kind(ln)}
+                for term in sorted(t for t in supported.get(ln, ()) if t in ("H", "Y")):
+                    memo.clear()
+                    load(ln, "Q")
+                    via_memo, hit = load(ln, term)
+                    memo.clear()
+                    via_store, _ = load(ln, term)
+                    out[term] = {"memo_hit": hit, "rows": len(via_store), "same": _sorted(via_memo).equals(_sorted(via_store))}
+                report["lists"][ln] = out
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    flow, stock = report["lists"][args.flow], report["lists"][args.stock]
+    flow_terms = [t for t in flow if t != "kind"]
+    report["ok"] = (flow["kind"] == "flow" and bool(flow_terms) and not any(flow[t]["memo_hit"] for t in flow_terms)
+                    and all(v["same"] for lst in (flow, stock) for t, v in lst.items() if t != "kind"))
+    return report
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Scope memo vs store path for flow- and stock-like lists")
+    ap.add_argument("--flow", default="SH018")
+    ap.add_argument("--stock", default="SH001")
+    ap.add_argument("--firms", type=int, default=3)
+    ap.add_argument("--start", default="202001")
+    ap.add_argument("--end", default="202312")
+    out = run(ap.parse_args())
+    print(json.dumps(out, ensure_ascii=False))
+    sys.exit(0 if out["ok"] else 1)
@@ -0,0 +1,308 @@
+# fisis_stub.py
+"""
+Local stand-in for the FISIS open API, for offline benchmarks and regression runs.
+
+Serves
+- /openapi/statisticsInfoSearch.xml : recorded fixture if present, else a deterministic
+                                      synthetic response built from fisis_hierarchy.json
+- /openapi/statisticsListSearch.xml : paged list catalogue (list_no, list_nm)
+both EUC-KR encoded, like the real service.
+
+Knobs (StubConfig / CLI flags)
+- latency_ms, jitter_ms      : per-response delay
+- error_rate                 : fraction of requests answered with 500/503
+- throttle_rps               : above this request rate, answer 429
+- published_through          : newest base_month that "exists" (default: last completed quarter)
+- account_scale              : extra synthetic accounts per list (N x rows; they are not in the
+                               hierarchy, so the client-side account filter drops them)
+- fixtures_dir / record_from : serve <name>.xml.gz fixtures; on a miss, optionally proxy to the
+                               real endpoint and record the body
+
+Run:  python -m _bench.fisis_stub --port 8765 --latency-ms 80
+Then: FISIS_STATS_INFO_URL=http://127.0.0.1:8765/openapi/statisticsInfoSearch.xml python app.py
+"""
+
+from __future__ import annotations
+import argparse
+import datetime as _dt
+import gzip
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+import zlib
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Set
+from urllib.parse import parse_qs, urlparse
+from xml.sax.saxutils import escape
+
+import pandas as pd
+
+INFO_PATH = "/openapi/statisticsInfoSearch.xml"
+LIST_PATH = "/openapi/statisticsListSearch.xml"
+LIST_PAGE_SIZE = 20
+TERM_ENDINGS = {"Q": (3, 6, 9, 12), "H": (6, 12), "Y": (12,)}
+
+
+def last_completed_quarter(today: Optional[_dt.date] = None) -> str:
+    today = today or _dt.date.today()
+    n = today.year * 12 + (today.month - 1) // 3 * 3 - 1  # last month of the previous quarter
+    return f"{n // 12:04d}{n % 12 + 1:02d}"
+
+def fixture_name(endpoint: str, params: Dict[str, str]) -> str:
+    """Host-independent fixture id: endpoint + sorted params, auth excluded."""
+    norm = "&".join(f"{k}={str(v).strip()}" for k, v in sorted(params.items()) if k != "auth")
+    return hashlib.sha256(f"{endpoint}?{norm}".encode("utf-8")).hexdigest()[:32]
+
+
+@dataclass
+class StubConfig:
+    hier_json: str = "_local/fisis_hierarchy.json"
+    terms_map_csv: Optional[str] = "_local/fisis_list_terms_map.csv"
+    finance_map_csv: Optional[str] = "_local/finance_cd_to_nm_map.csv"
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    error_rate: float = 0.0
+    throttle_rps: float = 0.0
+    published_through: str = field(default_factory=last_completed_quarter)
+    account_scale: int = 1
+    fixtures_dir: Optional[str] = None
+    record_from: Optional[str] = None
+    seed: int = 0
+
+
+class FisisFixtures:
+    """Deterministic synthetic responses derived from the real hierarchy."""
+
+    def __init__(self, cfg: StubConfig):
+        self.cfg = cfg
+        with open(cfg.hier_json, "r", encoding="utf-8") as f:
+            self.hier: Dict[str, dict] = json.load(f)
+        self.terms: Dict[str, Set[str]] = {}
+        if cfg.terms_map_csv and os.path.exists(cfg.terms_map_csv):
+            df = pd.read_csv(cfg.terms_map_csv, dtype=str, encoding="utf-8-sig").fillna("")
+            self.terms = {r.listNo: set(r.terms.split()) for r in df.itertuples()}
+        self.firm_nm: Dict[str, str] = {}
+        if cfg.finance_map_csv and os.path.exists(cfg.finance_map_csv):
+            df = pd.read_csv(cfg.finance_map_csv, dtype=str, encoding="utf-8-sig").fillna("")
+            self.firm_nm = dict(zip(df["finance_cd"].str.zfill(7), df["finance_nm"]))
+
+    def _months(self, start: str, end: str, term: str) -> List[str]:
+        endings = TERM_ENDINGS.get(term, ())
+        end = min(end, self.cfg.published_through)
+        out = []
+        y, m = int(start[:4]), int(start[4:6])
+        while f"{y:04d}{m:02d}" <= end:
+            if m in endings:
+                out.append(f"{y:04d}{m:02d}")
+            y, m = (y + 1, 1) if m == 12 else (y, m + 1)
+        return out
+
+    def _value(self, *parts: str) -> int:
+        return zlib.crc32("|".join((str(self.cfg.seed),) + parts).encode("utf-8")) % 1_000_000
+
+    def info_xml(self, q: Dict[str, str]) -> str:
+        ln, term, cd = q.get("listNo", ""), q.get("term", "Q"), q.get("financeCd", "").zfill(7)
+        H = self.hier.get(ln)
+        if H is None:
+            return _envelope("011", "통계표 번호 오류", "")
+        cols = H.get("columns", {}) or {}
+        desc = "".join(f"<column><column_id>{escape(c)}</column_id><column_nm>{escape(n)}</column_nm></column>"
+                       for c, n in cols.items())
+        firm_nm = self.firm_nm.get(cd, f"회사{cd}")
+        supported = self.terms.get(ln)
+        months = [] if ("[폐]" in firm_nm or (supported is not None and term not in supported)) \
+            else self._months(q.get("startBaseMm", ""), q.get("endBaseMm", ""), term)
+
+        accounts = list((H.get("accounts", {}) or {}).items())
+        for k in range(1, max(1, self.cfg.account_scale)):
+            accounts += [(f"{a}_X{k}", f"{n} (x{k})") for a, n in (H.get("accounts", {}) or {}).items()]
+
+        rows = []
+        for bm in months:
+            for a, an in accounts:
+                vals = "".join(f"<{c}>{self._value(cd, ln, term, bm, a, c)}</{c}>" for c in cols)
+                rows.append(f"<row><base_month>{bm}</base_month><finance_cd>{cd}</finance_cd>"
+                            f"<finance_nm>{escape(firm_nm)}</finance_nm><account_cd>{escape(a)}</account_cd>"
+                            f"<account_nm>{escape(an)}</account_nm>{vals}</row>")
+        body = (f"<list_no>{ln}</list_no><list_nm>{escape(H.get('list_nm', ''))}</list_nm>"
+                f"<total_count>{len(rows)}</total_count><description>{desc}</description>"
+                f"<list>{''.join(rows)}</list>")
+        return _envelope("000", "정상", body)
+
+    def list_xml(self, q: Dict[str, str]) -> str:
+        page = max(1, int(q.get("pageNo", "1") or 1))
+        items = sorted(self.hier.items())[(page - 1) * LIST_PAGE_SIZE: page * LIST_PAGE_SIZE]
+        rows = "".join(f"<row><list_no>{ln}</list_no><list_nm>{escape(H.get('list_nm', ''))}</list_nm></row>"
+                       for ln, H in items)
+        return _envelope("000", "정상", f"<list>{rows}</list>")
+
+
+def _envelope(err_cd: str, err_msg: str, body: str) -> str:
+    return (f'<?xml version="1.0" encoding="euc-kr"?><result><err_cd>{err_cd}</err_cd>'
+            f"<err_msg>{err_msg}</err_msg>{body}</result>")
+
+
+class _Throttle:
+    """Non-blocking token bucket: False means 'answer 429'."""
+
+    def __init__(self, rps: float):
+        self.rps, self.tokens, self.stamp = rps, max(1.0, rps), time.monotonic()
+        self.lock = threading.Lock()
+
+    def allow(self) -> bool:
+        if self.rps <= 0:
+            return True
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(max(1.0, self.rps), self.tokens + (now - self.stamp) * self.rps)
+            self.stamp = now
+            if self.tokens >= 1.0:
+                self.tokens -= 1.0
+                return True
+            return False
+
+
+class FisisStub:
+    """In-process server: `with FisisStub(StubConfig(...)) as stub: stub.info_url ...`"""
+
+    def __init__(self, cfg: Optional[StubConfig] = None, host: str = "127.0.0.1", port: int = 0):
+        self.cfg = cfg or StubConfig()
+        self.fixtures = FisisFixtures(self.cfg)
+        self.throttle = _Throttle(self.cfg.throttle_rps)
+        self.rng = random.Random(self.cfg.seed)
+        self.stats = {"requests": 0, "errors": 0, "throttled": 0, "fixture_hits": 0, "recorded": 0, "bytes": 0}
+        self._lock = threading.Lock()
+        self.server = ThreadingHTTPServer((host, port), self._handler())
+        self.server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def info_url(self) -> str:
+        return self.base_url + INFO_PATH
+
+    @property
+    def list_url(self) -> str:
+        return self.base_url + LIST_PATH
+
+    def _count(self, **kw) -> None:
+        with self._lock:
+            for k, v in kw.items():
+                self.stats[k] += v
+
+    def _fixture_path(self, name: str) -> Optional[str]:
+        return os.path.join(self.cfg.fixtures_dir, name + ".xml.gz") if self.cfg.fixtures_dir else None
+
+    def _body(self, path: str, q: Dict[str, str]) -> bytes:
+        endpoint = os.path.basename(path)
+        fx = self._fixture_path(fixture_name(endpoint, q))
+        if fx and os.path.exists(fx):
+            self._count(fixture_hits=1)
+            with gzip.open(fx, "rb") as f:
+                return f.read()
+        if self.cfg.record_from:
+            import requests
+            r = requests.get(self.cfg.record_from.rstrip("/") + path, params=q, timeout=30)
+            r.raise_for_status()
+            if fx:
+                os.makedirs(self.cfg.fixtures_dir, exist_ok=True)
+                with gzip.open(fx, "wb") as f:
+                    f.write(r.content)
+                self._count(recorded=1)
+            return r.content
+        xml = self.fixtures.list_xml(q) if path == LIST_PATH else self.fixtures.info_xml(q)
+        return xml.encode("euc-kr", errors="replace")
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status: int, body: bytes = b"") -> None:
+                self.send_response(status)
+                self.send_header("Content-Type", "text/xml;charset=euc-kr")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                u = urlparse(self.path)
+                q = {k: v[0] for k, v in parse_qs(u.query).items()}
+                stub._count(requests=1)
+                cfg = stub.cfg
+                delay = cfg.latency_ms + (stub.rng.uniform(-cfg.jitter_ms, cfg.jitter_ms) if cfg.jitter_ms else 0.0)
+                if delay > 0:
+                    time.sleep(delay / 1000.0)
+                if u.path not in (INFO_PATH, LIST_PATH):
+                    return self._send(404)
+                if not stub.throttle.allow():
+                    stub._count(throttled=1)
+                    return self._send(429)
+                if cfg.error_rate and stub.rng.random() < cfg.error_rate:
+                    stub._count(errors=1)
+                    return self._send(stub.rng.choice((500, 503)))
+                body = stub._body(u.path, q)
+                stub._count(bytes=len(body))
+                self._send(200, body)
+
+        return Handler
+
+    def start(self) -> "FisisStub":
+        self._thread = threading.Thread(target=self.server.serve_forever, name="fisis-stub", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self) -> "FisisStub":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+def add_stub_args(ap: argparse.ArgumentParser) -> None:
+    ap.add_argument("--latency-ms", type=float, default=0.0)
+    ap.add_argument("--jitter-ms", type=float, default=0.0)
+    ap.add_argument("--error-rate", type=float, default=0.0)
+    ap.add_argument("--throttle-rps", type=float, default=0.0)
+    ap.add_argument("--published-through", default=last_completed_quarter())
+    ap.add_argument("--account-scale", type=int, default=1)
+    ap.add_argument("--fixtures-dir", default=None)
+    ap.add_argument("--record-from", default=None, help="e.g. https://fisis.fss.or.kr (needs a real auth key)")
+    ap.add_argument("--seed", type=int, default=0)
+
+def stub_config_from_args(a: argparse.Namespace) -> StubConfig:
+    return StubConfig(latency_ms=a.latency_ms, jitter_ms=a.jitter_ms, error_rate=a.error_rate,
+                      throttle_rps=a.throttle_rps, published_through=a.published_through,
+                      account_scale=a.account_scale, fixtures_dir=a.fixtures_dir,
+                      record_from=a.record_from, seed=a.seed)
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Local FISIS stand-in")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8765)
+    add_stub_args(ap)
+    args = ap.parse_args()
+
+    stub = FisisStub(stub_config_from_args(args), host=args.host, port=args.port)
+    print(f"FISIS stub on {stub.base_url}  (info: {stub.info_url})")
+    try:
+        stub.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
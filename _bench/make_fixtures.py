@@ -0,0 +1,69 @@
+# make_fixtures.py
+"""
+Writes a reproducible fixture set for the FISIS stub (one <name>.xml.gz per request),
+scaled up from the real hierarchy in _local/fisis_hierarchy.json.
+
+- firms : the real finance map, padded with synthetic 99xxxxx codes up to --firms
+- lists : every list in the hierarchy (or --lists SH001 SH150 ...)
+- grid  : every (firm, list, term) for [--start, --end]; terms from fisis_list_terms_map.csv
+- rows  : --account-scale N multiplies the accounts per list
+
+The stub serves these instead of synthesizing on the fly (`--fixtures-dir`), and
+the same directory can hold responses recorded from the live API (`--record-from`).
+
+Run:  python -m _bench.make_fixtures --out _bench/fixtures --firms 60 --start 201501 --end 202312
+"""
+
+from __future__ import annotations
+import argparse
+import gzip
+import json
+import os
+import time
+
+from _bench.fisis_stub import FisisFixtures, StubConfig, fixture_name, last_completed_quarter
+
+
+def synthetic_firms(fx: FisisFixtures, n: int) -> list:
+    firms = sorted(fx.firm_nm)[:n] if n else sorted(fx.firm_nm)
+    k = 0
+    while len(firms) < n:
+        firms.append(f"99{k:05d}")
+        k += 1
+    return firms
+
+def write_fixtures(out_dir: str, fx: FisisFixtures, firms: list, lists: list, start: str, end: str) -> dict:
+    os.makedirs(out_dir, exist_ok=True)
+    n_files, n_bytes, t0 = 0, 0, time.perf_counter()
+    for ln in lists:
+        for term in sorted(fx.terms.get(ln, {"Q"})):
+            for cd in firms:
+                q = {"lang": "kr", "financeCd": cd, "listNo": ln, "term": term, "startBaseMm": start, "endBaseMm": end}
+                body = fx.info_xml(q).encode("euc-kr", errors="replace")
+                with gzip.open(os.path.join(out_dir, fixture_name("statisticsInfoSearch.xml", q) + ".xml.gz"), "wb") as f:
+                    f.write(body)
+                n_files += 1
+                n_bytes += len(body)
+    manifest = {"firms": firms, "lists": lists, "startBaseMm": start, "endBaseMm": end,
+                "account_scale": fx.cfg.account_scale, "seed": fx.cfg.seed,
+                "files": n_files, "raw_bytes": n_bytes, "elapsed_s": round(time.perf_counter() - t0, 2)}
+    with open(os.path.join(out_dir, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1)
+    return manifest
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Generate FISIS stub fixtures")
+    ap.add_argument("--out", default="_bench/fixtures")
+    ap.add_argument("--firms", type=int, default=0, help="0 = the real finance map only")
+    ap.add_argument("--lists", nargs="*", default=None)
+    ap.add_argument("--start", default="202001")
+    ap.add_argument("--end", default="202312")
+    ap.add_argument("--account-scale", type=int, default=1)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--published-through", default=last_completed_quarter())
+    a = ap.parse_args()
+
+    fx = FisisFixtures(StubConfig(account_scale=a.account_scale, seed=a.seed, published_through=a.published_through))
+    m = write_fixtures(a.out, fx, synthetic_firms(fx, a.firms), a.lists or sorted(fx.hier), a.start, a.end)
+    print(f"[fixtures] {m['files']} responses, {m['raw_bytes']:,} bytes raw -> {a.out} ({m['elapsed_s']}s)")
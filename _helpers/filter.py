@@ -1,6 +1,8 @@
 import pandas as pd
 from typing import Tuple
 
+from _helpers.period_index import PeriodIndex
+
 
 def _canon_fin_cd_series(s: pd.Series) -> pd.Series:
     # keep digits only, strip spaces, zero-pad to 7
@@ -26,36 +28,27 @@ def _filter_master_data_for_section(
     """
     Applies section-specific parameter overrides and filters the master dataframe.
     Returns the filtered dataframe, the final column id, and the final term.
+    An IndexedMaster (or MasterCube) comes back narrowed to the kept months;
+    date window and term are one mask over its PeriodIndex.
     """
     section_params = section_params or {}
     final_colid = section_params.get("colid") or fallback_colid
     final_term = section_params.get("term") or fallback_term
 
+    indexed = not isinstance(df_master, pd.DataFrame)
     if df_master.empty:
-        return pd.DataFrame(), final_colid, final_term
-
-    all_months = sorted(df_master["base_month"].astype(str).unique())
-    global_start = all_months[0] if all_months else "190001"
-    global_end = all_months[-1] if all_months else "299912"
+        return (df_master if indexed else pd.DataFrame()), final_colid, final_term
 
-    # --- START OF FIX ---
-    # Explicitly handle the "start" and "end" keywords
+    # "start" / "end" (or nothing) leave that side of the window open
     min_d = section_params.get("min_d")
     max_d = section_params.get("max_d")
+    final_start = None if min_d == "start" or not min_d else str(min_d)
+    final_end = None if max_d == "end" or not max_d else str(max_d)
+
+    if indexed:
+        return df_master.window(final_start, final_end, final_term), final_colid, final_term
 
-    final_start = global_start if min_d == "start" or not min_d else min_d
-    final_end = global_end if max_d == "end" or not max_d else max_d
-    # --- END OF FIX ---
-
-    # Apply date range filter
-    df_filtered = df_master[
-        (df_master['base_month'] >= final_start) & (df_master['base_month'] <= final_end)
-    ].copy()
-
-    # Apply term filter
-    if final_term == "Y":
-        df_filtered = df_filtered[df_filtered["base_month"].str.endswith("12")].copy()
-    elif final_term == "H":
-        df_filtered = df_filtered[df_filtered["base_month"].str.endswith(("06", "12"))].copy()
-    
-    return df_filtered, final_colid, final_term
\ No newline at end of file
+    # a plain frame: the same mask over its own months, applied once
+    period, codes = PeriodIndex.of(df_master["base_month"])
+    df_filtered = df_master[period.mask(final_start, final_end, final_term)[codes]]
+    return df_filtered, final_colid, final_term
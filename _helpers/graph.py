@@ -1,5 +1,41 @@
 # helpers_hover.py
-def _extract_hover(hoverData):
+
+class HoverRefs:
+    """
+    The int -> (node_key, firm_cd) table of one figure. Bar points carry the int
+    in customdata instead of repeating {"node_key": ..., "firm_cd": ...} on every
+    point. The table goes to the client with the figure (to_json(), kept in the
+    section's store next to it) and the hover / click callbacks resolve against
+    that copy, so a restart or another worker process resolves the same keys.
+    """
+
+    def __init__(self, table=None):
+        self.table = [tuple(k) for k in (table or [])]
+        self._ids = {k: i for i, k in enumerate(self.table)}
+
+    def ref(self, node_key, firm_cd=None):
+        key = (node_key, firm_cd)
+        ref = self._ids.get(key)
+        if ref is None:
+            ref = self._ids[key] = len(self.table)
+            self.table.append(key)
+        return ref
+
+    def to_json(self):
+        return [list(k) for k in self.table]
+
+def _customdata_keys(cd, refs=None):
+    """(node_key, firm_cd) from a point's customdata: an int into `refs` (a HoverRefs.to_json() table) or the older dict."""
+    if isinstance(cd, (int, float)) and not isinstance(cd, bool):
+        if refs and 0 <= int(cd) < len(refs):
+            node_key, firm_cd = refs[int(cd)]
+            return node_key, firm_cd
+        return None, None
+    if isinstance(cd, dict):
+        return cd.get("node_key"), cd.get("firm_cd")
+    return None, None
+
+def _extract_hover(hoverData, refs=None):
     if not hoverData or "points" not in hoverData or not hoverData["points"]:
         return None, None, None
     pt = hoverData["points"][0]
@@ -7,9 +43,8 @@ def _extract_hover(hoverData):
     node_key = None
     firm_cd = None # <-- NEW: Variable for the firm code
     cd = pt.get("customdata")
-    if isinstance(cd, dict):
-        node_key = cd.get("node_key")
-        firm_cd = cd.get("firm_cd") # <-- NEW: Extract firm_cd
+    if isinstance(cd, (dict, int, float)):
+        node_key, firm_cd = _customdata_keys(cd, refs)
     # This block handles older list-based customdata for backward compatibility
     elif isinstance(cd, (list, tuple)):
         for item in cd:
@@ -20,11 +55,11 @@ def _extract_hover(hoverData):
                 node_key = item
     return node_key, base_month, firm_cd
 
-def _hover_key(hoverData):
+def _hover_key(hoverData, refs=None):
     if not hoverData:
         return None
     # _extract_hover returns (node_key, base_month, firm_cd). We only want the first item.
-    return _extract_hover(hoverData)[0]
+    return _extract_hover(hoverData, refs)[0]
 
 def _hover_month(hoverData):
     if not hoverData or "points" not in hoverData or not hoverData["points"]:
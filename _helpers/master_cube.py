@@ -0,0 +1,170 @@
+# master_cube.py
+"""
+MasterCube: the master as one dense float array
+
+    values[finance_cd, (list_no, account_cd), column_id, period]
+
+with a dictionary index per axis and a presence mask (True where the long
+frame had a row; a missing value counts as 0.0, as ensure_numeric makes it).
+
+- build(df) once per dataset (DatasetRegistry.put, when DATASETS["cube"] is on);
+  callbacks get it through datasets.get_aggregable
+- select(finance_cd=..., list_no=..., account_cd=...) and window(start, end,
+  term) / within(months) narrow the firm / row / period axes as index arrays
+  (periods through the PeriodIndex term masks); nothing is copied until a
+  block is read
+- block(rows, column_id) -> (values[n, P], present[n, P]) summed over the
+  selected firms: an axis slice and a sum instead of filter, groupby, reindex;
+  cells(column_id) the same block as long [list_no, account_cd, base_month, value]
+- the aggregation helpers (values_for_accounts, months_sorted, node_parent_values,
+  parent_series_for_list, market_share) take a cube where they take an
+  IndexedMaster; figures that need the rows themselves (line overlays) do not
+
+Names are not in the cube: .dims (MasterDims) holds them.
+
+Dense is both the point and the cost: every (row, column) pair gets a cell
+for every firm and period, present or not. See _bench/bench_cube.py.
+"""
+
+from __future__ import annotations
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from _helpers.master_dims import MasterDims
+from _helpers.master_index import _values
+from _helpers.period_index import PeriodIndex
+
+
+class MasterCube:
+    def __init__(self, values: np.ndarray, present: np.ndarray, firms: List[str], rows: List[Tuple[str, str]],
+                 columns: List[str], periods: List[str], dims: MasterDims, _sel: Optional[Dict[str, np.ndarray]] = None):
+        self.values = values
+        self.present = present
+        self.firms, self.rows, self.columns, self.periods = firms, rows, columns, periods
+        self.dims = dims
+        self.period = PeriodIndex(periods)
+        self._firm_at = {cd: i for i, cd in enumerate(firms)}
+        self._column_at = {c: i for i, c in enumerate(columns)}
+        self._row_list = np.array([ln for ln, _ in rows], dtype=object)
+        self._row_account = np.array([acd for _, acd in rows], dtype=object)
+        self._firm_period = present.any(axis=(1, 2))  # [firm, period]: what months() reads for firm scopes
+        self._sel = dict(_sel or {})  # axis -> selected indices (absent = whole axis)
+
+    @classmethod
+    def build(cls, df: pd.DataFrame, dims: Optional[MasterDims] = None) -> "MasterCube":
+        firms = sorted(df["finance_cd"].astype(str).unique())
+        keys = df[["list_no", "account_cd"]].astype(str)
+        rows = sorted(set(zip(keys["list_no"], keys["account_cd"])))
+        columns = sorted(df["column_id"].astype(str).unique())
+        periods = sorted(df["base_month"].astype(str).unique())
+        shape = (len(firms), len(rows), len(columns), len(periods))
+
+        fi = pd.Index(firms).get_indexer(df["finance_cd"].astype(str))
+        ri = pd.MultiIndex.from_tuples(rows, names=["list_no", "account_cd"]).get_indexer(pd.MultiIndex.from_frame(keys)) if rows else fi
+        ci = pd.Index(columns).get_indexer(df["column_id"].astype(str))
+        pi = pd.Index(periods).get_indexer(df["base_month"].astype(str))
+        flat = np.ravel_multi_index((fi, ri, ci, pi), shape) if len(df) else np.array([], dtype=np.int64)
+        size = int(np.prod(shape))
+        value = np.nan_to_num(pd.to_numeric(df["value"], errors="coerce").to_numpy(dtype="float64"), nan=0.0)
+        values = np.bincount(flat, weights=value, minlength=size).reshape(shape)
+        present = np.zeros(size, dtype=bool)
+        present[flat] = True
+        return cls(values, present.reshape(shape), firms, rows, columns, periods,
+                   dims if dims is not None else MasterDims.from_frame(df))
+
+    # ---------- narrowing ----------
+    def _view(self, **sel) -> "MasterCube":
+        view = MasterCube.__new__(MasterCube)
+        view.__dict__.update(self.__dict__)
+        view._sel = {**self._sel, **sel}
+        return view
+
+    def _axis(self, axis: str, n: int) -> np.ndarray:
+        return self._sel.get(axis, np.arange(n))
+
+    def select(self, **eq) -> "MasterCube":
+        sel = {}
+        if "finance_cd" in eq:
+            want = [self._firm_at[cd] for cd in _values(eq.pop("finance_cd")) if cd in self._firm_at]
+            cur = self._axis("finance_cd", len(self.firms))
+            sel["finance_cd"] = cur[np.isin(cur, want)]
+        if "column_id" in eq:
+            want = [self._column_at[c] for c in _values(eq.pop("column_id")) if c in self._column_at]
+            cur = self._axis("column_id", len(self.columns))
+            sel["column_id"] = cur[np.isin(cur, want)]
+        row = self._axis("row", len(self.rows))
+        if "list_no" in eq:
+            row = row[np.isin(self._row_list[row], list(_values(eq.pop("list_no"))))]
+        if "account_cd" in eq:
+            row = row[np.isin(self._row_account[row], list(_values(eq.pop("account_cd"))))]
+        if eq:
+            raise KeyError(f"not a cube axis: {', '.join(eq)}")
+        if "row" in self._sel or len(row) != len(self.rows):
+            sel["row"] = row
+        return self._view(**sel)
+
+    def _periods_in(self, keep: np.ndarray) -> "MasterCube":
+        cur = self._axis("period", len(self.periods))
+        return self._view(period=cur[keep[cur]])
+
+    def within(self, months: Iterable[str]) -> "MasterCube":
+        return self._periods_in(self.period.isin(months))
+
+    def window(self, start: Optional[str] = None, end: Optional[str] = None, term: Optional[str] = None) -> "MasterCube":
+        return self._periods_in(self.period.mask(start, end, term))
+
+    # ---------- reading ----------
+    def block(self, rows: np.ndarray, column_id: str) -> Tuple[np.ndarray, np.ndarray]:
+        """(values, present) of `rows` x selected periods for one column, summed / any-ed over the selected firms."""
+        c = self._column_at.get(column_id)
+        periods = self._axis("period", len(self.periods))
+        if c is None or ("column_id" in self._sel and c not in self._sel["column_id"]):
+            shape = (len(rows), len(periods))
+            return np.zeros(shape), np.zeros(shape, dtype=bool)
+        at = np.ix_(self._axis("finance_cd", len(self.firms)), np.asarray(rows, dtype=np.int64), [c], periods)
+        return self.values[at][:, :, 0, :].sum(axis=0), self.present[at][:, :, 0, :].any(axis=0)
+
+    def rows_for(self, account_cds: Iterable[str]) -> np.ndarray:
+        row = self._axis("row", len(self.rows))
+        return row[np.isin(self._row_account[row], list(_values(account_cds)))]
+
+    def _period_hits(self) -> np.ndarray:
+        """For each selected period: does the selection have any row in it."""
+        firms, periods = self._axis("finance_cd", len(self.firms)), self._axis("period", len(self.periods))
+        if "row" not in self._sel and "column_id" not in self._sel:
+            return self._firm_period[np.ix_(firms, periods)].any(axis=0)
+        at = np.ix_(firms, self._axis("row", len(self.rows)), self._axis("column_id", len(self.columns)), periods)
+        return self.present[at].any(axis=(0, 1, 2))
+
+    def months(self) -> List[str]:
+        periods = self._axis("period", len(self.periods))
+        return [self.periods[p] for p, h in zip(periods, self._period_hits()) if h]
+
+    def account_values(self, account_cds: Iterable[str], column_id: str) -> pd.DataFrame:
+        """values_for_accounts() on the cube: [base_month, account_cd, value] for every present cell."""
+        rows = self.rows_for(account_cds)
+        vals, pres = self.block(rows, column_id)
+        r, p = np.nonzero(pres)
+        periods = self._axis("period", len(self.periods))
+        out = pd.DataFrame({"base_month": [self.periods[i] for i in periods[p]],
+                            "account_cd": self._row_account[rows][r], "value": vals[r, p]})
+        return out.groupby(["base_month", "account_cd"], as_index=False)["value"].sum()
+
+    def cells(self, column_id: str) -> pd.DataFrame:
+        """[list_no, account_cd, base_month, value] for every present cell of the selected rows in one column."""
+        rows = self._axis("row", len(self.rows))
+        vals, pres = self.block(rows, column_id)
+        r, p = np.nonzero(pres)
+        periods = self._axis("period", len(self.periods))
+        return pd.DataFrame({"list_no": self._row_list[rows][r], "account_cd": self._row_account[rows][r],
+                             "base_month": [self.periods[i] for i in periods[p]], "value": vals[r, p]})
+
+    @property
+    def empty(self) -> bool:
+        return not self._period_hits().any()
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.values.nbytes + self.present.nbytes)
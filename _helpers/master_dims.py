@@ -0,0 +1,59 @@
+# master_dims.py
+"""
+MasterDims: the name columns of a master, one row per code instead of one
+per fact row.
+
+- lists    {list_no: list_nm}
+- accounts {(list_no, account_cd): account_nm}
+- columns  {(list_no, column_id): [column_nm, ...]} in row order (a column id
+  can carry more than one name across a list's accounts)
+
+split(df) -> (fact, dims): the fact keeps the codes, term and value, the
+names move here. Figures read labels from the dims (column_label for the bar
+y-axis); IndexedMaster and MasterCube carry them as .dims.
+"""
+
+from __future__ import annotations
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import pandas as pd
+
+NAME_COLUMNS = ("list_nm", "account_nm", "column_nm")
+
+
+class MasterDims:
+    def __init__(self, lists: Optional[Dict[str, str]] = None, accounts: Optional[Dict[Tuple[str, str], str]] = None,
+                 columns: Optional[Dict[Tuple[str, str], List[str]]] = None):
+        self.lists = dict(lists or {})
+        self.accounts = dict(accounts or {})
+        self.columns = dict(columns or {})
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "MasterDims":
+        def pairs(cols):
+            if not all(c in df.columns for c in cols):
+                return []
+            return df[list(cols)].drop_duplicates().astype(str).itertuples(index=False, name=None)
+
+        lists = {ln: nm for ln, nm in pairs(("list_no", "list_nm"))}
+        accounts = {(ln, acd): nm for ln, acd, nm in pairs(("list_no", "account_cd", "account_nm"))}
+        columns: Dict[Tuple[str, str], List[str]] = {}
+        for ln, col, nm in pairs(("list_no", "column_id", "column_nm")):
+            names = columns.setdefault((ln, col), [])
+            if nm not in names:
+                names.append(nm)
+        return cls(lists, accounts, columns)
+
+    @classmethod
+    def split(cls, df: pd.DataFrame) -> Tuple[pd.DataFrame, "MasterDims"]:
+        """(fact, dims): `df` without its name columns, and the names."""
+        dims = cls.from_frame(df)
+        return df.drop(columns=[c for c in NAME_COLUMNS if c in df.columns]), dims
+
+    def column_label(self, list_nos: Iterable[str], column_id: str) -> List[str]:
+        """Distinct column_nm of `column_id` across `list_nos` (in list order)."""
+        names = [nm for ln in sorted(set(list_nos)) for nm in self.columns.get((ln, column_id), [])]
+        return list(dict.fromkeys(names))
+
+    def __len__(self) -> int:
+        return len(self.lists) + len(self.accounts) + len(self.columns)
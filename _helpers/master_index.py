@@ -0,0 +1,211 @@
+# master_index.py
+"""
+IndexedMaster: the master frame sorted by (finance_cd, list_no, column_id,
+account_cd, base_month), with offset tables so a slice by firm, list, column
+or account is a contiguous row range -- frame.iloc[start:stop], a view --
+instead of a boolean mask over every row.
+
+- offsets: {finance_cd: (start, stop)}, {(finance_cd, list_no): ...},
+  {(finance_cd, list_no, column_id): ...}; accounts are found by binary
+  search inside their (firm, list, column) block
+- select(finance_cd=..., list_no=..., column_id=..., account_cd=...) narrows
+  to a scoped IndexedMaster (a value or a collection of values per key);
+  window(start, end, term) / within(months) keep only those base_months, as
+  a mask over the PeriodIndex applied to each row's period code. All share
+  the tables.
+- .frame is the scoped rows as a DataFrame, .empty / len() as for a frame;
+  .dims the names (MasterDims), which a normalized frame no longer carries
+- narrow(df, **eq) does the same on a plain DataFrame (masks; rows_view
+  slices when the matches are contiguous), so helpers take either (or a MasterCube, which has the same select / within / months)
+
+Built once per dataset (datasets.get_indexed); the registry's frames are
+already in this order, so building one does not copy the rows.
+"""
+
+from __future__ import annotations
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from _helpers.master_dims import MasterDims
+from _helpers.period_index import PeriodIndex
+
+INDEX_KEYS = ("finance_cd", "list_no", "column_id", "account_cd")
+SORT_KEYS = INDEX_KEYS + ("base_month",)
+
+
+def _values(v) -> Tuple[str, ...]:
+    if isinstance(v, (str, bytes)) or not isinstance(v, Iterable):
+        return (v,)
+    return tuple(dict.fromkeys(v))
+
+
+def rows_view(df: pd.DataFrame, rows: np.ndarray) -> pd.DataFrame:
+    """
+    df.iloc[rows] for ascending row numbers: a slice (a view, no copy) when they
+    form one contiguous run, a single take otherwise.
+    """
+    if not len(rows):
+        return df.iloc[0:0]
+    if rows[-1] - rows[0] + 1 == len(rows):
+        return df.iloc[int(rows[0]):int(rows[-1]) + 1]
+    return df.take(rows)
+
+def sort_for_index(df: pd.DataFrame) -> pd.DataFrame:
+    """`df` in index order (stable), or `df` itself if it already is."""
+    if df.empty or not all(c in df.columns for c in SORT_KEYS):
+        return df
+    codes = [pd.factorize(df[c], sort=True)[0] for c in SORT_KEYS]
+    order = np.lexsort(codes[::-1])
+    if np.array_equal(order, np.arange(len(df))):
+        return df
+    return df.take(order).reset_index(drop=True)
+
+
+class _Tables:
+    """The offset tables of one sorted frame (shared by every scoped IndexedMaster)."""
+
+    def __init__(self, df: pd.DataFrame, dims: Optional[MasterDims] = None):
+        n = len(df)
+        self.df = df
+        self.dims = dims if dims is not None else MasterDims.from_frame(df)
+        self.spans: List[Dict[tuple, Tuple[int, int]]] = []
+        change = np.zeros(max(n - 1, 0), dtype=bool)
+        for k, c in enumerate(INDEX_KEYS[:3]):
+            col = df[c].to_numpy()
+            change |= col[1:] != col[:-1]
+            starts = np.concatenate(([0], np.flatnonzero(change) + 1)) if n else np.array([], dtype=np.int64)
+            stops = np.append(starts[1:], n)
+            keys = zip(*(df[INDEX_KEYS[j]].to_numpy()[starts].tolist() for j in range(k + 1)))
+            self.spans.append(dict(zip(keys, zip(starts.tolist(), stops.tolist()))))
+        self.account = df["account_cd"].to_numpy() if n else np.array([], dtype=object)
+        self.period, self.row_period = PeriodIndex.of(df["base_month"]) if n else (PeriodIndex([]), np.array([], dtype=np.int32))
+
+    def ranges(self, eq: Dict[str, tuple]) -> List[Tuple[int, int]]:
+        """Row ranges matching `eq` ({key: allowed values}), in row order, adjacent ones merged."""
+        depth = max((INDEX_KEYS.index(k) for k in eq if k != "account_cd"), default=-1)
+        if "account_cd" in eq:
+            depth = 2
+        if depth < 0:
+            return [(0, len(self.df))] if len(self.df) else []
+        fixed = [eq.get(k) for k in INDEX_KEYS[:depth + 1]]
+        if all(v is not None for v in fixed):  # every level given: direct lookups
+            keys = [()]
+            for vals in fixed:
+                keys = [p + (v,) for p in keys for v in vals]
+            spans = [self.spans[depth][key] for key in keys if key in self.spans[depth]]
+        else:
+            allowed = [set(v) if v is not None else None for v in fixed]
+            spans = [span for key, span in self.spans[depth].items()
+                     if all(a is None or key[j] in a for j, a in enumerate(allowed))]
+        if "account_cd" in eq:
+            accts = sorted(eq["account_cd"])
+            leaf = []
+            for a, b in spans:
+                block = self.account[a:b]
+                lo = np.searchsorted(block, accts, side="left")
+                hi = np.searchsorted(block, accts, side="right")
+                leaf += [(a + int(l), a + int(h)) for l, h in zip(lo, hi) if h > l]
+            spans = leaf
+        merged: List[Tuple[int, int]] = []
+        for a, b in sorted(spans):
+            if merged and merged[-1][1] == a:
+                merged[-1] = (merged[-1][0], b)
+            else:
+                merged.append((a, b))
+        return merged
+
+
+class IndexedMaster:
+    def __init__(self, tables: _Tables, eq: Optional[Dict[str, tuple]] = None, keep: Optional[np.ndarray] = None):
+        self._t = tables
+        self._eq = dict(eq or {})
+        self._keep = keep  # bool[P] over tables.period, None = every month
+        self._frame: Optional[pd.DataFrame] = None
+
+    @classmethod
+    def build(cls, df: pd.DataFrame, dims: Optional[MasterDims] = None) -> "IndexedMaster":
+        return cls(_Tables(sort_for_index(df), dims))
+
+    @property
+    def dims(self) -> MasterDims:
+        return self._t.dims
+
+    def select(self, **eq) -> "IndexedMaster":
+        merged = dict(self._eq)
+        for k, v in eq.items():
+            if k not in INDEX_KEYS:
+                raise KeyError(f"not an index key: {k}")
+            vals = _values(v)
+            merged[k] = tuple(x for x in merged[k] if x in set(vals)) if k in merged else vals
+        return IndexedMaster(self._t, merged, self._keep)
+
+    def _narrowed(self, keep: np.ndarray) -> "IndexedMaster":
+        return IndexedMaster(self._t, self._eq, keep if self._keep is None else keep & self._keep)
+
+    def within(self, months: Iterable[str]) -> "IndexedMaster":
+        return self._narrowed(self._t.period.isin(months))
+
+    def window(self, start: Optional[str] = None, end: Optional[str] = None, term: Optional[str] = None) -> "IndexedMaster":
+        """Months in [start, end] (None = open) that belong to `term`."""
+        return self._narrowed(self._t.period.mask(start, end, term))
+
+    def _rows(self) -> Tuple[List[Tuple[int, int]], Optional[np.ndarray]]:
+        """Row ranges of the scope; with a month filter, the kept row numbers instead (None if all are kept)."""
+        spans = self._t.ranges(self._eq)
+        if self._keep is None or self._keep.all() or not spans:
+            return spans, None
+        rows = np.concatenate([np.arange(a, b) for a, b in spans])
+        kept = rows[self._keep[self._t.row_period[rows]]]
+        return spans, (None if len(kept) == len(rows) else kept)
+
+    @property
+    def frame(self) -> pd.DataFrame:
+        if self._frame is None:
+            base = self._t.df
+            spans, kept = self._rows()
+            if kept is not None:
+                df = rows_view(base, kept)  # one gather for the ranges and the months
+            elif len(spans) == 1:
+                df = base.iloc[spans[0][0]:spans[0][1]]  # a view
+            elif not spans:
+                df = base.iloc[0:0]
+            else:  # ranges are merged, so several of them are never contiguous
+                df = base.take(np.concatenate([np.arange(a, b) for a, b in spans]))
+            self._frame = df
+        return self._frame
+
+    def months(self) -> List[str]:
+        """Sorted distinct base_months of the scoped rows (months_sorted of .frame)."""
+        period = self._t.period
+        if not self._eq:
+            return period.pick(self._keep)
+        spans = self._t.ranges(self._eq)
+        hit = np.zeros(len(period), dtype=bool)
+        for a, b in spans:
+            hit[self._t.row_period[a:b]] = True
+        return period.pick(hit if self._keep is None else hit & self._keep)
+
+    @property
+    def empty(self) -> bool:
+        return self.frame.empty
+
+    def __len__(self) -> int:
+        return len(self.frame)
+
+
+def narrow(df, **eq):
+    """df restricted to rows whose columns equal (or are in) the given values; a DataFrame is masked
+    (a slice when the rows are contiguous), an IndexedMaster (or MasterCube) narrowed with select()."""
+    if not isinstance(df, pd.DataFrame):
+        return df.select(**eq)
+    mask = None
+    for k, v in eq.items():
+        vals = _values(v)
+        m = df[k] == vals[0] if len(vals) == 1 else df[k].isin(list(vals))
+        mask = m if mask is None else mask & m
+    return df if mask is None else rows_view(df, np.flatnonzero(mask.to_numpy()))
+
+def as_frame(df) -> pd.DataFrame:
+    return df.frame if isinstance(df, IndexedMaster) else df
@@ -0,0 +1,61 @@
+# period_index.py
+"""
+PeriodIndex: the distinct base_months of one master as an integer axis.
+
+- months[p] is the p-th month in sorted order; a row's period is its
+  position p (codes from of()), so month comparisons are integer ones
+- term masks over the axis, built once: Q keeps every month, H and Y the
+  06/12 and 12 ones (TERM_ENDINGS), as _filter_master_data_for_section does
+- mask(start, end, term) -> bool[P]: a searchsorted range [start, end] (None
+  for open ends) and-ed with the term mask; readers index it with row codes
+
+Built once per dataset by IndexedMaster / MasterCube; a plain DataFrame gets
+one on the fly (PeriodIndex.of(df["base_month"])).
+"""
+
+from __future__ import annotations
+from typing import Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from _utils.coverage_manifest import TERM_ENDINGS
+
+
+class PeriodIndex:
+    def __init__(self, months: Iterable[str]):
+        self.months: List[str] = sorted({str(m) for m in months})
+        self._sorted = np.array(self.months, dtype=object)
+        mm = np.array([m[4:6] for m in self.months], dtype=object)
+        self.terms = {"Q": np.ones(len(self.months), dtype=bool)}
+        for t in ("H", "Y"):
+            self.terms[t] = np.isin(mm, TERM_ENDINGS[t])
+
+    @classmethod
+    def of(cls, base_month: pd.Series) -> Tuple["PeriodIndex", np.ndarray]:
+        """(index, per-row period codes) of a base_month column."""
+        codes, uniques = pd.factorize(base_month.astype(str), sort=True)
+        return cls(uniques), codes.astype(np.int32)
+
+    def __len__(self) -> int:
+        return len(self.months)
+
+    def span(self, start: Optional[str] = None, end: Optional[str] = None) -> Tuple[int, int]:
+        """[lo, hi) of the months between start and end (inclusive, string order)."""
+        lo = int(np.searchsorted(self._sorted, str(start), side="left")) if start else 0
+        hi = int(np.searchsorted(self._sorted, str(end), side="right")) if end else len(self.months)
+        return lo, max(lo, hi)
+
+    def mask(self, start: Optional[str] = None, end: Optional[str] = None, term: Optional[str] = None) -> np.ndarray:
+        lo, hi = self.span(start, end)
+        keep = self.terms.get(term, self.terms["Q"]).copy()
+        keep[:lo] = False
+        keep[hi:] = False
+        return keep
+
+    def isin(self, months: Iterable[str]) -> np.ndarray:
+        return np.isin(self._sorted, [str(m) for m in months])
+
+    def pick(self, keep: Optional[np.ndarray]) -> List[str]:
+        """The months a bool[P] mask keeps (all of them for None)."""
+        return list(self.months) if keep is None else [m for m, k in zip(self.months, keep) if k]
@@ -0,0 +1,50 @@
+# wire.py
+"""
+Compact payloads for data that has to live client-side (dcc.Store).
+
+pack_frame(df) -> {"n": rows, "cols": {name: spec}} with one spec per column:
+  {"f": [numbers]}                  numeric (NaN -> null), rounded to `digits`
+  {"d": [distinct], "i": [codes]}   dictionary-encoded text (code -1 = missing)
+An empty frame packs to None, which reads as "no data" like the empty
+records list did. unpack_frame(payload) rebuilds the frame. Records repeat every key and every
+firm code / month string on each row; this sends each distinct value once.
+"""
+
+from __future__ import annotations
+from typing import Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+WIRE_VERSION = 1
+
+
+def pack_frame(df: Optional[pd.DataFrame], columns: Optional[Iterable[str]] = None, digits: int = 6) -> Optional[dict]:
+    if df is None or df.empty:
+        return None
+    if columns is not None:
+        df = df[[c for c in columns if c in df.columns]]
+    cols = {}
+    for name, s in df.items():
+        if pd.api.types.is_numeric_dtype(s) and not pd.api.types.is_bool_dtype(s):
+            v = s.to_numpy(dtype="float64", na_value=np.nan).round(digits)
+            cols[name] = {"f": [None if x != x else x for x in v.tolist()]}
+        else:
+            codes, uniques = pd.factorize(s, use_na_sentinel=True)
+            cols[name] = {"d": [str(u) for u in uniques], "i": codes.tolist()}
+    return {"v": WIRE_VERSION, "n": int(len(df)), "cols": cols}
+
+def unpack_frame(payload) -> pd.DataFrame:
+    """Inverse of pack_frame; plain records (the old format) are accepted too."""
+    if not payload:
+        return pd.DataFrame()
+    if isinstance(payload, list):
+        return pd.DataFrame(payload)
+    data = {}
+    for name, spec in payload["cols"].items():
+        if "f" in spec:
+            data[name] = np.array(spec["f"], dtype="float64")  # null -> NaN
+        else:
+            uniques = np.array(spec["d"] + [None], dtype=object)  # code -1 picks the trailing None
+            data[name] = uniques[np.asarray(spec["i"], dtype=np.int64)]
+    return pd.DataFrame(data, index=pd.RangeIndex(payload["n"]))
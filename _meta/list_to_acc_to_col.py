@@ -1,11 +1,11 @@
 # fisis_list_to_account_to_column_map.py
 import time
 import re
-import requests
 import xml.etree.ElementTree as ET
 import pandas as pd
 import sys, os
 from settings import DEFAULTS
+from _utils.http_session import get_session
 
 # -------- Settings --------
 API_KEY = DEFAULTS["api_key"]
@@ -17,8 +17,8 @@ START_BASE_MM = "202201"
 END_BASE_MM   = "202401"
 
 # Endpoints
-STATS_LIST_URL = "https://fisis.fss.or.kr/openapi/statisticsListSearch.xml"
-STATS_INFO_URL = "https://fisis.fss.or.kr/openapi/statisticsInfoSearch.xml"
+STATS_LIST_URL = os.environ.get("FISIS_STATS_LIST_URL", "https://fisis.fss.or.kr/openapi/statisticsListSearch.xml")
+STATS_INFO_URL = os.environ.get("FISIS_STATS_INFO_URL", "https://fisis.fss.or.kr/openapi/statisticsInfoSearch.xml")
 
 
 if hasattr(sys.stdout, "reconfigure"):
@@ -52,8 +52,7 @@ def _to_utf8_xml_bytes(xml_bytes: bytes) -> bytes:
     return text.encode("utf-8")
 
 def _get_xml_root(url: str, params: dict, timeout=25) -> ET.Element:
-    r = requests.get(url, params=params, timeout=timeout)
-    r.raise_for_status()
+    r = get_session().get(url, params=params, timeout=timeout)
     xml_utf8 = _to_utf8_xml_bytes(r.content)
     root = ET.fromstring(xml_utf8)
 
@@ -169,6 +169,14 @@ def _norm(s) -> str:
     s = str(s).strip()
     return "" if s in {"nan", "NaN", "None"} else s
 
+def _norm_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Vectorized _norm over every column."""
+    out = df.copy()
+    for c in out.columns:
+        s = out[c].fillna("").astype(str).str.strip()
+        out[c] = s.mask(s.isin(["nan", "NaN", "None"]), "")
+    return out
+
 def _finance_map_from_xml(xml_path: Union[str, Path]) -> Dict[str, str]:
     """Parse FISIS XML (finance_cd, finance_nm) → dict."""
     p = Path(xml_path)
@@ -210,9 +218,7 @@ class FISISNamer:
         cdf = colmap_csv if isinstance(colmap_csv, pd.DataFrame) else pd.read_csv(colmap_csv, dtype=str, encoding=encoding)
 
         # --- normalize ---
-        for df in (wdf, cdf):
-            for c in df.columns:
-                df[c] = df[c].map(_norm)
+        wdf, cdf = _norm_frame(wdf), _norm_frame(cdf)
 
         # --- finance / list maps (guarded: columns may be missing) ---
         finance: Dict[str, str] = {}
@@ -237,17 +243,13 @@ class FISISNamer:
         acct_nm: Dict[Tuple[str, str], str] = {}
         acct_within_nm: Dict[Tuple[str, str], str] = {}
         if {"list_no", "account_cd", "account_nm"}.issubset(wdf.columns):
-            acct_nm = {
-                (r.list_no, r.account_cd): r.account_nm
-                for r in wdf.loc[(wdf["list_no"] != "") & (wdf["account_cd"] != ""), ["list_no", "account_cd", "account_nm"]]
-                    .drop_duplicates(["list_no", "account_cd"]).itertuples()
-            }
+            sub = wdf.loc[(wdf["list_no"] != "") & (wdf["account_cd"] != ""), ["list_no", "account_cd", "account_nm"]] \
+                .drop_duplicates(["list_no", "account_cd"])
+            acct_nm = dict(zip(zip(sub["list_no"].tolist(), sub["account_cd"].tolist()), sub["account_nm"].tolist()))
         if {"list_no", "account_cd", "within_account_nm"}.issubset(wdf.columns):
-            acct_within_nm = {
-                (r.list_no, r.account_cd): r.within_account_nm
-                for r in wdf.loc[(wdf["list_no"] != "") & (wdf["account_cd"] != ""), ["list_no", "account_cd", "within_account_nm"]]
-                    .drop_duplicates(["list_no", "account_cd"]).itertuples()
-            }
+            sub = wdf.loc[(wdf["list_no"] != "") & (wdf["account_cd"] != ""), ["list_no", "account_cd", "within_account_nm"]] \
+                .drop_duplicates(["list_no", "account_cd"])
+            acct_within_nm = dict(zip(zip(sub["list_no"].tolist(), sub["account_cd"].tolist()), sub["within_account_nm"].tolist()))
 
         # --- column map from fsis/fisis colmap CSV (required cols) ---
         required_cols = {"list_no", "account_cd", "column_id", "column_nm"}
@@ -255,14 +257,13 @@ class FISISNamer:
         if missing:
             raise ValueError(f"column-map CSV is missing columns: {sorted(missing)}")
 
-        col_map: Dict[Tuple[str, str, str], str] = {}
-        for r in cdf.loc[
+        sub = cdf.loc[
             (cdf["list_no"] != "") & (cdf["account_cd"] != "") & (cdf["column_id"] != ""),
             ["list_no", "account_cd", "column_id", "column_nm"]
-        ].itertuples(index=False):
-            key = (r.list_no, r.account_cd, r.column_id)
-            if key not in col_map:  # keep first occurrence
-                col_map[key] = r.column_nm
+        ].drop_duplicates(["list_no", "account_cd", "column_id"])  # keep first occurrence
+        col_map: Dict[Tuple[str, str, str], str] = dict(
+            zip(zip(sub["list_no"].tolist(), sub["account_cd"].tolist(), sub["column_id"].tolist()), sub["column_nm"].tolist())
+        )
 
         # --- optional finance XML merge (fill gaps only) ---
         if finance_xml:
@@ -284,6 +285,27 @@ class FISISNamer:
         )
 
 
+    # ---------------- serialization (resource cache) ----------------
+    def to_dict(self) -> dict:
+        """JSON-safe form; tuple keys become lists."""
+        return {
+            "finance": self.finance,
+            "list_map": self.list_map,
+            "acct_nm": [[*k, v] for k, v in self.acct_nm.items()],
+            "acct_within_nm": [[*k, v] for k, v in self.acct_within_nm.items()],
+            "col_map": [[*k, v] for k, v in self.col_map.items()],
+        }
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "FISISNamer":
+        return cls(
+            finance=dict(d["finance"]),
+            list_map=dict(d["list_map"]),
+            acct_nm={(a, b): v for a, b, v in d["acct_nm"]},
+            acct_within_nm={(a, b): v for a, b, v in d["acct_within_nm"]},
+            col_map={(a, b, c): v for a, b, c, v in d["col_map"]},
+        )
+
     # ---------------- label API ----------------
     def finance_label(self, finance_cd: str, include_id: bool = True) -> str:
         finance_cd = _norm(finance_cd)
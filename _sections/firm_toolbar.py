@@ -83,6 +83,11 @@ def load_finance_map(csv_path: str) -> pd.DataFrame:
     return df[["finance_cd", "finance_nm", "finance_group"]].copy()
 
 
+def market_finance_cds(df_map: pd.DataFrame, include_closed: bool = False) -> List[str]:
+    """Canonical finance_cd list of the entire market, as the toolbar defines it."""
+    return _canon_fin_cd_series(_filter_closed(df_map, include_closed)["finance_cd"]).tolist()
+
+
 def make_firm_toolbar(df_map: pd.DataFrame) -> html.Div:
     """Build the toolbar layout (contains Stores + UI controls)."""
     # Define the content for the first row (RUN IT button is removed)
@@ -6,16 +6,21 @@ import plotly.express as px
 import pandas as pd
 import re
 
-from _analytics.market_share import compute_full_market_share_data
+from _analytics.market_share import TREEMAP_COLUMNS, compute_full_market_share_data, firm_market_share
 from _utils.build_master import load_or_build_master_for_market
+from _utils.datasets import get_aggregable, get_indexed
 from _visual.graph_hier_bar import (
     make_hier_stacked_figure, node_parent_values, donut_for_hovered_node,
-    select_rescaler_from_values, natural_key, months_sorted, parse_custom_nodes
+    select_rescaler_from_values, natural_key, months_sorted, parse_custom_nodes,
+    bar_color_map, bar_firm_style, hier_firm_bar_traces, min_abs_nonzero
 )
 from _visual.line_overlay import add_line_overlay
-from _visual.delta_plot import make_delta_plot
-from _helpers.graph import _extract_hover, _hover_key
+from _visual.delta_plot import make_delta_plot, delta_entity_style, delta_entity_traces
+from _visual.figure_patch import figure_sig, only_triggered_by, patch_owned_traces, sub_state
+from _helpers.graph import HoverRefs, _extract_hover, _hover_key
 from _helpers.filter import _canon_fin_cd_series, _canon_fin_cd_value, _filter_master_data_for_section
+from _helpers.master_index import as_frame, narrow
+from _helpers.wire import pack_frame, unpack_frame
 
 
 def _get_sub_section_index(base_month, date_ranges, global_start, global_end):
@@ -80,6 +85,10 @@ def _section(sec: str, title: str):
             # --- FIX: Moved the delta plot container DOWN ---
             html.Div(id={"type": "delta-plot-container", "sec": sec}, style={"display": "flex", "gap": "8px", "width": "100%"}),
         ]),
+        # trace owners of the bar / delta / M/S figures, for compare toggles sent as a Patch
+        dcc.Store(id={"type": "bar-owners", "sec": sec}, data=None),
+        dcc.Store(id={"type": "delta-owners", "sec": sec}, data=None),
+        dcc.Store(id={"type": "ms-owners", "sec": sec}, data=None),
     ])
 
 def make_hier_sections(section_cfgs, hier, namer):
@@ -192,7 +201,9 @@ def register_hier_section_callbacks(app, hier, namer, list_nos, colid, term, sec
         if not master or not run_params or not section_params.get("is_hybrid"):
             return [no_update] * num_sub, [no_update] * num_sub, [no_update] * num_sub
         
-        df_master = pd.DataFrame(master)
+        df_master = get_indexed(master)
+        if df_master is None:  # token from before a restart, or a superseded run
+            return [no_update] * num_sub, [no_update] * num_sub, [no_update] * num_sub
         styles = []
 
         for i in range(num_sub):
@@ -200,13 +211,56 @@ def register_hier_section_callbacks(app, hier, namer, list_nos, colid, term, sec
             sub_params = {"min_d": date_range[0], "max_d": date_range[1]}
             sub_df, _, _ = _filter_master_data_for_section(df_master, sub_params, "", "")
             
-            num_months = len(sub_df["base_month"].unique())
+            num_months = len(months_sorted(sub_df))
             styles.append({'flex': num_months if num_months > 0 else 1, 'minWidth': 0})
         
         return styles, styles, styles
     
+    def _patch_bars(df_master, state, firms_to_plot, sub_params, term, sub_colid_val, sub_path, sub_nodes):
+        """The compare-toggle Patch of one bar sub-plot, or None when it has to be rebuilt."""
+        first_firm = state.get("first_firm")
+        if next(iter(firms_to_plot), None) != first_firm or not (sub_params.get("min_d") and sub_params.get("max_d")):
+            return None
+        if "hover_refs" not in state:
+            return None  # new traces' customdata must extend the figure's own table
+        old = {o for o, _, _ in state["owners"]}
+        new_cds = [cd for cd in firms_to_plot if cd not in old]
+        df_firms = narrow(df_master, finance_cd=(new_cds + [first_firm]) if new_cds else [])
+        df_firms, _, _ = _filter_master_data_for_section(df_firms, sub_params, colid, term)
+        color_map = bar_color_map(narrow(df_firms, finance_cd=first_firm), hier, list_nos, sub_colid_val, sub_path, sub_nodes) if new_cds else {}
+
+        mins, wanted = dict(state["mins"]), []
+        hover_refs = HoverRefs(state.get("hover_refs"))
+        for slot, (cd, info) in enumerate(firms_to_plot.items()):
+            style = bar_firm_style(slot, info["pattern"], namer.finance_label(cd, include_id=False))
+            if cd in old:
+                wanted.append([cd, style, None])
+                continue
+            traces, values = hier_firm_bar_traces(hier, narrow(df_firms, finance_cd=cd), cd, list_nos, sub_colid_val, sub_path,
+                                                  state["months"], color_map, slot, info["pattern"], namer=namer, custom_nodes=sub_nodes,
+                                                  hover_refs=hover_refs)
+            mins[cd] = min_abs_nonzero(values)
+            wanted.append([cd, style, traces])
+        mins = {cd: mins.get(cd) for cd in firms_to_plot}
+        scale, _ = select_rescaler_from_values([v for v in mins.values() if v])
+        if scale != state["scale"]:
+            return None  # the unit changes: every trace is rescaled
+        for _, _, traces in wanted:
+            for trace in traces or []:
+                trace.y = [y / scale if y is not None else None for y in trace.y]
+        patched = patch_owned_traces(state["owners"], wanted)
+        if patched is None:
+            return None
+        return patched[0], dict(state, owners=patched[1], mins=mins, hover_refs=hover_refs.to_json())
+
+    def _bar_hover_refs(owner_states, i):
+        """The customdata table of bar sub-plot i, as stored with its figure in bar-owners."""
+        st = owner_states[i] if isinstance(owner_states, list) and i < len(owner_states) else None
+        return st.get("hover_refs") if isinstance(st, dict) else None
+
     @app.callback(
         Output({"type":"bar","sec": MATCH, "sub": ALL}, "figure"),
+        Output({"type": "bar-owners", "sec": MATCH}, "data"),
         Input("ft-store-master", "data"),
         Input({"type":"level-path","sec": MATCH}, "data"),
         Input({"type": "compared-firms", "sec": MATCH}, "data"),
@@ -216,16 +270,20 @@ def register_hier_section_callbacks(app, hier, namer, list_nos, colid, term, sec
         State({"type": "overlay-spec-store", "sec": MATCH}, "data"),
         State({"type": "section-params-store", "sec": MATCH}, "data"),
         State("ft-store-selected-firm", "data"),
+        State({"type": "bar-owners", "sec": MATCH}, "data"),
     )
-    def _update_fig_section(master, level_path, compared_cds, selected_colid, run_params, custom_nodes, overlay_spec, section_params, firm_cd):
+    def _update_fig_section(master, level_path, compared_cds, selected_colid, run_params, custom_nodes, overlay_spec, section_params, firm_cd, owner_states):
         num_sub = section_params.get("sub_sec", 1)
         if not master or not run_params:
-            return [no_update] * num_sub
+            return [no_update] * num_sub, no_update
 
-        df_master = pd.DataFrame(master)
+        df_master = get_indexed(master)
+        if df_master is None:
+            return [no_update] * num_sub, no_update
         firm_cd_norm = _canon_fin_cd_value(firm_cd)
         groups = run_params.get("groups", {})
-        all_figs = []
+        toggled = only_triggered_by(callback_context, "compared-firms")
+        all_figs, states = [], []
 
         patterns = ["", "x", "/", ".", "-"]
         
@@ -255,7 +313,6 @@ def register_hier_section_callbacks(app, hier, namer, list_nos, colid, term, sec
 
                 sub_colid_val = selected_colid or (colids_list[i] if i < len(colids_list) else colid)
                 sub_params = {"min_d": start_date, "max_d": end_date}
-                sub_df, _, _ = _filter_master_data_for_section(df_master, sub_params, colid, term)
                 sub_path = level_path.get(f'path_{i}', [])
                 sub_nodes = custom_nodes.get(f'nodes_{i}', [])
                 sub_overlay = overlay_spec.get(f'overlay_{i}', {})
@@ -264,35 +321,82 @@ def register_hier_section_callbacks(app, hier, namer, list_nos, colid, term, sec
                     "min_d": run_params.get("startBaseMm"),
                     "max_d": run_params.get("endBaseMm")
                 }
-                df_filtered, final_colid, _ = _filter_master_data_for_section(df_master, sub_params, colid, term)
-                sub_df = df_filtered
                 sub_path, sub_nodes, sub_overlay = level_path or [], custom_nodes, overlay_spec
-                sub_colid_val = selected_colid or final_colid
-            
-            sub_scope = sub_df[sub_df.finance_cd == firm_cd_norm] if firm_cd_norm else sub_df
+                sub_colid_val = selected_colid or colid
+
+            # a compare toggle only adds / removes / restyles one firm's bars; overlays span every firm
+            sig = figure_sig(master, firm_cd_norm, term, sub_params, sub_colid_val, sub_path, sub_nodes, sub_overlay)
+            state = sub_state(owner_states, i, sig) if toggled and not (sub_overlay and sub_overlay.get("expr")) else None
+            patched = _patch_bars(df_master, state, firms_to_plot, sub_params, term, sub_colid_val, sub_path, sub_nodes) if state else None
+            if patched is not None:
+                all_figs.append(patched[0])
+                states.append(patched[1])
+                continue
+
+            sub_df, _, _ = _filter_master_data_for_section(df_master, sub_params, colid, term)
+            sub_scope = narrow(sub_df, finance_cd=firm_cd_norm) if firm_cd_norm else sub_df
 
             if not sub_df.empty:
+                info = {}
                 fig_sub = make_hier_stacked_figure(
                     hier, sub_df, list_nos, sub_colid_val, sub_path, namer, sub_nodes,
-                    firms_to_plot=firms_to_plot
+                    firms_to_plot=firms_to_plot, trace_info=info
                 )
                 
                 if sub_overlay and sub_overlay.get("expr"):
                    add_line_overlay(
-                        fig_sub, df_firm=(sub_scope if firm_cd_norm else None), df_market=sub_df,
+                        fig_sub, df_firm=(as_frame(sub_scope) if firm_cd_norm else None), df_market=as_frame(sub_df),
                         groups=groups, months=months_sorted(sub_df), colid=sub_colid_val,
                         expr=sub_overlay["expr"], expr_nm=sub_overlay.get("expr_nm"),
                         hier=hier, namer=namer,
                         compared_cds=compared_cds
                     )
                 all_figs.append(fig_sub)
+                states.append(dict(info, sig=sig))
             else:
                 all_figs.append(go.Figure())
+                states.append(None)
         
-        return all_figs
+        return all_figs, states
+
+    def _patch_delta(df_master, state, compared_cds, firm_cd_norm, sub_params, term, sub_colid_val, sub_path, sub_nodes, view_selection):
+        """The compare-toggle Patch of one delta sub-plot, or None when it has to be rebuilt."""
+        if not (sub_params.get("min_d") and sub_params.get("max_d")):
+            return None
+        compared_names = set(state["compared"])
+        prefix = [[o, st, None] for o, n, st in state["owners"] if o not in compared_names]
+        n_colored = sum(1 for o, n, _ in state["owners"] if o not in compared_names and n)
+        old = {o: n for o, n, _ in state["owners"]}
+        taken = {o for o, _, _ in prefix}
+
+        wanted, names = list(prefix), {}
+        for comp_cd in (compared_cds or []):
+            if comp_cd == firm_cd_norm:
+                continue
+            name = namer.finance_label(comp_cd, False)
+            if name in taken:
+                return None  # same label as another entity: the rebuild's dict keeps only one of them
+            taken.add(name)
+            names[name] = comp_cd
+            if name in old:
+                wanted.append([name, delta_entity_style(n_colored) if old[name] else {}, None])
+                n_colored += 1 if old[name] else 0
+                continue
+            firm_df, _, _ = _filter_master_data_for_section(narrow(df_master, finance_cd=comp_cd), sub_params, colid, term)
+            _, _, parent_vals = node_parent_values(firm_df, hier, list_nos, sub_colid_val, sub_path, sub_nodes)
+            if parent_vals.empty:
+                continue  # the rebuild skips it too
+            series = parent_vals.groupby("base_month")["value"].sum()
+            wanted.append([name, delta_entity_style(n_colored), delta_entity_traces(name, series, term, n_colored, False, view_selection)])
+            n_colored += 1
+        patched = patch_owned_traces(state["owners"], wanted)
+        if patched is None:
+            return None
+        return patched[0], dict(state, owners=patched[1], compared=names)
 
     @app.callback(
         Output({"type": "delta-plot", "sec": MATCH, "sub": ALL}, "figure"),
+        Output({"type": "delta-owners", "sec": MATCH}, "data"),
         Input("ft-store-master", "data"),
         Input({"type":"level-path","sec": MATCH}, "data"),
         Input({"type": "delta-view-selector", "sec": MATCH}, "value"),
@@ -302,18 +406,22 @@ def register_hier_section_callbacks(app, hier, namer, list_nos, colid, term, sec
         State({"type":"custom-nodes","sec": MATCH}, "data"),
         State({"type": "section-params-store", "sec": MATCH}, "data"),
         State("ft-store-selected-firm", "data"),
+        State({"type": "delta-owners", "sec": MATCH}, "data"),
     )
-    def _update_delta_plot(master, level_path, delta_view_selection, compared_cds, selected_colid, run_params, custom_nodes, section_params, firm_cd):
+    def _update_delta_plot(master, level_path, delta_view_selection, compared_cds, selected_colid, run_params, custom_nodes, section_params, firm_cd, owner_states):
         num_sub = section_params.get("sub_sec", 1)
         if not master or not run_params:
-            return [no_update] * num_sub
+            return [no_update] * num_sub, no_update
 
-        df_master = pd.DataFrame(master)
+        df_master = get_aggregable(master)  # the MasterCube when DATASETS["cube"] is on
+        if df_master is None:
+            return [no_update] * num_sub, no_update
         firm_cd_norm = _canon_fin_cd_value(firm_cd)
         groups = run_params.get("groups", {})
         entire_market = run_params.get("entireMarket", [])
         selected_firm_name = namer.finance_label(firm_cd_norm, False) if firm_cd_norm else ""
-        all_figs = []
+        toggled = only_triggered_by(callback_context, "compared-firms")
+        all_figs, states = [], []
 
         for i in range(num_sub):
             if section_params.get("term"): term = section_params.get("term")
@@ -331,7 +439,6 @@ def register_hier_section_callbacks(app, hier, namer, list_nos, colid, term, sec
 
                 sub_colid_val = selected_colid or (colids_list[i] if i < len(colids_list) else colid)
                 sub_params = {"min_d": start_date, "max_d": end_date}
-                sub_df, _, _ = _filter_master_data_for_section(df_master, sub_params, colid, term)
                 sub_path = level_path.get(f'path_{i}', [])
                 sub_nodes = custom_nodes.get(f'nodes_{i}', [])
             else:
@@ -339,14 +446,21 @@ def register_hier_section_callbacks(app, hier, namer, list_nos, colid, term, sec
                     "min_d": run_params.get("startBaseMm"),
                     "max_d": run_params.get("endBaseMm")
                 }
-                df_filtered, final_colid, _ = _filter_master_data_for_section(df_master, sub_params, colid, term)
-                sub_df = df_filtered
                 sub_path, sub_nodes = level_path or [], custom_nodes
-                sub_colid_val = selected_colid or final_colid
-            
+                sub_colid_val = selected_colid or colid
+
+            sig = figure_sig(master, firm_cd_norm, term, sub_params, sub_colid_val, sub_path, sub_nodes, delta_view_selection, groups, entire_market)
+            state = sub_state(owner_states, i, sig) if toggled else None
+            patched = _patch_delta(df_master, state, compared_cds, firm_cd_norm, sub_params, term, sub_colid_val, sub_path, sub_nodes, delta_view_selection) if state else None
+            if patched is not None:
+                all_figs.append(patched[0])
+                states.append(patched[1])
+                continue
 
+            sub_df, _, _ = _filter_master_data_for_section(df_master, sub_params, colid, term)
             if sub_df.empty:
                 all_figs.append(go.Figure())
+                states.append(None)
                 continue
 
             collected_series_sub = {}
@@ -356,22 +470,25 @@ def register_hier_section_callbacks(app, hier, namer, list_nos, colid, term, sec
                 return parent_vals.groupby("base_month")["value"].sum()
 
             if firm_cd_norm:
-                series = get_entity_series(sub_df[sub_df.finance_cd == firm_cd_norm])
+                series = get_entity_series(narrow(sub_df, finance_cd=firm_cd_norm))
                 if series is not None: collected_series_sub[selected_firm_name] = series
             
-            series = get_entity_series(sub_df[sub_df.finance_cd.isin(entire_market)])
+            series = get_entity_series(narrow(sub_df, finance_cd=entire_market))
             if series is not None: collected_series_sub["Market"] = series
             
             for gname, cds in groups.items():
-                series = get_entity_series(sub_df[sub_df.finance_cd.isin(cds)])
+                series = get_entity_series(narrow(sub_df, finance_cd=cds))
                 if series is not None: collected_series_sub[gname] = series
 
+            compared_names, clash = {}, False
             for comp_cd in (compared_cds or []):
                 if comp_cd != firm_cd_norm:
-                    series = get_entity_series(sub_df[sub_df.finance_cd == comp_cd])
+                    series = get_entity_series(narrow(sub_df, finance_cd=comp_cd))
                     if series is not None:
                         comp_name = namer.finance_label(comp_cd, False)
+                        clash |= comp_name in collected_series_sub
                         collected_series_sub[comp_name] = series
+                        compared_names[comp_name] = comp_cd
 
             fig_sub = make_delta_plot(
                 collected_series_sub,
@@ -381,7 +498,14 @@ def register_hier_section_callbacks(app, hier, namer, list_nos, colid, term, sec
             )
             all_figs.append(fig_sub)
 
-        return all_figs
+            n_per_entity, owners, n_colored = (3 if delta_view_selection == 'all' else 1), [], 0
+            for name, series in collected_series_sub.items():
+                drawn = not series.empty
+                owners.append([name, n_per_entity if drawn else 0, delta_entity_style(n_colored) if drawn else {}])
+                n_colored += 1 if drawn else 0
+            states.append(None if clash else {"sig": sig, "owners": owners, "compared": compared_names})
+
+        return all_figs, states
     
     @app.callback(
         Output({"type":"hover-donut","sec": MATCH}, "figure"),
@@ -394,18 +518,22 @@ def register_hier_section_callbacks(app, hier, namer, list_nos, colid, term, sec
         State("ft-store-selected-firm", "data"),
         State({"type": "section-params-store", "sec": MATCH}, "data"),
         State({"type":"custom-nodes","sec": MATCH}, "data"),
+        State({"type": "bar-owners", "sec": MATCH}, "data"),
         prevent_initial_call=True,
     )
-    def _update_hover_overlays(hoverData_list, level_path, master, run_params, firm_cd, section_params, custom_nodes):
-        hoverData = next((h for h in hoverData_list if h), None)
+    def _update_hover_overlays(hoverData_list, level_path, master, run_params, firm_cd, section_params, custom_nodes, owner_states):
+        hovered = next((i for i, h in enumerate(hoverData_list) if h), None)
+        hoverData = hoverData_list[hovered] if hovered is not None else None
         if not hoverData or not master or not run_params:
             return go.Figure(), {"display": "none"}, no_update
 
-        node_key, base_month, hovered_firm_cd = _extract_hover(hoverData)
+        node_key, base_month, hovered_firm_cd = _extract_hover(hoverData, _bar_hover_refs(owner_states, hovered))
         if not node_key or not base_month:
             return go.Figure(), {"display": "none"}, no_update
 
-        df_master = pd.DataFrame(master)
+        df_master = get_indexed(master)
+        if df_master is None:
+            return go.Figure(), {"display": "none"}, no_update
 
         firm_cd_for_donut = hovered_firm_cd or _canon_fin_cd_value(firm_cd)
 
@@ -423,7 +551,7 @@ def register_hier_section_callbacks(app, hier, namer, list_nos, colid, term, sec
             df_filtered, final_colid, _ = _filter_master_data_for_section(df_master, section_params, colid, term)
             final_path, final_nodes = level_path, custom_nodes
 
-        df_scope = df_filtered[df_filtered.finance_cd == firm_cd_for_donut] if firm_cd_for_donut else df_filtered
+        df_scope = narrow(df_filtered, finance_cd=firm_cd_for_donut) if firm_cd_for_donut else df_filtered
         if df_scope.empty:
             return go.Figure(), {"display": "none"}, no_update
         
@@ -499,9 +627,10 @@ def register_hier_section_callbacks(app, hier, namer, list_nos, colid, term, sec
         Input({"type":"btn-back","sec": MATCH}, "n_clicks"),
         State({"type":"level-path","sec": MATCH}, "data"),
         State({"type": "section-params-store", "sec": MATCH}, "data"),
+        State({"type": "bar-owners", "sec": MATCH}, "data"),
         prevent_initial_call=True,
     )
-    def _nav_section(clickData_list, back_clicks, level_path, section_params):
+    def _nav_section(clickData_list, back_clicks, level_path, section_params, owner_states):
         ctx = callback_context
         if not ctx.triggered:
             raise PreventUpdate
@@ -520,11 +649,7 @@ def register_hier_section_callbacks(app, hier, namer, list_nos, colid, term, sec
             clickData = clickData_list[clicked_sub_index]
             if not clickData or not clickData.get("points"): raise PreventUpdate
 
-            try:
-                key = clickData["points"][0]["customdata"]["node_key"]
-            except (KeyError, IndexError):
-                raise PreventUpdate
-            
+            key = _hover_key(clickData, _bar_hover_refs(owner_states, clicked_sub_index))
             if not key: raise PreventUpdate
 
             if is_hybrid:
@@ -540,9 +665,39 @@ def register_hier_section_callbacks(app, hier, namer, list_nos, colid, term, sec
         return no_update
     
 
+    def _ms_compare_trace(df_comp_trace, comp_cd, color_idx):
+        color = px.colors.qualitative.Plotly[color_idx % len(px.colors.qualitative.Plotly)]
+        return go.Scatter(x=df_comp_trace["base_month"], y=df_comp_trace["share_pct"], name=namer.finance_label(comp_cd, False), mode='lines', line=dict(width=2, color=color, dash='solid'))
+
+    def _patch_ms_lines(df_master, state, compared_cds, firm_cd_norm, sub_params, term, sub_colid_val, sub_path, sub_nodes, entire_market):
+        """The compare-toggle Patch of one M/S line sub-plot, or None when it has to be rebuilt."""
+        if not (sub_params.get("min_d") and sub_params.get("max_d")):
+            return None
+        old = {o: n for o, n, _ in state["owners"]}
+        s_market = pd.Series(state["market"], dtype="float64")
+        wanted, color_idx = [["_fixed", {}, None]], 0
+        for comp_cd in (compared_cds or []):
+            if comp_cd == firm_cd_norm: continue
+            if comp_cd in old:
+                drawn = bool(old[comp_cd])
+            else:
+                firm_df, _, _ = _filter_master_data_for_section(narrow(df_master, finance_cd=comp_cd), sub_params, colid, term)
+                df_comp_trace = firm_market_share(firm_df, comp_cd, hier_by_list=hier, list_nos=list_nos, colid=sub_colid_val, level_path=sub_path,
+                                                  entire_market_cds=entire_market, custom_nodes=sub_nodes, s_market=s_market)
+                drawn = not df_comp_trace.empty
+            style = {"line.color": px.colors.qualitative.Plotly[color_idx % len(px.colors.qualitative.Plotly)]} if drawn else {}
+            traces = None if comp_cd in old else ([_ms_compare_trace(df_comp_trace, comp_cd, color_idx)] if drawn else [])
+            wanted.append([comp_cd, style, traces])
+            color_idx += 1 if drawn else 0
+        patched = patch_owned_traces(state["owners"], wanted)
+        if patched is None:
+            return None
+        return patched[0], dict(state, owners=patched[1])
+
     @app.callback(
         Output({"type": "market-share-line-plot", "sec": MATCH, "sub": ALL}, "figure"),
         Output({"type": "ms-data-store", "sec": MATCH}, "data"),
+        Output({"type": "ms-owners", "sec": MATCH}, "data"),
         Input("ft-store-master", "data"),
         Input({"type":"level-path","sec": MATCH}, "data"),
         Input({"type": "compared-firms", "sec": MATCH}, "data"),
@@ -551,16 +706,20 @@ def register_hier_section_callbacks(app, hier, namer, list_nos, colid, term, sec
         State({"type":"custom-nodes","sec": MATCH}, "data"),
         State("ft-store-selected-firm", "data"),
         State({"type": "section-params-store", "sec": MATCH}, "data"),
+        State({"type": "ms-owners", "sec": MATCH}, "data"),
     )
-    def _update_ms_line_plot(master, level_path, compared_cds, selected_colid, run_params, custom_nodes, firm_cd, section_params):
+    def _update_ms_line_plot(master, level_path, compared_cds, selected_colid, run_params, custom_nodes, firm_cd, section_params, owner_states):
         num_sub = section_params.get("sub_sec", 1)
         if not master or not run_params:
-            return [no_update] * num_sub, no_update
-        df_master = pd.DataFrame(master)
+            return [no_update] * num_sub, no_update, no_update
+        df_master = get_aggregable(master)
+        if df_master is None:
+            return [no_update] * num_sub, no_update, no_update
         firm_cd_norm = _canon_fin_cd_value(firm_cd)
         groups = run_params.get("groups", {})
         entire_market = run_params.get("entireMarket", [])
-        all_figs = []
+        toggled = only_triggered_by(callback_context, "compared-firms")
+        all_figs, states = [], []
         color_palette = px.colors.qualitative.Plotly
         treemap_data_store = pd.DataFrame()
         
@@ -590,10 +749,21 @@ def register_hier_section_callbacks(app, hier, namer, list_nos, colid, term, sec
                 sub_colid_val = selected_colid or section_params.get("colid") or colid
                 sub_path, sub_nodes = level_path or [], custom_nodes
 
+            sig = figure_sig(master, firm_cd_norm, term, sub_params, sub_colid_val, sub_path, sub_nodes, groups, entire_market)
+            state = sub_state(owner_states, i, sig) if toggled else None
+            patched = _patch_ms_lines(df_master, state, compared_cds, firm_cd_norm, sub_params, term, sub_colid_val, sub_path, sub_nodes, entire_market) if state else None
+            if patched is not None:
+                all_figs.append(patched[0])
+                states.append(patched[1])
+                if i == 0:
+                    treemap_data_store = None  # compared firms do not change the treemap data
+                continue
+
             sub_df, _, _ = _filter_master_data_for_section(df_master, sub_params, colid, term)
 
             if sub_df.empty:
                 all_figs.append(fig_sub)
+                states.append(None)
                 continue
             
             ms_data = compute_full_market_share_data(sub_df, hier_by_list=hier, list_nos=list_nos, colid=sub_colid_val, level_path=sub_path, entire_market_cds=entire_market, groups=groups, custom_nodes=sub_nodes)
@@ -614,19 +784,26 @@ def register_hier_section_callbacks(app, hier, namer, list_nos, colid, term, sec
                 if df_avg is not None and not df_avg.empty:
                     fig_sub.add_trace(go.Scatter(x=df_avg["base_month"], y=df_avg["share_pct"], name=f"{gname}_평균", mode='lines', line=dict(dash='dot')))
             
+            owners = [["_fixed", len(fig_sub.data), {}]]
             color_idx = 0
             for comp_cd in (compared_cds or []):
                 if comp_cd == firm_cd_norm: continue
-                df_comp_trace = df_per_firm[df_per_firm["finance_cd"] == comp_cd]
+                df_comp_trace = df_per_firm[df_per_firm["finance_cd"] == comp_cd] if not df_per_firm.empty else df_per_firm
                 if not df_comp_trace.empty:
-                    color = color_palette[color_idx % len(color_palette)]
-                    fig_sub.add_trace(go.Scatter(x=df_comp_trace["base_month"], y=df_comp_trace["share_pct"], name=namer.finance_label(comp_cd, False), mode='lines', line=dict(width=2, color=color, dash='solid')))
+                    fig_sub.add_trace(_ms_compare_trace(df_comp_trace, comp_cd, color_idx))
+                    owners.append([comp_cd, 1, {"line.color": color_palette[color_idx % len(color_palette)]}])
                     color_idx += 1
+                else:
+                    owners.append([comp_cd, 0, {}])
             
             fig_sub.update_layout(title_text="M/S Trend", yaxis_ticksuffix="%", hovermode="x unified", margin=dict(l=20, r=20, t=40, b=20), showlegend=(i==0), legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="left", x=0))
             all_figs.append(fig_sub)
+            s_market = ms_data.get("market")
+            states.append({"sig": sig, "owners": owners,
+                           "market": {str(k): float(v) for k, v in s_market.items()} if s_market is not None else {}})
                 
-        return all_figs, treemap_data_store.to_dict("records")
+        ms_store = no_update if treemap_data_store is None else pack_frame(treemap_data_store, TREEMAP_COLUMNS)
+        return all_figs, ms_store, states
     
     @app.callback(
         Output({"type": "market-share-treemap", "sec": MATCH}, "figure"),
@@ -642,7 +819,7 @@ def register_hier_section_callbacks(app, hier, namer, list_nos, colid, term, sec
         if not ms_data or not run_params or not hoverData: 
             raise PreventUpdate
 
-        df_per_firm = pd.DataFrame(ms_data)
+        df_per_firm = unpack_frame(ms_data)
         firm_cd_norm = _canon_fin_cd_value(firm_cd)
         groups = run_params.get("groups", {})
 
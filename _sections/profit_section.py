@@ -7,27 +7,32 @@ import re
 import plotly.express as px
 from plotly.subplots import make_subplots
 
-from _analytics.market_share import compute_full_market_share_data
+from _analytics.market_share import TREEMAP_COLUMNS, compute_full_market_share_data
+from _utils.datasets import get_dataset
 from _visual.graph_hier_bar import (
     node_parent_values, donut_for_hovered_node,
     select_rescaler_from_values, natural_key, months_sorted, parse_custom_nodes, get_children, get_top_level_accounts, values_for_accounts
 )
 from _visual.line_overlay import _eval_expr_cross_sectional
 from _helpers.filter import _canon_fin_cd_value, _filter_master_data_for_section
+from _helpers.graph import HoverRefs, _customdata_keys
+from _helpers.wire import pack_frame, unpack_frame
 
-def _extract_cross_sectional_interaction(event_data):
-    """Helper to extract relevant data from cross-sectional plot events."""
+def _extract_cross_sectional_interaction(event_data, refs=None):
+    """Helper to extract relevant data from cross-sectional plot events (`refs`: the plot's HoverRefs table)."""
     if not event_data or not event_data.get("points"):
         return None, None, None
     
     pt = event_data["points"][0]
     node_label = pt.get("y") 
-    custom_data = pt.get("customdata", {})
-    node_key = custom_data.get("node_key")
-    firm_cd = custom_data.get("firm_cd")
+    node_key, firm_cd = _customdata_keys(pt.get("customdata"), refs)
     
     return node_key, firm_cd, node_label
 
+def _sub_refs(hover_refs, i):
+    """Sub-plot i's HoverRefs table out of the ps-cross-hover-refs store."""
+    return hover_refs[i] if isinstance(hover_refs, list) and i < len(hover_refs) else None
+
 def _section(sec: str, title: str):
     """Builds the static HTML structure for a single Profitability section."""
     return html.Div(className="layout", children=[
@@ -69,6 +74,8 @@ def _section(sec: str, title: str):
                 ]
             ),
         ]),
+        # customdata ref tables of the cross-sectional figures (HoverRefs), one per sub-plot
+        dcc.Store(id={"type": "ps-cross-hover-refs", "sec": sec}, data=None),
     ])
 
 def make_profit_sections(section_cfgs, namer, hier):
@@ -154,7 +161,9 @@ def register_profit_section_callbacks(app, hier, namer, list_nos, colid, term, s
         if not master or not run_params or not selected_colid:
             return [go.Figure()] * num_sub, no_update
 
-        df_master = pd.DataFrame(master)
+        df_master = get_dataset(master)
+        if df_master is None:
+            return [go.Figure()] * num_sub, no_update
         firm_cd_norm = _canon_fin_cd_value(firm_cd)
         entire_market = run_params.get("entireMarket", [])
         spec_config = section_cfg.get("spec")
@@ -222,7 +231,7 @@ def register_profit_section_callbacks(app, hier, namer, list_nos, colid, term, s
             fig_sub.update_layout(title_text="M/S Trend", yaxis_ticksuffix="%", hovermode="x unified", margin=dict(l=20,r=20,t=40,b=20), showlegend=(i==0), legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="left", x=0))
             all_figs.append(fig_sub)
             
-        return all_figs, final_df_for_treemap.to_dict("records")
+        return all_figs, pack_frame(final_df_for_treemap, TREEMAP_COLUMNS)
 
     @app.callback(
         Output({"type": "ps-market-share-treemap", "sec": MATCH}, "figure"),
@@ -237,7 +246,7 @@ def register_profit_section_callbacks(app, hier, namer, list_nos, colid, term, s
         if not ms_data or not run_params or not hoverData: 
             raise PreventUpdate
         
-        df_per_firm = pd.DataFrame(ms_data)
+        df_per_firm = unpack_frame(ms_data)
         firm_cd_norm = _canon_fin_cd_value(firm_cd)
         groups = run_params.get("groups", {})
         base_month = str(hoverData["points"][0]["x"])
@@ -305,7 +314,9 @@ def register_profit_section_callbacks(app, hier, namer, list_nos, colid, term, s
     def _update_hierarchy_line_plot(master, level_path, compared_cds, selected_colid, run_params, section_cfg, firm_cd):
         num_sub = section_cfg.get("sub_sec", 1)
         if not master or not run_params or not selected_colid: return [go.Figure()] * num_sub
-        df_master = pd.DataFrame(master)
+        df_master = get_dataset(master)
+        if df_master is None:
+            return [go.Figure()] * num_sub
         firm_cd_norm = _canon_fin_cd_value(firm_cd)
         all_figs = []
         firms_to_plot = [firm_cd_norm] if firm_cd_norm else []
@@ -348,7 +359,7 @@ def register_profit_section_callbacks(app, hier, namer, list_nos, colid, term, s
                     parts = [p.strip() for p in spec_for_subplot.split('+')]
                     spec_L_str, spec_R_str = (parts[0] if len(parts) > 0 else ""), (parts[1] if len(parts) > 1 else "")
                     
-                      list_name_L = namer.list_label(spec_L_str.split(':')[0], include_id=False) if spec_L_str else "L"
+                    list_name_L = namer.list_label(spec_L_str.split(':')[0], include_id=False) if spec_L_str else "L"
                     list_name_R = namer.list_label(spec_R_str.split(':')[0], include_id=False) if spec_R_str else "R"
 
                     if spec_L_str:
@@ -407,6 +418,7 @@ def register_profit_section_callbacks(app, hier, namer, list_nos, colid, term, s
     
     @app.callback(
         Output({"type": "ps-cross-sectional-plot", "sec": MATCH, "sub": ALL}, "figure"),
+        Output({"type": "ps-cross-hover-refs", "sec": MATCH}, "data"),
         Input("ft-store-master", "data"),
         Input({"type": "ps-level-path", "sec": MATCH}, "data"),
         Input({"type": "ps-compared-firms", "sec": MATCH}, "data"),
@@ -417,9 +429,12 @@ def register_profit_section_callbacks(app, hier, namer, list_nos, colid, term, s
     )
     def _update_cross_sectional_plot(master, level_path, compared_cds, selected_colid, hovered_month, run_params, section_cfg):
         num_sub = section_cfg.get("sub_sec", 1)
-        if not master or not run_params or not selected_colid: return [go.Figure()] * num_sub
-        df_master = pd.DataFrame(master)
+        if not master or not run_params or not selected_colid: return [go.Figure()] * num_sub, None
+        df_master = get_dataset(master)
+        if df_master is None:
+            return [go.Figure()] * num_sub, None
         all_figs = []
+        hover_refs = [HoverRefs() for _ in range(num_sub)]  # customdata tables, one per sub-plot
         main_firm_cd = _canon_fin_cd_value(run_params.get("financeCd"))
         firms_to_plot = [main_firm_cd] if main_firm_cd else []
         if compared_cds: firms_to_plot.extend([cd for cd in compared_cds if cd not in firms_to_plot])
@@ -474,7 +489,7 @@ def register_profit_section_callbacks(app, hier, namer, list_nos, colid, term, s
                     fig_sub.add_trace(go.Bar(
                         y=y_labels_sorted, x=x_values, name=firm_name, orientation='h',
                         marker=dict(color=bar_colors, pattern=dict(shape=patterns[firm_idx % len(patterns)])), # Apply colors here
-                        customdata=[{"node_key": f"acc:{parent_list_no}:{cat}", "firm_cd": current_firm_cd} for cat in y_categories_sorted]
+                        customdata=[hover_refs[i].ref(f"acc:{parent_list_no}:{cat}", current_firm_cd) for cat in y_categories_sorted]
                     ))
                 fig_sub.update_layout(barmode='group', title_text=f"Composition for {base_month}", yaxis={'categoryorder':'array', 'categoryarray': y_labels_sorted}, margin=dict(l=10,r=10,t=30,b=10))
 
@@ -539,8 +554,8 @@ def register_profit_section_callbacks(app, hier, namer, list_nos, colid, term, s
                     x_vals1_scaled = [v / scale for v in firm_data["x1"]]
                     x_vals2_scaled = [v / scale for v in firm_data["x2"]]
                     
-                    customdata1 = [{"node_key": f"acc:{list1_no}:{acd}", "firm_cd": current_firm_cd} for acd in y_categories_sorted_acd]
-                    customdata2 = [{"node_key": f"acc:{list2_no}:{acd}", "firm_cd": current_firm_cd} for acd in y_categories_sorted_acd]
+                    customdata1 = [hover_refs[i].ref(f"acc:{list1_no}:{acd}", current_firm_cd) for acd in y_categories_sorted_acd]
+                    customdata2 = [hover_refs[i].ref(f"acc:{list2_no}:{acd}", current_firm_cd) for acd in y_categories_sorted_acd]
 
                     fig_sub.add_trace(go.Bar(name=f"{firm_name} (L)", y=y_labels_sorted, x=x_vals1_scaled, orientation='h', marker_color='mediumseagreen', marker=dict(pattern=dict(shape=pattern)), customdata=customdata1, showlegend=True), row=1, col=1)
                     fig_sub.add_trace(go.Bar(name=f"{firm_name} (R)", y=y_labels_sorted, x=x_vals2_scaled, orientation='h', marker_color='indianred', marker=dict(pattern=dict(shape=pattern)), customdata=customdata2, showlegend=False), row=1, col=2)
@@ -582,7 +597,7 @@ def register_profit_section_callbacks(app, hier, namer, list_nos, colid, term, s
 
             if fig_sub: all_figs.append(fig_sub)
             else: all_figs.append(go.Figure())
-        return all_figs
+        return all_figs, [r.to_json() for r in hover_refs]
 
 
     @app.callback(
@@ -591,9 +606,10 @@ def register_profit_section_callbacks(app, hier, namer, list_nos, colid, term, s
         Input({"type": "ps-btn-back", "sec": MATCH}, "n_clicks"),
         State({"type": "ps-level-path", "sec": MATCH}, "data"),
         State({"type": "ps-section-params-store", "sec": MATCH}, "data"), 
+        State({"type": "ps-cross-hover-refs", "sec": MATCH}, "data"),
         prevent_initial_call=True,
     )
-    def _nav_section(clickData_list, back_clicks, level_path, section_cfg):
+    def _nav_section(clickData_list, back_clicks, level_path, section_cfg, hover_refs):
         """Handles drill-down and back navigation."""
         ctx = callback_context
         if not ctx.triggered: raise PreventUpdate
@@ -603,9 +619,9 @@ def register_profit_section_callbacks(app, hier, namer, list_nos, colid, term, s
             return (level_path or [])[:-1] # Go back one level
 
         if isinstance(triggered_id, dict) and triggered_id.get("type") == "ps-cross-sectional-plot":
-            clickData = next((c for c in clickData_list if c), None)
-            if not clickData: raise PreventUpdate
-            node_key, _, _ = _extract_cross_sectional_interaction(clickData)
+            clicked = next((i for i, c in enumerate(clickData_list) if c), None)
+            if clicked is None: raise PreventUpdate
+            node_key, _, _ = _extract_cross_sectional_interaction(clickData_list[clicked], _sub_refs(hover_refs, clicked))
             if not node_key: raise PreventUpdate
             
             try:
@@ -634,18 +650,22 @@ def register_profit_section_callbacks(app, hier, namer, list_nos, colid, term, s
         State({"type": "ps-selected-colid", "sec": MATCH}, "data"),
         State({"type": "ps-last-hovered-month", "sec": MATCH}, "data"),
         State({"type": "ps-section-params-store", "sec": MATCH}, "data"),
+        State({"type": "ps-cross-hover-refs", "sec": MATCH}, "data"),
         prevent_initial_call=True,
     )
-    def _update_hover_overlays(hoverData_list, master, selected_colid, hovered_month, section_cfg):
-        hoverData = next((h for h in hoverData_list if h), None)
+    def _update_hover_overlays(hoverData_list, master, selected_colid, hovered_month, section_cfg, hover_refs):
+        hovered = next((i for i, h in enumerate(hoverData_list) if h), None)
+        hoverData = hoverData_list[hovered] if hovered is not None else None
         if not hoverData or not master or not hovered_month or not selected_colid:
             return go.Figure(), {"display": "none"}, no_update
 
         point_data = hoverData["points"][0]
-        node_key, firm_cd, hovered_label = _extract_cross_sectional_interaction(hoverData)
+        node_key, firm_cd, hovered_label = _extract_cross_sectional_interaction(hoverData, _sub_refs(hover_refs, hovered))
         if not node_key or not firm_cd: return go.Figure(), {"display": "none"}, no_update
         
-        df_master = pd.DataFrame(master)
+        df_master = get_dataset(master)
+        if df_master is None:
+            return go.Figure(), {"display": "none"}, no_update
         df_scope = df_master[df_master.finance_cd == firm_cd]
         if df_scope.empty: return go.Figure(), {"display": "none"}, no_update
 
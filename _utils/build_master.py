@@ -1,13 +1,36 @@
-# build_master.py  (lite / fragile version)
-
-import os, json, requests, re
-import xml.etree.ElementTree as ET
+# build_master.py
+"""
+Builds the long-format master frame from FISIS statisticsInfoSearch.
+
+- one call per (firm, list, term, month window), run on a FetchEngine; calls
+  go through the shared FisisSession (pooled connections, retries with
+  backoff, circuit breaker), and bodies are streamed into column buffers
+  (xml_stream.stream_rows, EUC-KR) and recorded in the response cache
+- load_or_build_master_for_market serves a request from the scope memo or
+  the partitioned master store, and fetches only the cells the coverage
+  manifest reports missing
+"""
+
+import os, json, re
+import datetime as _dt
+import threading
 import pandas as pd
-from typing import Iterable, Optional, Dict, List
-from settings import DEFAULTS
+from typing import Callable, Iterable, Optional, Dict, List, Tuple
+from settings import DEFAULTS, PATHS
+from _utils.fetch_engine import FetchCancelled, FetchEngine, FetchTask
+from _utils.fetch_planner import FetchPlan, load_supported_terms, plan_requests, split_supported
+from _utils.http_session import get_session, session_stats
+from _utils.master_store import MasterStore, get_store
+from _utils.scope_index import normalize_scope
+from _utils.scope_memo import get_scope_memo
+from _utils.term_derivation import derive_rows, fetch_terms
+from _utils.response_cache import get_response_cache, recent_cutoff_month, response_key
+from _utils.xml_stream import MASTER_COLUMNS, MasterColumns, stream_rows
 
 API_KEY = DEFAULTS["api_key"]
-STATS_INFO_URL = "https://fisis.fss.or.kr/openapi/statisticsInfoSearch.xml"
+# FISIS_STATS_INFO_URL points the whole fetch path at a local stand-in (tests / benchmarks)
+STATS_INFO_URL = os.environ.get("FISIS_STATS_INFO_URL", "https://fisis.fss.or.kr/openapi/statisticsInfoSearch.xml")
+_MASTER_LOCK = threading.RLock()
 
 def _canon_fin_cd_series(s: pd.Series) -> pd.Series:
     return (s.astype(str).str.strip().str.extract(r"(\d+)", expand=False).fillna("").str.zfill(7))
@@ -23,60 +46,64 @@ def _get_required_codes_from_spec(section_cfgs: List[Dict]) -> set[tuple[str, st
             required_pairs.add((list_no, account_cd))
     return required_pairs
 
+TERM_ENDINGS = {"Q": ("03", "06", "09", "12"), "H": ("06", "12"), "Y": ("12",)}
+TERM_STEP_MONTHS = {"Q": 3, "H": 6, "Y": 12}
+
+def _month_ordinal(yyyymm: str) -> int:
+    return int(yyyymm[:4]) * 12 + int(yyyymm[4:6]) - 1
+
+def _ordinal_month(n: int) -> str:
+    return f"{n // 12:04d}{n % 12 + 1:02d}"
+
 def _generate_expected_months(start: str, end: str, term: str) -> set[str]:
     """Generates the set of YYYYMM strings expected for a given time range and term."""
-    freq_map = {"Q": "QS-DEC", "H": "6MS", "Y": "AS-DEC"}
-    if term not in freq_map: return set()
+    endings = TERM_ENDINGS.get(term)
+    if not endings: return set()
     try:
-        dates = pd.to_datetime(pd.date_range(start=f"{start[:4]}-{start[4:]}", end=f"{end[:4]}-{end[4:]}", freq=freq_map[term]))
-        if term == "Q": return {d.strftime('%Y%m') for d in (dates + pd.DateOffset(months=2))}
-        if term == "H": return {d.strftime('%Y%m') for d in (dates + pd.DateOffset(months=5))}
-        if term == "Y": return {d.strftime('%Y%m') for d in (dates + pd.DateOffset(months=11))}
-    except Exception:
+        lo, hi = _month_ordinal(start), _month_ordinal(end)
+    except (TypeError, ValueError):
         return set()
-    return set()
-
-
-
-
-def _perform_sanity_check(df: pd.DataFrame, required_finance_cds: set, required_list_nos: set, required_months: set, term: str) -> bool:
-    """Checks if the cached dataframe contains all required data points."""
-    if df.empty: return False
-
-    cached_finance_cds = set(_canon_fin_cd_series(df["finance_cd"]))
-    cached_list_nos = set(df["list_no"])
-    cached_months = set(df["base_month"].astype(str))
-
-    if not required_finance_cds.issubset(cached_finance_cds):
-        print(f"Cache check failed: Missing finance_cd(s): {required_finance_cds - cached_finance_cds}")
-        return False
-
-    if not required_list_nos.issubset(cached_list_nos):
-        print(f"Cache check failed: Missing list_no(s): {required_list_nos - cached_list_nos}")
-        return False
-
-
-    if term == "Q":
-        essential_endings = {"03", "06", "09", "12"}
-    elif term == "H":
-        essential_endings = {"06", "12"}
-    elif term == "Y":
-        essential_endings = {"12"}
-    else:
-        essential_endings = set() 
-
-    if essential_endings:
-        essential_months = {m for m in required_months if m[4:6] in essential_endings}
-    else:
-
-        essential_months = required_months
-
-    if not essential_months.issubset(cached_months):
-        print(f"Cache check failed: Missing essential base_month(s) for term '{term}': {sorted(essential_months - cached_months)}")
-        return False
-
-    print("Cache sanity check passed.")
-    return True
+    return {m for m in (_ordinal_month(n) for n in range(lo, hi + 1)) if m[4:6] in endings}
+
+def _month_runs(months: Iterable[str], term: str) -> List[Tuple[str, str]]:
+    """Collapses expected months into contiguous (start, end) windows, one API call each."""
+    step = TERM_STEP_MONTHS.get(term, 3)
+    runs: List[Tuple[str, str]] = []
+    for m in sorted(months):
+        if runs and _month_ordinal(m) - _month_ordinal(runs[-1][1]) == step:
+            runs[-1] = (runs[-1][0], m)
+        else:
+            runs.append((m, m))
+    return runs
+
+def _find_missing_cells(
+    df_cache: pd.DataFrame,
+    finance_cds: Iterable[str],
+    terms_by_list: Dict[str, str],
+    startBaseMm: str,
+    endBaseMm: str,
+) -> Tuple[List[Tuple[str, str, str, str, str]], int]:
+    """
+    Compares the cache against the requested grid and returns
+      (missing, reused)
+    missing: [(finance_cd, list_no, term, start_mm, end_mm), ...] windows still to fetch
+    reused : number of (finance_cd, list_no) cells fully served from cache
+    """
+    have: Dict[Tuple[str, str, str], set] = {}
+    if not df_cache.empty:
+        for (cd, ln, t), months in df_cache.groupby(["finance_cd", "list_no", "term"])["base_month"]:
+            have[(cd, ln, t)] = set(months)
+
+    expected_by_term = {t: _generate_expected_months(startBaseMm, endBaseMm, t) for t in set(terms_by_list.values())}
+    missing, reused = [], 0
+    for cd in finance_cds:
+        for ln, t in terms_by_list.items():
+            gap = expected_by_term[t] - have.get((cd, ln, t), set())
+            if not gap:
+                reused += 1
+                continue
+            missing.extend((cd, ln, t, s, e) for s, e in _month_runs(gap, t))
+    return missing, reused
 
 def _get_required_terms_per_list(section_cfgs: List[Dict], global_term: str) -> Dict[str, str]:
     """
@@ -119,15 +146,6 @@ def _get_required_terms_per_list(section_cfgs: List[Dict], global_term: str) ->
     return terms_by_list
 
 
-def _get_xml_root(url: str, params: dict, timeout: int = 15) -> ET.Element:
-    r = requests.get(url, params=params, timeout=timeout)
-    r.raise_for_status()
-    
-
-    decoded_content = r.content.decode('euc-kr')
-    
-    return ET.fromstring(decoded_content)
-
 def _as_list(x) -> List[str]:
     if x is None:
         return []
@@ -135,19 +153,143 @@ def _as_list(x) -> List[str]:
         return [str(v) for v in x]
     return [str(x)]
 
-def _to_num(s):
-    if s is None:
+_MASTER_COLUMNS = MASTER_COLUMNS
+_MASTER_SORT = ["list_no","account_cd","column_id","base_month"]
+_STREAM_CHUNK = 64 * 1024
+
+def _load_hier(hierarchy_json_path: str) -> Dict[str, dict]:
+    with open(hierarchy_json_path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def _list_request(task: FetchTask, HIER: Dict[str, dict], api_key: str) -> Tuple[dict, dict]:
+    """(query params, stream_rows kwargs) for one (financeCd, listNo, term) call."""
+    H = HIER.get(task.list_no, {})
+    params = {
+        "lang": "kr",
+        "auth": api_key,
+        "financeCd": task.finance_cd,
+        "listNo": task.list_no,
+        "term": task.term,
+        "startBaseMm": task.startBaseMm,
+        "endBaseMm": task.endBaseMm,
+    }
+    parse = dict(
+        list_no=task.list_no, finance_cd=task.finance_cd, term=task.term,
+        list_nm=H.get("list_nm", ""), acct_map=H.get("accounts", {}), col_map=H.get("columns", {}) or {},
+    )
+    return params, parse
+
+def _cached_list_rows(task: FetchTask, HIER: Dict[str, dict], api_key: str) -> Optional[MasterColumns]:
+    """Serves one call from the response cache; None on a miss (or when the cache is off)."""
+    rc = get_response_cache()
+    if rc is None:
         return None
-    s = str(s).strip()
-    if s == "":
+    params, parse = _list_request(task, HIER, api_key)
+    raw = rc.get(response_key(task.url, params))
+    if raw is None:
         return None
+    buf, _ = stream_rows((raw[i:i + _STREAM_CHUNK] for i in range(0, len(raw), _STREAM_CHUNK)), **parse)
+    return buf
+
+def _fetch_list_rows(task: FetchTask, HIER: Dict[str, dict], api_key: str) -> MasterColumns:
+    """One statisticsInfoSearch call -> columnar rows for a single (financeCd, listNo, term)."""
+    params, parse = _list_request(task, HIER, api_key)
+    if not any(parse["col_map"]):
+        return MasterColumns()
+
+    rc = get_response_cache()
+
+    def _consume(chunks) -> Tuple[MasterColumns, int]:
+        # called again from scratch if the body is cut short and the GET retried
+        rec = rc.recorder(response_key(task.url, params), params) if rc else None
+        meta: Dict[str, str] = {}
+        buf, rows_found = stream_rows(rec.wrap(chunks) if rec else chunks, meta=meta, **parse)
+        if rec and meta.get("err_cd", "000") == "000":
+            rec.commit()
+        return buf, rows_found
+
+    buf, rows_found = get_session().fetch(task.url, _consume, params=params, timeout=15, chunk_size=_STREAM_CHUNK)
+    print(f"Queried API for financeCd={task.finance_cd}, listNo={task.list_no}, term={task.term} -> Found {rows_found} rows.")
+    return buf
+
+def _rows_to_frame(parts: Iterable[MasterColumns]) -> pd.DataFrame:
+    df = MasterColumns.concat(parts).to_frame()
+    if not df.empty:
+        df = df.sort_values(_MASTER_SORT, kind="stable").reset_index(drop=True)
+    return df
+
+
+class _Progress:
+    """Thread-safe (done, total, rows) counter that forwards snapshots to a `progress(dict)` callback."""
+
+    def __init__(self, callback: Optional[Callable[[dict], None]], total: int = 0):
+        self.callback = callback
+        self.state = {"phase": "plan", "done": 0, "total": total, "rows": 0}
+        self._lock = threading.Lock()
+
+    def update(self, **kw) -> None:
+        with self._lock:
+            for k, v in kw.items():
+                self.state[k] = v
+            snap = dict(self.state)
+        if self.callback is not None:
+            self.callback(snap)
+
+    def task_done(self, rows: int) -> None:
+        with self._lock:
+            self.state["done"] += 1
+            self.state["rows"] += rows
+            snap = dict(self.state)
+        if self.callback is not None:
+            self.callback(snap)
+
+
+def _run_tasks(
+    tasks: List[FetchTask],
+    HIER: Dict[str, dict],
+    api_key: str,
+    engine: Optional[FetchEngine],
+    progress: Optional[_Progress] = None,
+    cancelled: Optional[Callable[[], bool]] = None,
+) -> List[MasterColumns]:
+    """
+    Results in task order. Cache hits are served inline; only misses go through the engine.
+    On cancellation FetchCancelled carries the finished results (None for the rest).
+    """
+    progress = progress or _Progress(None)
+    progress.update(phase="fetch", total=len(tasks))
+    results: List[Optional[MasterColumns]] = []
+    for t in tasks:
+        buf = _cached_list_rows(t, HIER, api_key)
+        results.append(buf)
+        if buf is not None:
+            progress.task_done(len(buf))
+    todo = [i for i, r in enumerate(results) if r is None]
+    if len(todo) < len(tasks):
+        print(f"[http-cache] {len(tasks) - len(todo)}/{len(tasks)} responses served from disk.")
+
     try:
-        return int(s)
-    except Exception:
-        try:
-            return float(s)
-        except Exception:
-            return None
+        fetched = (engine or FetchEngine()).run(
+            [tasks[i] for i in todo], lambda t: _fetch_list_rows(t, HIER, api_key),
+            on_done=lambda t, buf: progress.task_done(len(buf)), cancelled=cancelled,
+        )
+    except FetchCancelled as e:
+        for i, buf in zip(todo, e.results):
+            results[i] = buf
+        raise FetchCancelled(results)
+    for i, buf in zip(todo, fetched):
+        results[i] = buf
+
+    if todo:
+        st = session_stats()
+        print(f"[http] requests={st['requests']} retries={st['retries']} failures={st['failures']} "
+              f"avg={st['avg_s']*1000:.0f}ms max={st['max_s']*1000:.0f}ms bytes={st['bytes']:,} breaker={st['breaker']}")
+    rc = get_response_cache()
+    if rc:
+        cs = rc.stats()
+        print(f"[http-cache] hits={cs['hits']} misses={cs['misses']} hit_rate={cs['hit_rate']:.0%} "
+              f"entries={cs['entries']} volume={cs['volume_bytes']:,}B")
+    return results
 
 
 def build_master_dataframe(
@@ -158,83 +300,22 @@ def build_master_dataframe(
     listNo: Optional[Iterable[str]] = None,
     hierarchy_json_path: str = "fisis_hierarchy.json",
     api_key: str = API_KEY,
+    url: str = STATS_INFO_URL,
+    engine: Optional[FetchEngine] = None,
 ) -> pd.DataFrame:
     """
-    Fragile/light version:
-    - assumes UTF-8/valid XML from API
-    - no retries, no special encoding handling
-    - no dtype normalization beyond what's naturally parsed
+    One firm, every list of the hierarchy (or `listNo`), fetched directly: no
+    store or coverage lookups. The per-list calls run on `engine` (default: a
+    fresh FetchEngine) with the session's retries and the response cache.
+    Codes and names are str, value float64 (NaN where FISIS sent none).
     """
-
-    with open(hierarchy_json_path, "r", encoding="utf-8") as f:
-        HIER: Dict[str, dict] = json.load(f)
-
+    HIER = _load_hier(hierarchy_json_path)
 
     req_lists = _as_list(listNo)
     lists = sorted(HIER.keys()) if not req_lists else [ln for ln in req_lists if ln in HIER]
 
-    out_rows = []
-
-    for ln in lists:
-        H = HIER.get(ln, {})
-        list_nm = H.get("list_nm", "")
-        acct_map: Dict[str, str] = H.get("accounts", {}) or {}
-        col_map: Dict[str, str] = H.get("columns", {}) or {}
-
-        account_cds = sorted([c for c in acct_map.keys() if c])
-        column_ids = sorted([c for c in col_map.keys() if c])
-        if not column_ids:
-            continue
-
-        params = {
-            "lang": "kr",
-            "auth": api_key,
-            "financeCd": financeCd,
-            "listNo": ln,
-            "term": term,
-            "startBaseMm": startBaseMm,
-            "endBaseMm": endBaseMm,
-        }
-        print(f"Querying API for financeCd={financeCd}, listNo={ln}, term={term}...")
-        root = _get_xml_root(STATS_INFO_URL, params, timeout=15)
-        rows_found = root.findall(".//list/row")
-        print(f" -> Found {len(rows_found)} rows.")
-
-        for row in root.findall(".//list/row"):
-            base_month = (row.findtext("base_month") or "").strip()
-            row_fin_cd = (row.findtext("finance_cd") or "").strip()
-            a_cd = (row.findtext("account_cd") or "").strip()
-
-            if account_cds and a_cd and (a_cd not in account_cds):
-                continue
-
-            a_nm = acct_map.get(a_cd, (row.findtext("account_nm") or "").strip())
-
-            for col_id in column_ids:
-                raw_val = row.findtext(col_id)
-                val = _to_num(raw_val)
-                out_rows.append({
-                    "list_no": ln,
-                    "list_nm": list_nm,
-                    "finance_cd": row_fin_cd or financeCd,
-                    "term": term,
-                    "base_month": base_month,
-                    "account_cd": a_cd,
-                    "account_nm": a_nm,
-                    "column_id": col_id,                 
-                    "column_nm": col_map.get(col_id, ""),
-                    "value": val,
-                })
-
-    df = pd.DataFrame(out_rows, columns=[
-        "list_no","list_nm","finance_cd","term","base_month",
-        "account_cd","account_nm","column_id","column_nm","value"
-    ])
-
-    if not df.empty:
-
-        df = df.sort_values(["list_no","account_cd","column_id","base_month"], kind="stable").reset_index(drop=True)
-    return df
+    tasks = [FetchTask(str(financeCd), ln, term, startBaseMm, endBaseMm, url) for ln in lists]
+    return _rows_to_frame(_run_tasks(tasks, HIER, api_key, engine))
 
 def build_master_for_codes(
     financeCds: Iterable[str],
@@ -244,9 +325,14 @@ def build_master_for_codes(
     terms_by_list: Dict[str, str], 
     hierarchy_json_path: str,
     api_key: str = API_KEY,
+    url: str = STATS_INFO_URL,
+    engine: Optional[FetchEngine] = None,
 ) -> pd.DataFrame:
     """
     Builds a master dataframe by making term-specific API calls for each list.
+    The whole (term, finance_cd, list_no) grid is fetched concurrently on `engine`;
+    frames are merged in the same order as the old serial loop
+    (term -> finance_cd -> list_no/account_cd/column_id/base_month).
     """
 
     lists_by_term = {}
@@ -255,21 +341,28 @@ def build_master_for_codes(
             lists_by_term[term] = []
         lists_by_term[term].append(ln)
 
-    all_frames = []
+    HIER = _load_hier(hierarchy_json_path)
+    financeCds = [str(cd) for cd in (financeCds or [])]
 
+    tasks = []
     for term, list_nos in lists_by_term.items():
         print(f"Fetching {len(list_nos)} lists for term '{term}'...")
+        for cd in financeCds:
+            for ln in list_nos:
+                if ln in HIER:
+                    tasks.append(FetchTask(cd, ln, term, startBaseMm, endBaseMm, url))
+
+    results = _run_tasks(tasks, HIER, api_key, engine)
+
+    rows_by_cell: Dict[Tuple[str, str], List[MasterColumns]] = {}
+    for task, rows in zip(tasks, results):
+        rows_by_cell.setdefault((task.term, task.finance_cd), []).append(rows)
+
+    all_frames = []
+    for term in lists_by_term:
         frames_for_term = []
-        for cd in (financeCds or []):
-            df = build_master_dataframe(
-                financeCd=str(cd),
-                term=term,
-                startBaseMm=startBaseMm,
-                endBaseMm=endBaseMm,
-                listNo=list_nos,
-                hierarchy_json_path=hierarchy_json_path,
-                api_key=api_key,
-            )
+        for cd in financeCds:
+            df = _rows_to_frame(rows_by_cell.get((term, cd), []))
             if not df.empty:
                 frames_for_term.append(df)
 
@@ -279,6 +372,35 @@ def build_master_for_codes(
     return pd.concat(all_frames, ignore_index=True) if all_frames else pd.DataFrame()
 
 
+def _count_cached(plan: FetchPlan, HIER: Dict[str, dict], api_key: str) -> None:
+    rc = get_response_cache()
+    if rc is not None:
+        plan.cached = sum(rc.contains(response_key(t.url, _list_request(t, HIER, api_key)[0])) for t in plan.tasks)
+
+
+def _open_store(cache_path: Optional[str]) -> Optional[MasterStore]:
+    """The partitioned master store at `cache_path` (seeded once from the legacy master_df.csv)."""
+    return get_store(cache_path, legacy_csv=PATHS["cache_master_csv"]) if cache_path else None
+
+
+def probe_list(finance_cd: str, list_no: str, term: str, base_month: str, *,
+               hierarchy_json_path: str, api_key: str = API_KEY, url: str = STATS_INFO_URL) -> int:
+    """
+    Rows FISIS currently returns for one (firm, list, term, month).
+    Bypasses the response cache: used to detect newly published quarters.
+    """
+    task = FetchTask(str(finance_cd), list_no, term, base_month, base_month, url)
+    params, parse = _list_request(task, _load_hier(hierarchy_json_path), api_key)
+    buf, _ = get_session().fetch(url, lambda chunks: stream_rows(chunks, **parse), params=params, timeout=15,
+                                 chunk_size=_STREAM_CHUNK)
+    return len(buf)
+
+def latest_cached_month(cache_path: str, term: str) -> Optional[str]:
+    """Most recent base_month held in the master store for `term` (None if there is none)."""
+    store = _open_store(cache_path)
+    return store.latest_month(term) if store else None
+
+
 def load_or_build_master_for_market(
     financeCds: Iterable[str],
     *,
@@ -288,56 +410,154 @@ def load_or_build_master_for_market(
     listNo: list,
     section_cfgs: list,
     hierarchy_json_path: str,
-    cache_path: str = "_local/master_df.csv",
+    cache_path: Optional[str] = PATHS["master_store"],
     api_key: str = API_KEY,
+    url: str = STATS_INFO_URL,
+    engine: Optional[FetchEngine] = None,
+    report: Optional[dict] = None,
+    terms_map_csv: Optional[str] = PATHS["terms_map_csv"],
+    dry_run: bool = False,
+    progress: Optional[Callable[[dict], None]] = None,
+    cancelled: Optional[Callable[[], bool]] = None,
 ) -> pd.DataFrame:
-    """Loads data from cache if it's valid, otherwise builds from API and saves."""
+    """
+    Loads the requested scope from the partitioned master store at `cache_path`
+    and fetches only the missing (finance_cd, list_no, term, month-window)
+    cells, then writes them back into their partitions. Returns the rows of
+    the requested scope.
+    Missing cells come from the store's coverage manifest; settled periods a
+    firm has no data for are recorded there too, so they are not refetched.
+    A request contained in a scope loaded earlier in this process (firms,
+    period and lists subsets, term derivable) is answered from memory.
+    H/Y of stock-like lists that publish Q are read from the Q partitions and
+    derived locally (term_derivation.py) instead of being fetched per term.
+    The missing cells go through the fetch planner (unsupported terms dropped,
+    windows merged, `listNo` lists first). dry_run=True prints the plan and its
+    estimated wall time and returns an empty frame without any HTTP call.
+    If `report` is given it is filled with reused/fetched counts.
+    progress(dict) receives {phase, done, total, rows} snapshots while fetching;
+    once cancelled() is true the finished requests are still written to the
+    store and FetchCancelled is raised.
+    The shared cache lock is held for the coverage read and for the store
+    merge and read, not while fetching, so concurrent runs (the warmer, other
+    sessions) do not queue behind each other's network time.
+    """
 
     terms_by_list = _get_required_terms_per_list(section_cfgs, global_term=term)
-    required_list_nos = set(terms_by_list.keys()).union(set(listNo))
-
-
-    required_months = set()
-    for t in set(terms_by_list.values()):
-        required_months.update(_generate_expected_months(startBaseMm, endBaseMm, t))
-
-    required_finance_cds = {str(cd) for cd in (financeCds or [])}
-
-
-    if cache_path and os.path.exists(cache_path):
-        try:
-            df_cache = pd.read_csv(cache_path)
-
-            if _perform_sanity_check(df_cache, required_finance_cds, required_list_nos, required_months, term=term):
-                return df_cache
-            else:
-                print("Cache is stale or incomplete. Rebuilding...")
-        except Exception as e:
-            print(f"Could not read cache file. Rebuilding... Error: {e}")
-
-
-    print("Building master dataframe from API...")
-    if not financeCds:
+    for ln in listNo:
+        terms_by_list.setdefault(ln, term)
+    supported = load_supported_terms(terms_map_csv)
+    fetch_by_list, dropped = split_supported(fetch_terms(terms_by_list, supported), supported)
+    terms_by_list = {ln: terms_by_list[ln] for ln in fetch_by_list}
+    derived = sorted(ln for ln in terms_by_list if fetch_by_list[ln] != terms_by_list[ln])
+    if derived:
+        print(f"[terms] {len(derived)} list(s) derived from Q rows: {', '.join(derived)}")
+
+    required_finance_cds = [str(cd) for cd in (financeCds or [])]
+    if not required_finance_cds:
         return pd.DataFrame()
 
-    df_new = build_master_for_codes(
-        financeCds,
-        startBaseMm=startBaseMm,
-        endBaseMm=endBaseMm,
-        terms_by_list=terms_by_list, 
-        hierarchy_json_path=hierarchy_json_path,
-        api_key=api_key,
-    )
-
-    if cache_path and not df_new.empty:
+    store = _open_store(cache_path)
+    due_end = min(endBaseMm, _dt.date.today().strftime("%Y%m"))  # periods that have not ended cannot be published
+    scope = normalize_scope(required_finance_cds, terms_by_list, startBaseMm, endBaseMm)
+    stored_scope = normalize_scope(required_finance_cds, fetch_by_list, startBaseMm, endBaseMm)
+    memo = get_scope_memo(store) if store is not None else None
+    # the warmer and interactive runs share the store: the lock covers the coverage read and
+    # the store merge / read, never the fetch, so a run waits at most for another's write
+    with _MASTER_LOCK:
+        if memo is not None and not dry_run:
+            def _nothing_due(entry_scope: dict) -> bool:
+                have = {ln: entry_scope["terms_by_list"][ln] for ln in terms_by_list}
+                return not store.coverage.missing(required_finance_cds, have, startBaseMm, due_end,
+                                                  fetched=fetch_terms(have, supported))[0]
+
+            hit = memo.lookup(scope, accept=_nothing_due, stored_scope=stored_scope)
+            if hit is not None:
+                df_view, key = hit
+                store.scopes.bump(key)
+                print(f"[memo] {len(df_view):,} rows served from a loaded scope in memory.")
+                if report is not None:
+                    n = len(required_finance_cds) * len(terms_by_list)
+                    report.update({"cells_total": n, "cells_reused": n, "windows_fetched": 0,
+                                   "rows_reused": len(df_view), "rows_fetched": 0, "memory": True})
+                _Progress(progress).update(phase="done")
+                return df_view
+
+        if store is not None:
+            missing, reused = store.coverage.missing(required_finance_cds, terms_by_list, startBaseMm, due_end,
+                                                     fetched=fetch_by_list)
+        else:
+            missing, reused = _find_missing_cells(pd.DataFrame(columns=["finance_cd", "list_no", "term", "base_month"]),
+                                                  required_finance_cds, fetch_by_list, startBaseMm, due_end)
+    total_cells = len(required_finance_cds) * len(terms_by_list)
+    print(f"[cache] reused {reused}/{total_cells} (finance_cd, list_no) cells; {len(missing)} window(s) to fetch.")
+
+    HIER = _load_hier(hierarchy_json_path) if missing else {}
+    plan = plan_requests(missing, url=url, priority_lists=listNo, known_lists=HIER.keys(), dropped=dropped)
+    if dry_run:
+        _count_cached(plan, HIER, api_key)
+        st = session_stats()
+        latency = st["avg_s"] if st["attempts"] else None
+        print(plan.summary(latency_s=latency))
+        if report is not None:
+            report.update({"cells_total": total_cells, "cells_reused": reused, "windows_fetched": 0,
+                           "requests_planned": len(plan), "estimate_s": plan.estimate_s(latency)})
+        return pd.DataFrame(columns=_MASTER_COLUMNS)
+    for ln, t, why in dropped:
+        print(f"[plan] dropped {ln}/{t}: {why}")
+
+    tracker = _Progress(progress, total=len(plan))
+    df_new = pd.DataFrame(columns=_MASTER_COLUMNS)
+    interrupted: Optional[FetchCancelled] = None
+    results: List[Optional[MasterColumns]] = []
+    if plan.tasks:
         try:
-            os.makedirs(os.path.dirname(cache_path), exist_ok=True)
-            df_new.to_csv(cache_path, index=False, encoding="utf-8-sig")
-            print(f"Successfully saved new cache to {cache_path}")
-        except Exception as e:
-            print(f"Error saving new cache file: {e}")
-
-    return df_new
+            results = _run_tasks(plan.tasks, HIER, api_key, engine, tracker, cancelled)
+        except FetchCancelled as e:
+            interrupted, results = e, e.results
+            print(f"[cache] cancelled; keeping {sum(r is not None for r in results)}/{len(plan)} finished request(s).")
+        tracker.update(phase="merge")
+        df_new = _rows_to_frame(r for r in results if r is not None)
+
+    with _MASTER_LOCK:
+        if plan.tasks and store is not None:
+            settled = recent_cutoff_month()
+            published = {t.term: store.coverage.latest_month(t.term) for t in plan.tasks}
+            for term, months in df_new.groupby("term")["base_month"]:
+                published[term] = max(filter(None, (published.get(term), months.max())))
+            for t, r in zip(plan.tasks, results):
+                if r is not None:
+                    store.coverage.mark_fetched(t.finance_cd, t.list_no, t.term, t.startBaseMm, t.endBaseMm,
+                                                settled, published[t.term])
+            try:
+                n = store.write(df_new)  # merges: rows another run wrote meanwhile are kept
+                if n:
+                    print(f"[store] wrote {len(df_new):,} rows into {n} partition(s) under {store.root}")
+                else:
+                    store.coverage.save()
+            except Exception as e:
+                print(f"Error writing master store: {e}")
+        if interrupted is not None:
+            raise interrupted
+
+        if store is not None:
+            df_scope = store.read(fetch_by_list, required_finance_cds, startBaseMm, endBaseMm)
+        else:
+            df_scope = df_new
+        df_scope = derive_rows(df_scope, terms_by_list, fetch_by_list)
+        df_scope = df_scope.sort_values(["term", "finance_cd"] + _MASTER_SORT, kind="stable").reset_index(drop=True)
+        if store is not None:
+            key = store.scopes.touch(stored_scope)
+            store.scopes.evict(store, keep=key)
+            memo.add(scope, df_scope, stored_scope=stored_scope)
+            df_scope = df_scope.copy(deep=False)  # callers may reassign columns; the memo keeps its own frame
+
+    print(f"[cache] scope rows: {len(df_scope) - len(df_new):,} reused, {len(df_new):,} fetched.")
+    if report is not None:
+        report.update({"cells_total": total_cells, "cells_reused": reused, "windows_fetched": len(plan),
+                       "rows_reused": len(df_scope) - len(df_new), "rows_fetched": len(df_new)})
+    tracker.update(phase="done")
+    return df_scope
 
 
 if __name__ == "__main__":
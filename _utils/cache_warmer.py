@@ -0,0 +1,145 @@
+# cache_warmer.py
+"""
+Background cache warmer, built by create_app and started by start_warmer()
+in the serving process only (not in the Werkzeug reloader's watcher), at most
+once per process.
+
+- warm-up: loads the default scope (market, period, section lists) into the
+  master cache right after startup, so the first "조회하기" is a cache read
+- refresh: every `interval_s` probes FISIS for the quarter after the newest
+  one in the cache; once it is published, that quarter is appended for the
+  whole default market (gap fill, nothing already cached is refetched)
+
+Everything goes through load_or_build_master_for_market, so it shares the
+cache lock, the planner and the response cache with interactive runs.
+`url` can point at a local stand-in for tests.
+"""
+
+from __future__ import annotations
+import datetime as _dt
+import os
+import threading
+import time
+import traceback
+from typing import Dict, List, Optional
+
+from settings import WARMER
+from _utils.build_master import (STATS_INFO_URL, TERM_ENDINGS, _month_ordinal, _ordinal_month,
+                                 latest_cached_month, load_or_build_master_for_market, probe_list)
+
+
+def next_period_month(yyyymm: str, term: str) -> str:
+    """First reporting month of `term` strictly after `yyyymm`."""
+    endings = TERM_ENDINGS.get(term, TERM_ENDINGS["Q"])
+    n = _month_ordinal(yyyymm) + 1
+    while _ordinal_month(n)[4:6] not in endings:
+        n += 1
+    return _ordinal_month(n)
+
+
+class CacheWarmer(threading.Thread):
+    def __init__(
+        self,
+        finance_cds: List[str],
+        *,
+        term: str,
+        startBaseMm: str,
+        endBaseMm: str,
+        list_nos: List[str],
+        section_cfgs: list,
+        hierarchy_json_path: str,
+        cache_path: str,
+        probe_finance_cd: str,
+        probe_list_no: str = WARMER["probe_list_no"],
+        interval_s: float = WARMER["interval_s"],
+        start_delay_s: float = WARMER["start_delay_s"],
+        url: str = STATS_INFO_URL,
+    ):
+        super().__init__(name="fisis-cache-warmer", daemon=True)
+        self.finance_cds = list(finance_cds)
+        self.term, self.startBaseMm, self.endBaseMm = term, startBaseMm, endBaseMm
+        self.list_nos, self.section_cfgs = list(list_nos), section_cfgs
+        self.hierarchy_json_path, self.cache_path = hierarchy_json_path, cache_path
+        self.probe_finance_cd, self.probe_list_no = probe_finance_cd, probe_list_no
+        self.interval_s, self.start_delay_s, self.url = float(interval_s), float(start_delay_s), url
+        self._stop_event = threading.Event()
+        self.status: Dict[str, object] = {"state": "idle", "warmed": False, "last_probe": None,
+                                          "latest_month": None, "quarters_added": 0, "error": None}
+
+    def stop(self) -> None:
+        self._stop_event.set()
+
+    def _load(self, start: str, end: str) -> None:
+        load_or_build_master_for_market(
+            self.finance_cds, term=self.term, startBaseMm=start, endBaseMm=end,
+            listNo=self.list_nos, section_cfgs=self.section_cfgs,
+            hierarchy_json_path=self.hierarchy_json_path, cache_path=self.cache_path, url=self.url,
+        )
+
+    def warm(self) -> None:
+        self.status["state"] = "warming"
+        t0 = time.perf_counter()
+        self._load(self.startBaseMm, self.endBaseMm)
+        self.status["warmed"] = True
+        print(f"[warm] default scope ready in {time.perf_counter() - t0:.1f}s "
+              f"({len(self.finance_cds)} firms, {self.startBaseMm}-{self.endBaseMm}, term={self.term})")
+
+    def refresh(self, today: Optional[_dt.date] = None) -> int:
+        """Appends every newly published period after the newest cached one. Returns how many were added."""
+        self.status["state"] = "probing"
+        this_month = (today or _dt.date.today()).strftime("%Y%m")
+        latest = latest_cached_month(self.cache_path, self.term) or self.endBaseMm
+        published: List[str] = []
+        candidate = next_period_month(latest, self.term)
+        while candidate <= this_month:
+            n = probe_list(self.probe_finance_cd, self.probe_list_no, self.term, candidate,
+                           hierarchy_json_path=self.hierarchy_json_path, url=self.url)
+            self.status["last_probe"] = (candidate, n)
+            if n == 0:
+                break
+            published.append(candidate)
+            candidate = next_period_month(candidate, self.term)
+
+        added = len(published)
+        if published:
+            print(f"[warm] {published[0]}-{published[-1]} published; appending for the default market.")
+            self._load(published[0], published[-1])
+            latest = published[-1]
+        self.status["latest_month"] = latest
+        self.status["quarters_added"] = int(self.status["quarters_added"]) + added
+        self.status["state"] = "idle"
+        return added
+
+    def run(self) -> None:
+        if self._stop_event.wait(self.start_delay_s):
+            return
+        while not self._stop_event.is_set():
+            try:
+                if not self.status["warmed"]:
+                    self.warm()
+                self.refresh()
+                self.status["error"] = None
+            except Exception as e:  # keep the thread alive; next round retries
+                self.status["error"] = repr(e)
+                print(f"[warm] failed: {e!r}")
+                traceback.print_exc()
+            self.status["state"] = "idle"
+            if self._stop_event.wait(self.interval_s):
+                return
+
+
+_RUNNING: Optional[CacheWarmer] = None
+_RUNNING_LOCK = threading.Lock()
+
+def serving_process(use_reloader: bool) -> bool:
+    """False in the Werkzeug reloader's watcher process, which only restarts the server and never serves."""
+    return not use_reloader or os.environ.get("WERKZEUG_RUN_MAIN") == "true"
+
+def start_warmer(warmer: CacheWarmer) -> CacheWarmer:
+    """Starts `warmer` unless one is already running in this process; returns the running one."""
+    global _RUNNING
+    with _RUNNING_LOCK:
+        if _RUNNING is None or (not _RUNNING.is_alive() and warmer is not _RUNNING):
+            warmer.start()
+            _RUNNING = warmer
+        return _RUNNING
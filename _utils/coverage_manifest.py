@@ -0,0 +1,218 @@
+# coverage_manifest.py
+"""
+Coverage sidecar of the master store (<store root>/_coverage.json).
+
+One bitmap per (term, list_no, finance_cd) cell: bit i is set once period i of
+that term (counted from ORIGIN_YEAR) is known -- either rows for it are in the
+store, or FISIS was asked and had nothing for a period that is already settled
+(older than the recent quarters response_cache.recent_cutoff_month holds back,
+and already published: some firm has rows for it or a later period). Each cell
+also keeps the time of its last fetch.
+
+"Which cells of this request are missing?" is then integer arithmetic on the
+bitmaps, without opening any partition. The file records its own version and
+the store's schema version / format; when either does not match, the manifest
+is rebuilt once from the key columns of the store.
+"""
+
+from __future__ import annotations
+import json
+import os
+import threading
+import time
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import pandas as pd
+
+MANIFEST_NAME = "_coverage.json"
+MANIFEST_VERSION = 1
+ORIGIN_YEAR = 1980
+TERM_ENDINGS = {"Q": ("03", "06", "09", "12"), "H": ("06", "12"), "Y": ("12",)}
+
+Cell = Tuple[str, str, str, str, str]  # (finance_cd, list_no, term, start_mm, end_mm)
+
+
+def period_index(yyyymm: str, term: str) -> Optional[int]:
+    """Bit position of a reporting month; None if it is not a `term` month or predates ORIGIN_YEAR."""
+    endings = TERM_ENDINGS.get(term)
+    if not endings or yyyymm[4:6] not in endings:
+        return None
+    year = int(yyyymm[:4])
+    if year < ORIGIN_YEAR:
+        return None
+    return (year - ORIGIN_YEAR) * len(endings) + endings.index(yyyymm[4:6])
+
+def period_month(idx: int, term: str) -> str:
+    endings = TERM_ENDINGS[term]
+    return f"{ORIGIN_YEAR + idx // len(endings):04d}{endings[idx % len(endings)]}"
+
+@lru_cache(maxsize=1024)
+def window_mask(startBaseMm: str, endBaseMm: str, term: str) -> int:
+    """Bits of every `term` period within [startBaseMm, endBaseMm]."""
+    endings = TERM_ENDINGS.get(term)
+    if not endings:
+        return 0
+    n = len(endings)
+    y0, y1 = max(int(startBaseMm[:4]), ORIGIN_YEAR), int(endBaseMm[:4])
+    lo = (y0 - ORIGIN_YEAR) * n + (sum(e < startBaseMm[4:6] for e in endings) if y0 == int(startBaseMm[:4]) else 0)
+    hi = (y1 - ORIGIN_YEAR) * n + sum(e <= endBaseMm[4:6] for e in endings) - 1
+    return ((1 << (hi - lo + 1)) - 1) << lo if hi >= lo else 0
+
+@lru_cache(maxsize=1024)
+def derived_mask(startBaseMm: str, endBaseMm: str, source: str, term: str) -> int:
+    """Bits (in `source` periods) of the `term` months within the window, e.g. the 12 quarters for Y from Q."""
+    wanted = set(TERM_ENDINGS.get(term, ()))
+    mask = window_mask(startBaseMm, endBaseMm, source)
+    out, i = 0, 0
+    while mask >> i:
+        if (mask >> i) & 1 and period_month(i, source)[4:6] in wanted:
+            out |= 1 << i
+        i += 1
+    return out
+
+def mask_runs(mask: int, term: str) -> List[Tuple[str, str]]:
+    """Contiguous runs of set bits as (start_mm, end_mm) windows."""
+    runs = []
+    while mask:
+        lo = (mask & -mask).bit_length() - 1
+        shifted = mask >> lo
+        length = (~shifted & (shifted + 1)).bit_length() - 1
+        runs.append((period_month(lo, term), period_month(lo + length - 1, term)))
+        mask &= ~(((1 << length) - 1) << lo)
+    return runs
+
+
+class CoverageManifest:
+    def __init__(self, root: str, store_schema: int, store_format: str):
+        self.path = os.path.join(root, MANIFEST_NAME)
+        self.store_schema, self.store_format = store_schema, store_format
+        self._cells: Dict[Tuple[str, str, str], List] = {}  # (term, list_no, finance_cd) -> [mask, fetched_at]
+        self._lock = threading.RLock()
+        self.valid = self._load()
+
+    # ---------- persistence ----------
+    def _load(self) -> bool:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                doc = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if (doc.get("version"), doc.get("store_schema"), doc.get("store_format"), doc.get("origin_year")) != \
+                (MANIFEST_VERSION, self.store_schema, self.store_format, ORIGIN_YEAR):
+            return False
+        for term, by_list in doc.get("cells", {}).items():
+            for ln, by_cd in by_list.items():
+                for cd, (mask, ts) in by_cd.items():
+                    self._cells[(term, ln, cd)] = [int(mask, 16), ts]
+        return True
+
+    def save(self) -> None:
+        with self._lock:
+            nested: Dict[str, Dict[str, Dict[str, list]]] = {}
+            for (term, ln, cd), (mask, ts) in sorted(self._cells.items()):
+                nested.setdefault(term, {}).setdefault(ln, {})[cd] = [format(mask, "x"), ts]
+            doc = {"version": MANIFEST_VERSION, "store_schema": self.store_schema, "store_format": self.store_format,
+                   "origin_year": ORIGIN_YEAR, "updated": int(time.time()), "cells": nested}
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp = f"{self.path}.tmp{threading.get_ident()}"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(doc, f, separators=(",", ":"))
+            os.replace(tmp, self.path)
+            self.valid = True
+
+    def rebuild(self, keys: pd.DataFrame) -> None:
+        """Recomputes every bitmap from the store's key columns (term, list_no, finance_cd, base_month)."""
+        with self._lock:
+            self._cells.clear()
+            self.add_rows(keys)
+        print(f"[coverage] rebuilt manifest from {len(keys):,} stored rows ({len(self._cells)} cells).")
+
+    # ---------- updates ----------
+    def add_rows(self, df: pd.DataFrame, fetched_at: Optional[int] = None) -> None:
+        """Sets the bits of every (term, list_no, finance_cd, base_month) present in `df`."""
+        if df is None or df.empty:
+            return
+        keys = df[["term", "list_no", "finance_cd", "base_month"]].drop_duplicates()
+        with self._lock:
+            for (term, ln, cd), months in keys.groupby(["term", "list_no", "finance_cd"], sort=False)["base_month"]:
+                bits = 0
+                for m in months:
+                    i = period_index(m, term)
+                    if i is not None:
+                        bits |= 1 << i
+                entry = self._cells.setdefault((term, ln, cd), [0, None])
+                entry[0] |= bits
+                if fetched_at is not None:
+                    entry[1] = fetched_at
+
+    def mark_fetched(self, finance_cd: str, list_no: str, term: str, startBaseMm: str, endBaseMm: str,
+                     settled_before: str, published_through: Optional[str] = None,
+                     fetched_at: Optional[int] = None) -> None:
+        """
+        Records a completed call: periods of the window older than `settled_before`
+        and not after `published_through` (the newest `term` month any firm has
+        rows for) count as known even when FISIS returned nothing for them (closed
+        firms, lists a firm does not file). Without `published_through` no empty
+        period is settled. Periods that did return rows are set by add_rows.
+        """
+        end = min(endBaseMm, _month_before(settled_before), published_through or "")
+        bits = window_mask(startBaseMm, end, term) if end >= startBaseMm else 0
+        with self._lock:
+            entry = self._cells.setdefault((term, list_no, finance_cd), [0, None])
+            entry[0] |= bits
+            entry[1] = int(time.time()) if fetched_at is None else fetched_at
+
+    def forget(self, term: str, list_no: str, finance_cd: str) -> None:
+        with self._lock:
+            self._cells.pop((term, list_no, finance_cd), None)
+
+    # ---------- queries ----------
+    def missing(
+        self,
+        finance_cds: Iterable[str],
+        terms_by_list: Dict[str, str],
+        startBaseMm: str,
+        endBaseMm: str,
+        fetched: Optional[Dict[str, str]] = None,
+    ) -> Tuple[List[Cell], int]:
+        """
+        Same contract as build_master._find_missing_cells: (missing windows, fully covered cells).
+        `fetched` maps lists whose requested term is derived to the term actually stored
+        (term_derivation.fetch_terms); their gaps become one window in that term.
+        """
+        fetched = fetched or {}
+        plan = {}
+        for ln, t in terms_by_list.items():
+            src = fetched.get(ln, t)
+            want = window_mask(startBaseMm, endBaseMm, t) if src == t else derived_mask(startBaseMm, endBaseMm, src, t)
+            plan[ln] = (src, want)
+        missing: List[Cell] = []
+        reused = 0
+        with self._lock:
+            for cd in finance_cds:
+                for ln, (src, want) in plan.items():
+                    entry = self._cells.get((src, ln, cd))
+                    gap = want & ~entry[0] if entry else want
+                    if not gap:
+                        reused += 1
+                        continue
+                    runs = mask_runs(gap, src)
+                    if src != terms_by_list[ln]:
+                        runs = [(runs[0][0], runs[-1][1])]  # derived periods are spread out: one call covers them
+                    missing.extend((cd, ln, src, s, e) for s, e in runs)
+        return missing, reused
+
+    def latest_month(self, term: str) -> Optional[str]:
+        with self._lock:
+            top = max((e[0].bit_length() for (t, _, _), e in self._cells.items() if t == term and e[0]), default=0)
+        return period_month(top - 1, term) if top else None
+
+    def fetched_at(self, finance_cd: str, list_no: str, term: str) -> Optional[int]:
+        entry = self._cells.get((term, list_no, finance_cd))
+        return entry[1] if entry else None
+
+
+def _month_before(yyyymm: str) -> str:
+    n = int(yyyymm[:4]) * 12 + int(yyyymm[4:6]) - 2
+    return f"{n // 12:04d}{n % 12 + 1:02d}"
@@ -0,0 +1,194 @@
+# datasets.py
+"""
+Server-side registry for the loaded master frames.
+
+ft-store-master holds a small token, {"session", "run", "rows"}, instead of
+the frame as records; callbacks resolve the token with get_dataset().
+
+- a session is one browser tab: it gets an id on its first 조회하기 and
+  carries it in the token from then on
+- each session keeps its last DATASETS["per_session"] runs (a new run
+  supersedes older ones), sessions are dropped least-recently-used beyond
+  DATASETS["max_sessions"] or when idle for DATASETS["idle_s"]
+- the runs together stay under DATASETS["size_limit_mb"] (frame plus cube
+  bytes, estimated once in put()): superseded runs go first, then the newest
+  run of the least-recently-used sessions; the run just put is always kept
+- put() materializes the frame once, typed for the callbacks (materialize()),
+  normalizes it (normalize(): a fact frame of codes, term and float value, the
+  names in a MasterDims) and indexes it (IndexedMaster); get() hands out
+  shallow copies of that shared fact frame, get_indexed() the index itself
+  (names via .dims), so a callback costs a dict lookup instead of a rebuild
+- with DATASETS["cube"] on, put() also builds a MasterCube (dense array form)
+  and get_aggregable() hands that to the aggregation-only callbacks
+- the registry lives in the app process, next to the job worker that fills it;
+  a token from before a restart resolves to None and the callbacks wait for
+  the next run
+"""
+
+from __future__ import annotations
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+import pandas as pd
+
+from settings import DATASETS
+from _helpers.filter import _canon_fin_cd_series
+from _helpers.master_cube import MasterCube
+from _helpers.master_dims import MasterDims
+from _helpers.master_index import IndexedMaster, sort_for_index
+
+# label columns: few distinct values repeated on every row, only ever read
+_CATEGORY_COLUMNS = ("list_nm", "account_nm", "column_nm", "term")
+_TEXT_COLUMNS = ("list_no", "finance_cd", "base_month", "account_cd", "column_id")
+
+
+def materialize(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    The frame the callbacks read: canonical 7-digit finance_cd, str codes and
+    base_month, float value, and the label columns as categoricals. Codes stay
+    plain strings because the plots group on them. Rows come out in index order
+    (firm, list, column, account, month), so IndexedMaster shares them as is.
+    """
+    out = df.copy(deep=False)
+    if "finance_cd" in out:
+        out["finance_cd"] = _canon_fin_cd_series(out["finance_cd"])
+    for c in _TEXT_COLUMNS:
+        if c in out and c != "finance_cd":
+            out[c] = out[c].astype(str)
+    if "value" in out:
+        out["value"] = pd.to_numeric(out["value"], errors="coerce").astype("float64")
+    for c in _CATEGORY_COLUMNS:
+        if c in out and not isinstance(out[c].dtype, pd.CategoricalDtype):
+            out[c] = out[c].astype("category")
+    return sort_for_index(out.reset_index(drop=True))
+
+def normalize(df: pd.DataFrame) -> Tuple[pd.DataFrame, MasterDims]:
+    """materialize(), then the name columns split off: (fact frame, MasterDims)."""
+    return MasterDims.split(materialize(df))
+
+
+class DatasetRegistry:
+    def __init__(self, per_session: int = DATASETS["per_session"], max_sessions: int = DATASETS["max_sessions"],
+                 idle_s: float = DATASETS["idle_s"], cube: bool = DATASETS["cube"],
+                 size_limit_mb: float = DATASETS["size_limit_mb"]):
+        self.per_session = max(1, int(per_session))
+        self.max_sessions = max(1, int(max_sessions))
+        self.idle_s = float(idle_s)
+        self.cube = bool(cube)
+        self.size_limit = int(size_limit_mb * 1024 * 1024)
+        # session -> run -> (index, cube or None, estimated bytes)
+        self._sessions: "OrderedDict[str, OrderedDict[str, Tuple[IndexedMaster, Optional[MasterCube], int]]]" = OrderedDict()
+        self._seen: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def put(self, df: pd.DataFrame, session: Optional[str] = None) -> dict:
+        """Registers `df` (materialized and indexed here) as the session's newest run and returns its token."""
+        session = session or uuid.uuid4().hex
+        df, dims = normalize(df)
+        ix, cube = IndexedMaster.build(df, dims), (MasterCube.build(df, dims) if self.cube else None)
+        entry = (ix, cube, int(ix.frame.memory_usage(index=True, deep=True).sum()) + (cube.nbytes if cube is not None else 0))
+        run = uuid.uuid4().hex[:12]
+        with self._lock:
+            runs = self._sessions.pop(session, None) or OrderedDict()
+            runs[run] = entry
+            while len(runs) > self.per_session:
+                runs.popitem(last=False)
+            self._sessions[session] = runs
+            self._seen[session] = time.time()
+            self._expire()
+            self._fit(session, run)
+        return {"session": session, "run": run, "rows": int(len(df))}
+
+    def _entry(self, token: Optional[dict]):
+        if not token or not isinstance(token, dict):
+            return None
+        with self._lock:
+            runs = self._sessions.get(token.get("session"))
+            entry = runs.get(token.get("run")) if runs is not None else None
+            if entry is None:
+                return None
+            self._sessions.move_to_end(token["session"])
+            self._seen[token["session"]] = time.time()
+        return entry
+
+    def get_indexed(self, token: Optional[dict]) -> Optional[IndexedMaster]:
+        """The IndexedMaster behind `token` (shared: read only), or None."""
+        entry = self._entry(token)
+        return entry[0] if entry is not None else None
+
+    def get_aggregable(self, token: Optional[dict]):
+        """The run's MasterCube if one was built, else its IndexedMaster (or None)."""
+        entry = self._entry(token)
+        if entry is None:
+            return None
+        return entry[1] if entry[1] is not None else entry[0]
+
+    def get(self, token: Optional[dict]) -> Optional[pd.DataFrame]:
+        """The fact frame behind `token` (a shallow copy: callers may add columns), or None."""
+        ix = self.get_indexed(token)
+        return ix.frame.copy(deep=False) if ix is not None else None
+
+    def drop(self, session: str) -> None:
+        with self._lock:
+            self._sessions.pop(session, None)
+            self._seen.pop(session, None)
+
+    def _expire(self) -> None:
+        cutoff = time.time() - self.idle_s if self.idle_s > 0 else None
+        for s in [s for s, t in self._seen.items() if cutoff is not None and t < cutoff]:
+            self._sessions.pop(s, None)
+            self._seen.pop(s, None)
+        while len(self._sessions) > self.max_sessions:
+            s, _ = self._sessions.popitem(last=False)
+            self._seen.pop(s, None)
+
+    def _fit(self, session: str, run: str) -> None:
+        """Evicts runs until the registry fits size_limit (0 = unbounded), keeping `run`."""
+        total = sum(e[2] for r in self._sessions.values() for e in r.values())
+        if not self.size_limit or total <= self.size_limit:
+            return
+        superseded = [(s, k) for s, r in self._sessions.items() for k in list(r)[:-1]]
+        newest = [(s, next(reversed(r))) for s, r in self._sessions.items() if r]
+        for s, k in superseded + newest:
+            if total <= self.size_limit:
+                break
+            if (s, k) == (session, run):
+                continue
+            runs = self._sessions[s]
+            total -= runs.pop(k)[2]
+            if not runs:
+                del self._sessions[s]
+                self._seen.pop(s, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"sessions": len(self._sessions), "runs": sum(len(r) for r in self._sessions.values()),
+                    "rows": sum(len(ix) for r in self._sessions.values() for ix, _, _ in r.values()),
+                    "bytes": sum(n for r in self._sessions.values() for _, _, n in r.values()),
+                    "cube_bytes": sum(c.nbytes for r in self._sessions.values() for _, c, _ in r.values() if c is not None)}
+
+
+_REGISTRY: Optional[DatasetRegistry] = None
+_REGISTRY_LOCK = threading.Lock()
+
+def get_registry() -> DatasetRegistry:
+    global _REGISTRY
+    with _REGISTRY_LOCK:
+        if _REGISTRY is None:
+            _REGISTRY = DatasetRegistry()
+        return _REGISTRY
+
+def put_dataset(df: pd.DataFrame, session: Optional[str] = None) -> dict:
+    return get_registry().put(df, session)
+
+def get_dataset(token: Optional[dict]) -> Optional[pd.DataFrame]:
+    return get_registry().get(token)
+
+def get_indexed(token: Optional[dict]) -> Optional[IndexedMaster]:
+    return get_registry().get_indexed(token)
+
+def get_aggregable(token: Optional[dict]):
+    return get_registry().get_aggregable(token)
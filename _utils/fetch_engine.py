@@ -0,0 +1,159 @@
+# fetch_engine.py
+"""
+Bounded worker-pool fetch engine for FISIS calls.
+
+- FetchTask: one (finance_cd, list_no, term, window) API call
+- TokenBucket: shared rate limiter (requests / second, with burst)
+- FetchEngine: thread pool with a per-host concurrency cap
+
+Results are returned in task order, so callers can merge deterministically
+no matter which call finishes first.
+"""
+
+from __future__ import annotations
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_EXCEPTION, wait
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Sequence, TypeVar
+from urllib.parse import urlparse
+
+from settings import FETCH
+
+T = TypeVar("T")
+
+
+class FetchCancelled(RuntimeError):
+    """Raised by FetchEngine.run when `cancelled()` turns true; `.results` holds what finished (None elsewhere)."""
+
+    def __init__(self, results: List):
+        super().__init__("fetch cancelled")
+        self.results = results
+
+
+@dataclass(frozen=True)
+class FetchTask:
+    finance_cd: str
+    list_no: str
+    term: str
+    startBaseMm: str
+    endBaseMm: str
+    url: str
+
+    @property
+    def host(self) -> str:
+        return urlparse(self.url).netloc
+
+
+class TokenBucket:
+    """Classic token bucket. `rate` tokens are added per second, up to `capacity`."""
+
+    def __init__(self, rate: Optional[float], capacity: Optional[float] = None):
+        self.rate = float(rate) if rate else 0.0
+        self.capacity = float(capacity or max(1.0, self.rate))
+        self._tokens = self.capacity
+        self._stamp = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._stamp) * self.rate)
+                self._stamp = now
+                if self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    return
+                wait_s = (1.0 - self._tokens) / self.rate
+            time.sleep(wait_s)
+
+
+class FetchEngine:
+    """
+    Runs `fn(task)` for every task on a bounded thread pool.
+    - max_workers: total worker threads
+    - per_host: max in-flight calls per host (FISIS is one host, so this is the real cap)
+    - rate_per_sec / burst: token bucket shared by all workers
+    """
+
+    def __init__(
+        self,
+        max_workers: int = FETCH["max_workers"],
+        per_host: int = FETCH["per_host"],
+        rate_per_sec: Optional[float] = FETCH["rate_per_sec"],
+        burst: Optional[float] = FETCH["burst"],
+    ):
+        self.max_workers = max(1, int(max_workers))
+        self.per_host = max(1, int(per_host))
+        self.bucket = TokenBucket(rate_per_sec, burst)
+        self._host_sems: Dict[str, threading.BoundedSemaphore] = {}
+        self._sem_lock = threading.Lock()
+        self.stats = {"tasks": 0, "elapsed_s": 0.0}
+
+    def _host_sem(self, host: str) -> threading.BoundedSemaphore:
+        with self._sem_lock:
+            sem = self._host_sems.get(host)
+            if sem is None:
+                sem = self._host_sems[host] = threading.BoundedSemaphore(self.per_host)
+            return sem
+
+    def _call(self, fn: Callable[[FetchTask], T], task: FetchTask, cancelled: Optional[Callable[[], bool]]) -> T:
+        if cancelled is not None and cancelled():
+            raise FetchCancelled([])
+        with self._host_sem(task.host):
+            self.bucket.acquire()
+            return fn(task)
+
+    def run(
+        self,
+        tasks: Sequence[FetchTask],
+        fn: Callable[[FetchTask], T],
+        on_done: Optional[Callable[[FetchTask, T], None]] = None,
+        cancelled: Optional[Callable[[], bool]] = None,
+    ) -> List[T]:
+        """
+        Run all tasks; return results in the same order. The first failure is re-raised.
+        on_done(task, result) is called as each task finishes (from worker threads).
+        Once cancelled() is true, tasks not yet started are skipped and FetchCancelled
+        is raised with the finished results.
+        """
+        tasks = list(tasks)
+        t0 = time.perf_counter()
+        if not tasks:
+            return []
+
+        def call(t: FetchTask) -> T:
+            r = self._call(fn, t, cancelled)
+            if on_done is not None:
+                on_done(t, r)
+            return r
+
+        if self.max_workers == 1:
+            results: List = []
+            try:
+                for t in tasks:
+                    results.append(call(t))
+            except FetchCancelled:
+                raise FetchCancelled(results + [None] * (len(tasks) - len(results)))
+        else:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(tasks)), thread_name_prefix="fisis-fetch") as pool:
+                futures = [pool.submit(call, t) for t in tasks]
+                done, pending = wait(futures, return_when=FIRST_EXCEPTION)
+                errors = [f.exception() for f in done if f.exception() is not None]
+                if errors:
+                    for p in pending:
+                        p.cancel()
+                    if not all(isinstance(e, FetchCancelled) for e in errors):
+                        raise next(e for e in errors if not isinstance(e, FetchCancelled))
+                    wait(pending)
+                    raise FetchCancelled([f.result() if f.done() and not f.cancelled() and f.exception() is None else None
+                                          for f in futures])
+                results = [f.result() for f in futures]
+
+        elapsed = time.perf_counter() - t0
+        self.stats["tasks"] += len(tasks)
+        self.stats["elapsed_s"] += elapsed
+        print(f"[fetch] {len(tasks)} calls in {elapsed:.2f}s (workers={self.max_workers}, per_host={self.per_host})")
+        return results
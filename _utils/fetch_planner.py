@@ -0,0 +1,146 @@
+# fetch_planner.py
+"""
+Compiles the (finance_cd, list_no, term, window) cells a run still needs
+into a minimal, ordered request set before anything touches the network.
+
+- (list, term) pairs the list does not publish (fisis_list_terms_map.csv) are dropped
+- windows of the same cell that overlap, touch, or sit within `merge_gap_months`
+  are merged into one call
+- requests for priority lists (the active tab) go first
+- FetchPlan.estimate_s() / summary() give the dry-run cost
+"""
+
+from __future__ import annotations
+import math
+import os
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+import pandas as pd
+
+from settings import FETCH
+from _utils.fetch_engine import FetchTask
+
+TERM_STEP_MONTHS = {"Q": 3, "H": 6, "Y": 12}
+
+Cell = Tuple[str, str, str, str, str]  # (finance_cd, list_no, term, start_mm, end_mm)
+
+
+def _ord(yyyymm: str) -> int:
+    return int(yyyymm[:4]) * 12 + int(yyyymm[4:6]) - 1
+
+def load_supported_terms(terms_map_csv: str) -> Dict[str, Set[str]]:
+    """listNo -> set of terms it publishes. Empty when the map is missing (nothing gets dropped)."""
+    if not terms_map_csv or not os.path.exists(terms_map_csv):
+        return {}
+    df = pd.read_csv(terms_map_csv, dtype=str, encoding="utf-8-sig").fillna("")
+    return {str(r["listNo"]).strip(): set(str(r["terms"]).split()) for _, r in df.iterrows() if str(r["listNo"]).strip()}
+
+def split_supported(
+    terms_by_list: Dict[str, str], supported: Dict[str, Set[str]]
+) -> Tuple[Dict[str, str], List[Tuple[str, str, str]]]:
+    """Splits {list_no: term} into (kept, dropped[(list_no, term, reason)]). Unknown lists are kept."""
+    kept, dropped = {}, []
+    for ln, t in terms_by_list.items():
+        terms = supported.get(ln)
+        if terms is not None and t not in terms:
+            dropped.append((ln, t, f"publishes {'/'.join(sorted(terms)) or 'nothing'}"))
+            continue
+        kept[ln] = t
+    return kept, dropped
+
+def _merge_windows(windows: Iterable[Tuple[str, str]], term: str, merge_gap_months: int) -> List[Tuple[str, str]]:
+    step = TERM_STEP_MONTHS.get(term, 3)
+    merged: List[Tuple[str, str]] = []
+    for s, e in sorted(windows):
+        if merged and _ord(s) <= _ord(merged[-1][1]) + step + merge_gap_months:
+            if e > merged[-1][1]:
+                merged[-1] = (merged[-1][0], e)
+        else:
+            merged.append((s, e))
+    return merged
+
+
+@dataclass
+class FetchPlan:
+    tasks: List[FetchTask]
+    windows_in: int = 0
+    dropped: List[Tuple[str, str, str]] = field(default_factory=list)
+    cached: int = 0  # tasks already in the response cache (served from disk, no HTTP)
+
+    def __len__(self) -> int:
+        return len(self.tasks)
+
+    def estimate_s(
+        self,
+        latency_s: Optional[float] = None,
+        max_workers: int = FETCH["max_workers"],
+        per_host: int = FETCH["per_host"],
+        rate_per_sec: float = FETCH["rate_per_sec"],
+        burst: float = FETCH["burst"],
+    ) -> float:
+        """Wall-time estimate: the slower of the concurrency bound and the token-bucket bound."""
+        n = max(0, len(self.tasks) - self.cached)
+        if n == 0:
+            return 0.0
+        latency = FETCH["est_latency_s"] if latency_s is None else latency_s
+        by_pool = math.ceil(n / max(1, min(max_workers, per_host))) * latency
+        by_rate = max(0.0, n - (burst or 0)) / rate_per_sec if rate_per_sec else 0.0
+        return max(by_pool, by_rate)
+
+    def summary(self, latency_s: Optional[float] = None) -> str:
+        lines = [f"[plan] {len(self.tasks)} request(s) from {self.windows_in} window(s)"
+                 f" ({self.cached} cached on disk) ~ {self.estimate_s(latency_s):.1f}s"]
+        for ln, t, why in self.dropped:
+            lines.append(f"[plan] dropped {ln}/{t}: {why}")
+        return "\n".join(lines)
+
+
+def plan_requests(
+    cells: Iterable[Cell],
+    *,
+    url: str,
+    priority_lists: Sequence[str] = (),
+    known_lists: Optional[Iterable[str]] = None,
+    merge_gap_months: int = FETCH["merge_gap_months"],
+    dropped: Optional[List[Tuple[str, str, str]]] = None,
+) -> FetchPlan:
+    """
+    Merges the windows of each (finance_cd, list_no, term) cell and orders the
+    resulting calls: priority lists first, then list_no, finance_cd, start month.
+    Cells whose list is not in `known_lists` (when given) are skipped.
+    """
+    cells = list(cells)
+    known = set(known_lists) if known_lists is not None else None
+    by_cell: Dict[Tuple[str, str, str], List[Tuple[str, str]]] = {}
+    for cd, ln, t, s, e in cells:
+        if known is not None and ln not in known:
+            continue
+        by_cell.setdefault((cd, ln, t), []).append((s, e))
+
+    prio = {ln: i for i, ln in enumerate(priority_lists)}
+    cd_order: Dict[str, int] = {}
+    for cd, *_ in cells:
+        cd_order.setdefault(cd, len(cd_order))
+
+    tasks = [
+        FetchTask(cd, ln, t, s, e, url)
+        for (cd, ln, t), windows in by_cell.items()
+        for s, e in _merge_windows(windows, t, merge_gap_months)
+    ]
+    tasks.sort(key=lambda k: (prio.get(k.list_no, len(prio)), k.list_no, cd_order[k.finance_cd], k.startBaseMm))
+    return FetchPlan(tasks=tasks, windows_in=len(cells), dropped=list(dropped or []))
+
+
+if __name__ == "__main__":
+    # dry run for the configured sections and target firm
+    from settings import DEFAULTS, PATHS
+    from _utils.build_master import load_or_build_master_for_market
+
+    cfgs = [c for g in DEFAULTS["sections"] for c in g["content"]]
+    load_or_build_master_for_market(
+        [DEFAULTS["target_finance_cd"]],
+        term=DEFAULTS["term"], startBaseMm=DEFAULTS["startBaseMm"], endBaseMm=DEFAULTS["endBaseMm"],
+        listNo=DEFAULTS["list_nos"], section_cfgs=cfgs, hierarchy_json_path=PATHS["hier_json"],
+        cache_path=PATHS["master_store"], dry_run=True,
+    )
@@ -0,0 +1,205 @@
+# http_session.py
+"""
+Shared HTTP layer for every FISIS call (build_master + _meta crawlers).
+
+- one pooled keep-alive requests.Session (no TLS handshake per call)
+- idempotent GETs retried with jittered exponential backoff; fetch() streams
+  the body inside the retry loop, so a body cut short is retried too
+- circuit breaker: after N consecutive failures, fail fast for a cooldown
+- per-request timing counters (see `session_stats()`)
+"""
+
+from __future__ import annotations
+import random
+import threading
+import time
+from typing import Callable, Dict, Iterator, Optional, TypeVar
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from settings import HTTP
+
+RETRY_STATUS = {429, 500, 502, 503, 504}
+# a failed round trip, or a body cut short while streaming (fetch())
+RETRY_ERRORS = (requests.ConnectionError, requests.Timeout, requests.HTTPError,
+                requests.exceptions.ChunkedEncodingError, requests.exceptions.ContentDecodingError)
+
+T = TypeVar("T")
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised when FISIS is considered degraded and calls are short-circuited."""
+
+
+class CircuitBreaker:
+    """closed -> (threshold consecutive failures) -> open -> (cooldown) -> half-open -> closed/open"""
+
+    def __init__(self, threshold: int, cooldown_s: float):
+        self.threshold = max(1, int(threshold))
+        self.cooldown_s = float(cooldown_s)
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if time.monotonic() - self._opened_at >= self.cooldown_s:
+                return "half-open"
+            return "open"
+
+    def before_call(self) -> None:
+        if self.state == "open":
+            raise CircuitOpenError(f"FISIS circuit open ({self._failures} consecutive failures); retry later.")
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._failures >= self.threshold:
+                self._opened_at = time.monotonic()
+
+
+class FisisSession:
+    def __init__(
+        self,
+        *,
+        pool_maxsize: int = HTTP["pool_maxsize"],
+        retries: int = HTTP["retries"],
+        backoff_base_s: float = HTTP["backoff_base_s"],
+        backoff_cap_s: float = HTTP["backoff_cap_s"],
+        breaker_threshold: int = HTTP["breaker_threshold"],
+        breaker_cooldown_s: float = HTTP["breaker_cooldown_s"],
+    ):
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_maxsize, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        self.retries = max(0, int(retries))
+        self.backoff_base_s = float(backoff_base_s)
+        self.backoff_cap_s = float(backoff_cap_s)
+        self.breaker = CircuitBreaker(breaker_threshold, breaker_cooldown_s)
+
+        self._lock = threading.Lock()
+        self._stats = self._empty_stats()
+
+    @staticmethod
+    def _empty_stats() -> Dict[str, float]:
+        return {"requests": 0, "attempts": 0, "retries": 0, "failures": 0,
+                "bytes": 0, "total_s": 0.0, "max_s": 0.0}
+
+    def _backoff(self, attempt: int) -> float:
+        # "full jitter": uniform(0, min(cap, base * 2**attempt))
+        return random.uniform(0.0, min(self.backoff_cap_s, self.backoff_base_s * (2 ** attempt)))
+
+    def _count(self, **kw) -> None:
+        with self._lock:
+            for k, v in kw.items():
+                if k == "max_s":
+                    self._stats["max_s"] = max(self._stats["max_s"], v)
+                else:
+                    self._stats[k] += v
+
+    def get(self, url: str, params: Optional[dict] = None, timeout: float = HTTP["timeout_s"],
+            stream: bool = False) -> requests.Response:
+        """
+        GET with retries/backoff. Raises the last error once retries are exhausted.
+        stream=True leaves the body unread (caller iterates `iter_content` and closes);
+        only the status/headers round trip is retried and `bytes` uses Content-Length.
+        Use fetch() to have the streamed body read inside the retries.
+        """
+        return self._call(url, params, timeout, stream, None, 0)
+
+    def fetch(self, url: str, consume: Callable[[Iterator[bytes]], T], params: Optional[dict] = None,
+              timeout: float = HTTP["timeout_s"], chunk_size: int = 1 << 16) -> T:
+        """
+        Streamed GET whose body is read by consume(chunks) inside the retry loop:
+        a body cut short (reset, chunked-encoding error, read timeout) is retried
+        like a failed request, with a fresh call to `consume`. Returns its result.
+        """
+        return self._call(url, params, timeout, True, consume, chunk_size)
+
+    def _call(self, url: str, params: Optional[dict], timeout: float, stream: bool,
+              consume: Optional[Callable[[Iterator[bytes]], T]], chunk_size: int):
+        self._count(requests=1)
+        last_err: Optional[Exception] = None
+
+        for attempt in range(self.retries + 1):
+            self.breaker.before_call()
+            t0 = time.perf_counter()
+            r: Optional[requests.Response] = None
+            try:
+                r = self.session.get(url, params=params, timeout=timeout, stream=stream)
+                r.raise_for_status()
+                if consume is not None:
+                    read = [0]
+                    def _chunks() -> Iterator[bytes]:
+                        for chunk in r.iter_content(chunk_size=chunk_size):
+                            read[0] += len(chunk)
+                            yield chunk
+                    with r:
+                        out = consume(_chunks())
+            except RETRY_ERRORS as e:
+                if r is not None:
+                    r.close()  # hand the connection back to the pool
+                elapsed = time.perf_counter() - t0
+                self._count(attempts=1, total_s=elapsed, max_s=elapsed)
+                last_err = e
+                status = getattr(getattr(e, "response", None), "status_code", None)
+                if isinstance(e, requests.HTTPError) and status is not None and status not in RETRY_STATUS:
+                    break  # 4xx: our request is wrong, FISIS is not degraded
+                self.breaker.record_failure()
+                if attempt < self.retries:
+                    self._count(retries=1)
+                    time.sleep(self._backoff(attempt))
+                continue
+            except BaseException:
+                if r is not None:
+                    r.close()
+                raise
+
+            elapsed = time.perf_counter() - t0
+            if consume is not None:
+                size = read[0]
+            else:
+                size = int(r.headers.get("Content-Length") or 0) if stream else len(r.content)
+            self._count(attempts=1, bytes=size, total_s=elapsed, max_s=elapsed)
+            self.breaker.record_success()
+            return out if consume is not None else r
+
+        self._count(failures=1)
+        raise last_err
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            out = dict(self._stats)
+        out["avg_s"] = out["total_s"] / out["attempts"] if out["attempts"] else 0.0
+        out["breaker"] = self.breaker.state
+        return out
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self._stats = self._empty_stats()
+
+
+_SESSION: Optional[FisisSession] = None
+_SESSION_LOCK = threading.Lock()
+
+def get_session() -> FisisSession:
+    """Process-wide shared session (lazy)."""
+    global _SESSION
+    with _SESSION_LOCK:
+        if _SESSION is None:
+            _SESSION = FisisSession()
+        return _SESSION
+
+def session_stats() -> Dict[str, float]:
+    return get_session().stats()
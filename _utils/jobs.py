@@ -0,0 +1,139 @@
+# jobs.py
+"""
+Background jobs for long loads (the market build behind "조회하기").
+
+- queue + status live in diskcache (cache/jobs): the Dash callback only
+  enqueues and returns, a poll callback reads the status
+- one worker thread in the app process runs the jobs, so results and the
+  in-memory caches stay in the same process as the callbacks
+- a job is fn(progress, cancelled) -> result; progress(dict) snapshots are
+  persisted (throttled), cancelled() reads the job's cancel flag
+- results stay in memory (the last _KEEP_RESULTS) so repeated polls of a done
+  job read the same one; after a restart a "done" status has no result
+
+Without diskcache, plain in-memory containers are used instead.
+"""
+
+from __future__ import annotations
+import collections
+import os
+import threading
+import time
+import traceback
+import uuid
+from typing import Any, Callable, Dict, Optional
+
+from settings import JOBS
+
+try:
+    import diskcache
+except ImportError:
+    diskcache = None
+
+_PROGRESS_EVERY_S = 0.25
+_STATUS_TTL_S = 24 * 3600
+_KEEP_RESULTS = 16
+
+
+class JobRunner:
+    def __init__(self, directory: str = JOBS["dir"]):
+        if diskcache is not None:
+            self._status = diskcache.Cache(directory)
+            self._queue = diskcache.Deque(directory=os.path.join(directory, "queue"))
+        else:
+            self._status, self._queue = {}, collections.deque()
+        self._queue.clear()  # callables from a previous process are gone; never replay their ids
+        self._fns: Dict[str, Callable] = {}
+        self._results: "collections.OrderedDict[str, Any]" = collections.OrderedDict()
+        self._wake = threading.Event()
+        self._set_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._worker, name="fisis-jobs", daemon=True)
+        self._thread.start()
+
+    def _put(self, key: str, value: Any) -> None:
+        if diskcache is not None:
+            self._status.set(key, value, expire=_STATUS_TTL_S)
+        else:
+            self._status[key] = value
+
+    # --- client side (callbacks) ---
+    def submit(self, fn: Callable[..., Any], label: str = "") -> str:
+        job_id = uuid.uuid4().hex
+        self._fns[job_id] = fn
+        self._put(job_id, {"state": "queued", "label": label, "phase": "queued", "done": 0, "total": 0,
+                           "rows": 0, "error": None, "submitted": time.time(), "finished": None})
+        self._queue.append(job_id)
+        self._wake.set()
+        return job_id
+
+    def cancel(self, job_id: Optional[str]) -> None:
+        if job_id:
+            self._put(f"cancel:{job_id}", True)
+
+    def is_cancelled(self, job_id: str) -> bool:
+        return bool(self._status.get(f"cancel:{job_id}", False))
+
+    def info(self, job_id: Optional[str]) -> Optional[dict]:
+        return self._status.get(job_id) if job_id else None
+
+    def result(self, job_id: str) -> Any:
+        """The finished job's result (not consumed), or None if it is not in this process."""
+        return self._results.get(job_id)
+
+    # --- worker side ---
+    def _set(self, job_id: str, **kw) -> None:
+        with self._set_lock:
+            st = dict(self._status.get(job_id) or {})
+            st.update(kw)
+            self._put(job_id, st)
+
+    def _run_one(self, job_id: str) -> None:
+        fn = self._fns.pop(job_id, None)
+        if fn is None:
+            return
+        if self.is_cancelled(job_id):
+            self._set(job_id, state="cancelled", finished=time.time())
+            return
+
+        last = [0.0]
+        def progress(snap: dict) -> None:
+            now = time.monotonic()
+            if snap.get("phase") != "fetch" or now - last[0] >= _PROGRESS_EVERY_S or snap.get("done") == snap.get("total"):
+                last[0] = now
+                self._set(job_id, **{k: snap[k] for k in ("phase", "done", "total", "rows") if k in snap})
+
+        self._set(job_id, state="running", started=time.time())
+        try:
+            result = fn(progress, lambda: self.is_cancelled(job_id))
+        except Exception as e:
+            if self.is_cancelled(job_id):
+                self._set(job_id, state="cancelled", finished=time.time())
+            else:
+                traceback.print_exc()
+                self._set(job_id, state="failed", error=repr(e), finished=time.time())
+            return
+        self._results[job_id] = result
+        while len(self._results) > _KEEP_RESULTS:
+            self._results.popitem(last=False)
+        self._set(job_id, state="done", finished=time.time())
+
+    def _worker(self) -> None:
+        while True:
+            try:
+                job_id = self._queue.popleft()
+            except IndexError:
+                self._wake.wait(1.0)
+                self._wake.clear()
+                continue
+            self._run_one(job_id)
+
+
+_RUNNER: Optional[JobRunner] = None
+_RUNNER_LOCK = threading.Lock()
+
+def get_job_runner() -> JobRunner:
+    global _RUNNER
+    with _RUNNER_LOCK:
+        if _RUNNER is None:
+            _RUNNER = JobRunner()
+        return _RUNNER
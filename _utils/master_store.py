@@ -0,0 +1,287 @@
+# master_store.py
+"""
+Partitioned columnar store for the master frame (replaces the monolithic master_df.csv).
+
+Layout (hive style, one file per partition):
+    <root>/term=Q/list_no=SH001/finance_cd=0010607.parquet
+
+- explicit schema: every column is str except `value` (float64); partition
+  keys live in the path, not in the files, so finance_cd keeps its zeros
+- reads prune partitions by term / list_no / finance_cd from the directory
+  names, read only the requested columns, and push the base_month window
+  down into the parquet reader
+- writes touch only the partitions present in the new rows (merge on the
+  row key, new values win, atomic replace)
+- what the store covers is tracked in a sidecar bitmap (coverage_manifest.py),
+  so missing cells are found without reading any partition
+- run scopes point at partitions and are evicted LRU under a disk budget
+  (scope_index.py)
+
+Parquet / Feather need pyarrow; without it the store falls back to gzip CSV
+partitions with the same layout and API.
+"""
+
+from __future__ import annotations
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+from settings import MASTER_STORE
+from _utils.coverage_manifest import CoverageManifest
+from _utils.scope_index import ScopeIndex
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+    import pyarrow.parquet as pq
+except ImportError:  # optional: CSV partitions instead
+    pa = None
+
+SCHEMA_VERSION = 1
+MASTER_COLUMNS = [
+    "list_no","list_nm","finance_cd","term","base_month",
+    "account_cd","account_nm","column_id","column_nm","value"
+]
+PARTITION_KEYS = ("term", "list_no", "finance_cd")
+FILE_COLUMNS = [c for c in MASTER_COLUMNS if c not in PARTITION_KEYS]
+KEY_COLUMNS = ["term", "list_no", "finance_cd", "base_month"]
+ROW_KEY = ["term", "finance_cd", "list_no", "account_cd", "column_id", "base_month"]
+SORT_KEY = ["term", "finance_cd", "list_no", "account_cd", "column_id", "base_month"]
+_EXT = {"parquet": ".parquet", "feather": ".feather", "csv": ".csv.gz"}
+
+Partition = Tuple[str, str, str, str]  # (term, list_no, finance_cd, path)
+
+
+def _arrow_schema():
+    return pa.schema([(c, pa.float64() if c == "value" else pa.string()) for c in FILE_COLUMNS])
+
+def conform(df: pd.DataFrame) -> pd.DataFrame:
+    """Master columns in order, str everywhere except float64 `value`."""
+    out = pd.DataFrame({c: (df[c] if c in df.columns else pd.Series(dtype=str, index=df.index)) for c in MASTER_COLUMNS})
+    for c in MASTER_COLUMNS:
+        out[c] = pd.to_numeric(out[c], errors="coerce").astype("float64") if c == "value" else out[c].astype(str)
+    return out
+
+
+class MasterStore:
+    def __init__(self, root: str = MASTER_STORE["root"], fmt: str = MASTER_STORE["format"],
+                 read_workers: int = MASTER_STORE["read_workers"]):
+        if fmt in ("parquet", "feather") and pa is None:
+            print(f"[store] pyarrow not installed; using CSV partitions instead of {fmt}.")
+            fmt = "csv"
+        self.root, self.fmt, self.ext = root, fmt, _EXT[fmt]
+        self.read_workers = max(1, int(read_workers))
+        self._lock = threading.RLock()
+        os.makedirs(root, exist_ok=True)
+        self.coverage = CoverageManifest(root, SCHEMA_VERSION, fmt)
+        self.scopes = ScopeIndex(root)
+        self.on_change: List[Callable[[Iterable[Tuple[str, str, str]]], None]] = []  # called with changed partitions
+
+    # ---------- layout ----------
+    def _path(self, term: str, list_no: str, finance_cd: str) -> str:
+        return os.path.join(self.root, f"term={term}", f"list_no={list_no}", f"finance_cd={finance_cd}{self.ext}")
+
+    @staticmethod
+    def _scan(path: str, key: str, wanted: Optional[set]) -> List[Tuple[str, str]]:
+        prefix = key + "="
+        try:
+            entries = list(os.scandir(path))
+        except FileNotFoundError:
+            return []
+        out = [(e.name[len(prefix):], e.path) for e in entries if e.name.startswith(prefix)]
+        return [(v, p) for v, p in out if wanted is None or v in wanted]
+
+    def partitions(
+        self,
+        terms_by_list: Optional[Dict[str, str]] = None,
+        finance_cds: Optional[Iterable[str]] = None,
+        terms: Optional[Iterable[str]] = None,
+    ) -> List[Partition]:
+        """Partitions matching the predicates (directory pruning only, no file is opened)."""
+        want_terms = set(terms) if terms is not None else (set(terms_by_list.values()) if terms_by_list else None)
+        want_cds = set(finance_cds) if finance_cds is not None else None
+        out: List[Partition] = []
+        for term, tdir in self._scan(self.root, "term", want_terms):
+            want_lists = {ln for ln, t in terms_by_list.items() if t == term} if terms_by_list else None
+            for ln, ldir in self._scan(tdir, "list_no", want_lists):
+                for fname, fpath in self._scan(ldir, "finance_cd", None):
+                    if not fname.endswith(self.ext):
+                        continue
+                    cd = fname[: -len(self.ext)]
+                    if want_cds is None or cd in want_cds:
+                        out.append((term, ln, cd, fpath))
+        return sorted(out)
+
+    def _changed(self, partitions: Iterable[Tuple[str, str, str]]) -> None:
+        partitions = list(partitions)
+        for fn in self.on_change:
+            fn(partitions)
+
+    def partition_sizes(self) -> Dict[Tuple[str, str, str], int]:
+        return {(t, ln, cd): os.path.getsize(p) for t, ln, cd, p in self.partitions()}
+
+    def delete_partition(self, term: str, list_no: str, finance_cd: str) -> None:
+        with self._lock:
+            try:
+                os.remove(self._path(term, list_no, finance_cd))
+            except FileNotFoundError:
+                pass
+            self.coverage.forget(term, list_no, finance_cd)
+            self._changed([(term, list_no, finance_cd)])
+
+    def is_empty(self) -> bool:
+        return not any(True for _ in self._scan(self.root, "term", None))
+
+    # ---------- io ----------
+    def _read_file(self, path: str, columns: List[str], start: Optional[str], end: Optional[str]) -> pd.DataFrame:
+        cols = list(dict.fromkeys(columns + (["base_month"] if (start or end) else [])))
+        if self.fmt == "parquet":
+            filters = [("base_month", ">=", start)] if start else []
+            filters += [("base_month", "<=", end)] if end else []
+            df = pq.read_table(path, columns=cols, filters=filters or None, schema=_arrow_schema()).to_pandas()
+        elif self.fmt == "feather":
+            df = feather.read_table(path, columns=cols).to_pandas()
+        else:
+            df = pd.read_csv(path, usecols=cols, dtype={c: str for c in cols if c != "value"}, keep_default_na=False,
+                             na_values={"value": [""]} if "value" in cols else None)
+        if self.fmt != "parquet" and (start or end):
+            m = pd.Series(True, index=df.index)
+            if start: m &= df["base_month"] >= start
+            if end: m &= df["base_month"] <= end
+            df = df[m]
+        return df[columns]
+
+    def _write_file(self, path: str, df: pd.DataFrame) -> None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.tmp{threading.get_ident()}"
+        body = df[FILE_COLUMNS].reset_index(drop=True)
+        if self.fmt == "parquet":
+            pq.write_table(pa.Table.from_pandas(body, schema=_arrow_schema(), preserve_index=False), tmp,
+                           compression="zstd")
+        elif self.fmt == "feather":
+            feather.write_feather(pa.Table.from_pandas(body, schema=_arrow_schema(), preserve_index=False), tmp,
+                                  compression="zstd")
+        else:
+            body.to_csv(tmp, index=False, compression="gzip")
+        os.replace(tmp, path)
+
+    def read(
+        self,
+        terms_by_list: Optional[Dict[str, str]] = None,
+        finance_cds: Optional[Iterable[str]] = None,
+        startBaseMm: Optional[str] = None,
+        endBaseMm: Optional[str] = None,
+        columns: Optional[Sequence[str]] = None,
+    ) -> pd.DataFrame:
+        """Rows of the matching partitions; `columns` limits what is read from disk."""
+        columns = list(columns or MASTER_COLUMNS)
+        file_cols = [c for c in columns if c in FILE_COLUMNS]
+        parts = self.partitions(terms_by_list, finance_cds)
+
+        def load(p: Partition) -> pd.DataFrame:
+            term, ln, cd, path = p
+            df = self._read_file(path, file_cols, startBaseMm, endBaseMm) if file_cols else \
+                self._read_file(path, ["base_month"], startBaseMm, endBaseMm)[[]]
+            if "term" in columns: df["term"] = term
+            if "list_no" in columns: df["list_no"] = ln
+            if "finance_cd" in columns: df["finance_cd"] = cd
+            return df
+
+        with self._lock:
+            if len(parts) > 1 and self.read_workers > 1:
+                with ThreadPoolExecutor(max_workers=self.read_workers, thread_name_prefix="store-read") as pool:
+                    frames = list(pool.map(load, parts))
+            else:
+                frames = [load(p) for p in parts]
+
+        frames = [f for f in frames if not f.empty]
+        if not frames:
+            return pd.DataFrame({c: pd.Series(dtype="float64" if c == "value" else str) for c in columns})
+        df = pd.concat(frames, ignore_index=True)[columns]
+        for c in columns:
+            df[c] = df[c].astype("float64") if c == "value" else df[c].astype(str)
+        return df
+
+    def write(self, df_new: pd.DataFrame) -> int:
+        """Merges new rows into their partitions (new values win). Returns the number of partitions written."""
+        if df_new is None or df_new.empty:
+            return 0
+        df_new = conform(df_new)
+        written = []
+        with self._lock:
+            for (term, ln, cd), grp in df_new.groupby(list(PARTITION_KEYS), sort=False):
+                path = self._path(term, ln, cd)
+                if os.path.exists(path):
+                    old = self._read_file(path, FILE_COLUMNS, None, None)
+                    old["term"], old["list_no"], old["finance_cd"] = term, ln, cd
+                    grp = pd.concat([conform(old), grp], ignore_index=True).drop_duplicates(subset=ROW_KEY, keep="last")
+                grp = grp.sort_values(SORT_KEY, kind="stable")
+                self._write_file(path, grp)
+                written.append((term, ln, cd))
+            self.coverage.add_rows(df_new)
+            self.coverage.save()
+            self._changed(written)
+        return len(written)
+
+    def replace_partition(self, term: str, list_no: str, finance_cd: str, df: pd.DataFrame) -> None:
+        with self._lock:
+            df = conform(df)
+            self._write_file(self._path(term, list_no, finance_cd), df.sort_values(SORT_KEY, kind="stable"))
+            self.coverage.forget(term, list_no, finance_cd)
+            self.coverage.add_rows(df)
+            self.coverage.save()
+            self._changed([(term, list_no, finance_cd)])
+
+    def ensure_coverage(self) -> None:
+        """Rebuilds the coverage manifest from the key columns when it is missing or stale."""
+        if not self.coverage.valid:
+            with self._lock:
+                self.coverage.rebuild(self.read(columns=KEY_COLUMNS))
+                self.coverage.save()
+
+    def latest_month(self, term: str) -> Optional[str]:
+        """Newest base_month covered for `term` (from the manifest; reads base_month only without one)."""
+        if self.coverage.valid:
+            return self.coverage.latest_month(term)
+        months = [self._read_file(p, ["base_month"], None, None)["base_month"].max()
+                  for _, _, _, p in self.partitions(terms=[term])]
+        months = [m for m in months if isinstance(m, str) and m]
+        return max(months) if months else None
+
+    def import_csv(self, csv_path: str) -> int:
+        """One-time migration from the legacy master_df.csv."""
+        df = pd.read_csv(csv_path, dtype=str, encoding="utf-8-sig")
+        df["finance_cd"] = df["finance_cd"].str.strip().str.extract(r"(\d+)", expand=False).fillna("").str.zfill(7)
+        n = self.write(df)
+        print(f"[store] imported {len(df):,} rows from {csv_path} into {n} partition(s).")
+        return n
+
+
+_STORES: Dict[str, MasterStore] = {}
+_STORES_LOCK = threading.Lock()
+
+def get_store(root: str = MASTER_STORE["root"], legacy_csv: Optional[str] = None,
+              backend: str = MASTER_STORE["backend"]) -> MasterStore:
+    """
+    Shared store per root. An empty store is seeded from `legacy_csv` if that file exists.
+    backend: "files" (partitioned parquet/feather/csv) or "sqlite" (sqlite_store.py).
+    """
+    key = os.path.abspath(root)
+    with _STORES_LOCK:
+        store = _STORES.get(key)
+        if store is None:
+            if backend == "sqlite":
+                from _utils.sqlite_store import SqliteMasterStore  # imports this module
+                store = _STORES[key] = SqliteMasterStore(root)
+            else:
+                store = _STORES[key] = MasterStore(root)
+            if legacy_csv and os.path.exists(legacy_csv) and store.is_empty():
+                try:
+                    store.import_csv(legacy_csv)
+                except Exception as e:
+                    print(f"[store] could not import {legacy_csv}: {e}")
+            store.ensure_coverage()
+        return store
@@ -0,0 +1,113 @@
+# resource_cache.py
+"""
+Startup cache for the app resources (hierarchy, finance map, namer).
+
+The cache file is valid only for the exact source files it was built from:
+its key is RESOURCE_SCHEMA_VERSION plus the sha256 of every source. Size and
+mtime_ns are kept next to each hash so an untouched file is not rehashed;
+a touched file is rehashed, and only a real content change forces a rebuild.
+
+Format: magic line + zlib-compressed JSON. Plain data only -- nothing is
+executed on load, unlike the pickle it replaces.
+"""
+
+from __future__ import annotations
+import hashlib
+import json
+import os
+import threading
+import time
+import zlib
+from typing import Callable, Dict, Optional, Tuple
+
+RESOURCE_SCHEMA_VERSION = 1  # bump when the cached structures change shape
+_MAGIC = b"FISIS-RES1\n"
+
+
+def _sha256(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+def fingerprint(sources: Dict[str, str], previous: Optional[dict] = None) -> dict:
+    """{name: {path, size, mtime_ns, sha256}}; reuses `previous` hashes of files whose size/mtime are unchanged."""
+    previous = previous or {}
+    out = {}
+    for name, path in sorted(sources.items()):
+        if not path or not os.path.exists(path):
+            out[name] = {"path": path, "missing": True}
+            continue
+        st = os.stat(path)
+        old = previous.get(name) or {}
+        same = old.get("path") == path and old.get("size") == st.st_size and old.get("mtime_ns") == st.st_mtime_ns
+        out[name] = {"path": path, "size": st.st_size, "mtime_ns": st.st_mtime_ns,
+                     "sha256": old["sha256"] if same and "sha256" in old else _sha256(path)}
+    return out
+
+def cache_key(fp: dict) -> str:
+    blob = json.dumps({"schema": RESOURCE_SCHEMA_VERSION,
+                       "sources": {k: v.get("sha256", "missing") for k, v in fp.items()}}, sort_keys=True)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+def _read(path: str) -> Optional[dict]:
+    try:
+        with open(path, "rb") as f:
+            raw = f.read()
+    except OSError:
+        return None
+    if not raw.startswith(_MAGIC):
+        return None
+    try:
+        return json.loads(zlib.decompress(raw[len(_MAGIC):]).decode("utf-8"))
+    except (zlib.error, ValueError):
+        return None
+
+def _write(path: str, doc: dict) -> None:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.tmp{threading.get_ident()}"
+    with open(tmp, "wb") as f:
+        f.write(_MAGIC)
+        f.write(zlib.compress(json.dumps(doc, ensure_ascii=False, separators=(",", ":")).encode("utf-8"), 6))
+    os.replace(tmp, path)
+
+
+def load_or_build(
+    cache_path: str,
+    sources: Dict[str, str],
+    build: Callable[[], dict],
+) -> Tuple[dict, dict]:
+    """
+    Returns (payload, info). `build()` must return JSON-safe data; it runs when
+    the cache is missing, unreadable, from another schema version, or any source changed.
+    info: {"hit": bool, "reason": str, "seconds": float, "key": str}
+    """
+    t0 = time.perf_counter()
+    doc = _read(cache_path)
+    fp = fingerprint(sources, (doc or {}).get("sources"))
+    key = cache_key(fp)
+    if doc is None:
+        reason = "no cache"
+    elif doc.get("schema") != RESOURCE_SCHEMA_VERSION:
+        reason = f"schema {doc.get('schema')} -> {RESOURCE_SCHEMA_VERSION}"
+    elif doc.get("key") != key:
+        changed = [k for k, v in fp.items() if (doc.get("sources") or {}).get(k, {}).get("sha256") != v.get("sha256")]
+        reason = f"changed: {', '.join(changed) or 'sources'}"
+    else:
+        if fp != doc.get("sources"):  # touched but identical: remember the new mtimes so they are not rehashed
+            doc["sources"] = fp
+            try:
+                _write(cache_path, doc)
+            except OSError:
+                pass
+        return doc["payload"], {"hit": True, "reason": "", "seconds": time.perf_counter() - t0, "key": key}
+
+    payload = build()
+    try:
+        _write(cache_path, {"schema": RESOURCE_SCHEMA_VERSION, "key": key, "sources": fp,
+                            "built": time.time(), "payload": payload})
+    except OSError as e:
+        print(f"[resources] could not write {cache_path}: {e}")
+    return payload, {"hit": False, "reason": reason, "seconds": time.perf_counter() - t0, "key": key}
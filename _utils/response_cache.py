@@ -0,0 +1,146 @@
+# response_cache.py
+"""
+Content-addressed on-disk cache for raw statisticsInfoSearch responses.
+
+- key   : sha256 of the endpoint + normalized query params (auth excluded)
+- value : zlib-compressed response body (bytes as received, EUC-KR)
+- expiry: none when the window ends before the last `settled_lag_quarters`
+          completed quarters, `recent_ttl_s` otherwise (FISIS publishes a
+          quarter weeks after it closes, so an early response may be empty
+          or partial)
+- size  : capped at `size_limit_mb`, least-recently-used entries evicted first
+
+Backed by diskcache; if it is missing the cache is simply disabled.
+"""
+
+from __future__ import annotations
+import datetime as _dt
+import hashlib
+import threading
+import zlib
+from typing import Dict, Iterable, Iterator, Optional
+
+from settings import RESPONSE_CACHE
+
+try:
+    import diskcache
+except ImportError:  # optional: fetches still work, just uncached
+    diskcache = None
+
+_EXCLUDED_PARAMS = {"auth"}
+
+
+def _normalize_params(params: Dict) -> Dict[str, str]:
+    return {str(k): str(v).strip() for k, v in sorted((params or {}).items()) if k not in _EXCLUDED_PARAMS}
+
+def response_key(url: str, params: Dict) -> str:
+    norm = _normalize_params(params)
+    blob = url.split("?", 1)[0].rstrip("/") + "?" + "&".join(f"{k}={v}" for k, v in norm.items())
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+def recent_cutoff_month(today: Optional[_dt.date] = None, lag_quarters: Optional[int] = None) -> str:
+    """
+    First month of the `lag_quarters`-th most recent completed quarter (default
+    RESPONSE_CACHE["settled_lag_quarters"]); anything from here on may still change.
+    """
+    today = today or _dt.date.today()
+    lag = RESPONSE_CACHE["settled_lag_quarters"] if lag_quarters is None else lag_quarters
+    q_start = (today.month - 1) // 3 * 3 + 1          # first month of the current quarter
+    n = today.year * 12 + (q_start - 1) - 3 * max(1, int(lag))
+    return f"{n // 12:04d}{n % 12 + 1:02d}"
+
+
+class _Recorder:
+    """Compresses chunks as they stream past; nothing is stored until `commit()`."""
+
+    def __init__(self, cache: "ResponseCache", key: str, ttl: Optional[float]):
+        self._cache, self._key, self._ttl = cache, key, ttl
+        self._z = zlib.compressobj(6)
+        self._parts = []
+        self._done = False
+
+    def wrap(self, chunks: Iterable[bytes]) -> Iterator[bytes]:
+        for chunk in chunks:
+            if chunk:
+                self._parts.append(self._z.compress(chunk))
+            yield chunk
+        self._parts.append(self._z.flush())
+        self._done = True
+
+    def commit(self) -> None:
+        if self._done:
+            self._cache._store(self._key, b"".join(self._parts), self._ttl)
+
+
+class ResponseCache:
+    def __init__(
+        self,
+        directory: str = RESPONSE_CACHE["dir"],
+        size_limit_mb: float = RESPONSE_CACHE["size_limit_mb"],
+        recent_ttl_s: float = RESPONSE_CACHE["recent_ttl_s"],
+    ):
+        self.recent_ttl_s = float(recent_ttl_s)
+        self._cache = diskcache.Cache(
+            directory,
+            size_limit=int(size_limit_mb * 1024 * 1024),
+            eviction_policy="least-recently-used",
+        )
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "stores": 0, "bytes_read": 0, "bytes_stored": 0}
+
+    def _count(self, **kw) -> None:
+        with self._lock:
+            for k, v in kw.items():
+                self._stats[k] += v
+
+    def ttl_for(self, params: Dict) -> Optional[float]:
+        """None (never expire) for finalized windows, recent_ttl_s otherwise."""
+        end_mm = str((params or {}).get("endBaseMm", "")).strip()
+        if end_mm and end_mm < recent_cutoff_month():
+            return None
+        return self.recent_ttl_s
+
+    def get(self, key: str) -> Optional[bytes]:
+        blob = self._cache.get(key)
+        if blob is None:
+            self._count(misses=1)
+            return None
+        self._count(hits=1, bytes_read=len(blob))
+        return zlib.decompress(blob)
+
+    def contains(self, key: str) -> bool:
+        """Presence check without touching hit/miss counters (used by the dry-run planner)."""
+        return key in self._cache
+
+    def recorder(self, key: str, params: Dict) -> _Recorder:
+        return _Recorder(self, key, self.ttl_for(params))
+
+    def _store(self, key: str, blob: bytes, ttl: Optional[float]) -> None:
+        self._cache.set(key, blob, expire=ttl)
+        self._count(stores=1, bytes_stored=len(blob))
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            out = dict(self._stats)
+        lookups = out["hits"] + out["misses"]
+        out["hit_rate"] = out["hits"] / lookups if lookups else 0.0
+        out["entries"] = len(self._cache)
+        out["volume_bytes"] = self._cache.volume()
+        return out
+
+
+_CACHE: Optional[ResponseCache] = None
+_CACHE_LOCK = threading.Lock()
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """Process-wide response cache, or None when disabled / diskcache is unavailable."""
+    global _CACHE
+    if not RESPONSE_CACHE.get("enabled", True) or diskcache is None:
+        return None
+    with _CACHE_LOCK:
+        if _CACHE is None:
+            _CACHE = ResponseCache()
+        return _CACHE
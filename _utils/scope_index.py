@@ -0,0 +1,136 @@
+# scope_index.py
+"""
+Run scopes of the master store and the LRU eviction that keeps it under a disk budget.
+
+A scope is what one load asked for -- finance_cds, {list_no: term}, start/end --
+normalized (sorted, deduplicated) and hashed into a key, so "[폐] 포함" on/off,
+two analysts' periods or two list sets are separate entries instead of one
+overwritten cache file. Scopes do not own data: they point at the store's
+(term, list_no, finance_cd) partitions, which overlapping scopes share.
+
+Kept in <store root>/_scopes.json: per key the normalized scope, last use and hit
+count. When the partitions exceed `size_limit_mb` (or there are more than
+`max_scopes` entries), the least recently used scopes are dropped, together
+with the partitions no remaining scope references. The scope being loaded is
+never evicted.
+"""
+
+from __future__ import annotations
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from settings import MASTER_STORE
+
+SCOPES_NAME = "_scopes.json"
+
+PartKey = Tuple[str, str, str]  # (term, list_no, finance_cd)
+
+
+def normalize_scope(finance_cds: Iterable[str], terms_by_list: Dict[str, str], startBaseMm: str, endBaseMm: str) -> dict:
+    return {
+        "finance_cds": sorted({str(cd) for cd in finance_cds}),
+        "terms_by_list": {ln: terms_by_list[ln] for ln in sorted(terms_by_list)},
+        "startBaseMm": str(startBaseMm),
+        "endBaseMm": str(endBaseMm),
+    }
+
+def scope_key(scope: dict) -> str:
+    blob = json.dumps(scope, sort_keys=True, separators=(",", ":")).encode("utf-8")
+    return hashlib.sha1(blob).hexdigest()[:16]
+
+def scope_partitions(scope: dict) -> Set[PartKey]:
+    return {(t, ln, cd) for ln, t in scope["terms_by_list"].items() for cd in scope["finance_cds"]}
+
+
+class ScopeIndex:
+    def __init__(self, root: str, size_limit_mb: float = MASTER_STORE["size_limit_mb"],
+                 max_scopes: int = MASTER_STORE["max_scopes"]):
+        self.path = os.path.join(root, SCOPES_NAME)
+        self.size_limit = int(size_limit_mb * 1024 * 1024) if size_limit_mb else 0
+        self.max_scopes = int(max_scopes or 0)
+        self._lock = threading.RLock()
+        self.entries: Dict[str, dict] = self._load()
+
+    def _load(self) -> Dict[str, dict]:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f).get("scopes", {})
+        except (OSError, ValueError):
+            return {}
+
+    def save(self) -> None:
+        with self._lock:
+            tmp = f"{self.path}.tmp{threading.get_ident()}"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"scopes": self.entries}, f, ensure_ascii=False, separators=(",", ":"))
+            os.replace(tmp, self.path)
+
+    def touch(self, scope: dict) -> str:
+        """Registers (or refreshes) a scope as most recently used; returns its key."""
+        key = scope_key(scope)
+        with self._lock:
+            entry = self.entries.setdefault(key, {"scope": scope, "created": time.time(), "hits": 0})
+            entry["last_used"] = time.time()
+            entry["hits"] += 1
+            self.save()
+        return key
+
+    def bump(self, key: str) -> None:
+        """Marks a scope used without writing the index (persisted with the next touch)."""
+        with self._lock:
+            if key in self.entries:
+                self.entries[key]["last_used"] = time.time()
+                self.entries[key]["hits"] += 1
+
+    def lru_order(self) -> List[str]:
+        with self._lock:
+            return sorted(self.entries, key=lambda k: self.entries[k].get("last_used", 0))
+
+    def evict(self, store, keep: Optional[str] = None) -> Tuple[int, int]:
+        """
+        Drops least recently used scopes until the store fits the budget.
+        Returns (scopes dropped, partitions deleted).
+        """
+        with self._lock:
+            sizes = store.partition_sizes()
+            used = sum(sizes.values())
+            if (not self.size_limit or used <= self.size_limit) and \
+                    (not self.max_scopes or len(self.entries) <= self.max_scopes):
+                return 0, 0
+
+            refs: Dict[PartKey, int] = {}
+            for e in self.entries.values():
+                for p in scope_partitions(e["scope"]):
+                    refs[p] = refs.get(p, 0) + 1
+            protected = scope_partitions(self.entries[keep]["scope"]) if keep in self.entries else set()
+
+            # partitions no scope points at (legacy import, dropped lists) go first
+            doomed = [p for p in sizes if p not in refs and p not in protected]
+            dropped = 0
+            for key in self.lru_order():
+                over_size = self.size_limit and used - sum(sizes[p] for p in doomed) > self.size_limit
+                over_count = self.max_scopes and len(self.entries) > self.max_scopes
+                if not (over_size or over_count):
+                    break
+                if key == keep:
+                    continue
+                for p in scope_partitions(self.entries[key]["scope"]):
+                    if p in refs:
+                        refs[p] -= 1
+                        if refs[p] == 0 and p in sizes and p not in protected:
+                            doomed.append(p)
+                del self.entries[key]
+                dropped += 1
+
+            for p in doomed:
+                store.delete_partition(*p)
+            store.coverage.save()
+            self.save()
+        freed = sum(sizes[p] for p in doomed)
+        print(f"[store] evicted {dropped} scope(s), {len(doomed)} partition(s), {freed / 1e6:.1f} MB "
+              f"(budget {self.size_limit / 1e6:.0f} MB)")
+        return dropped, len(doomed)
@@ -0,0 +1,162 @@
+# scope_memo.py
+"""
+In-memory answers for requests contained in a scope that is already loaded.
+
+The last few loaded scopes stay in memory with their frame and a few
+precomputed row arrays (firm code, list code, month). A request is served
+from an entry when:
+- its finance_cds are a subset of the entry's firms
+- its [start, end] lies inside the entry's period
+- each of its lists is in the entry, read from the same fetched term
+  (term_derivation.fetch_terms: only stock-like lists are derived, the rest
+  are fetched per term, so a Y request is never cut out of their Q rows) and with the same term or one
+  whose months are a subset (Y from H or Q, H from Q)
+
+The answer is a vectorized row mask over those arrays; nothing is read from
+disk or reparsed. It is copy-free only in two cases: an exact match (a
+shallow copy of the entry) and a subset whose rows are one contiguous run
+(the entry is sorted by term, then firm: adjacent firms over the whole
+period). Every other subset -- a period window, Q to H/Y, closed firms left
+out -- is a copy made by one gather (take): a pandas frame cannot view a
+scattered row set, and no row order makes both firms and months contiguous. Entries are dropped when the store writes or deletes one
+of their partitions; the loader also vetoes an entry while the coverage
+manifest still has periods due for the request (recent quarters to recheck).
+"""
+
+from __future__ import annotations
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, Optional, Set, Tuple
+
+import numpy as np
+import pandas as pd
+
+from settings import MASTER_STORE
+from _helpers.master_index import rows_view
+from _utils.coverage_manifest import TERM_ENDINGS
+from _utils.scope_index import scope_key, scope_partitions
+
+
+def term_derivable(want: str, have: str, fetched_want: Optional[str] = None, fetched_have: Optional[str] = None) -> bool:
+    """
+    True if `want` periods can be taken from rows loaded with term `have`.
+    fetched_* are the terms actually fetched for each (fetch_terms); rows are
+    only shared when both come from the same one.
+    """
+    if (fetched_want or want) != (fetched_have or have):
+        return False
+    return want == have or (want in TERM_ENDINGS and have in TERM_ENDINGS
+                            and set(TERM_ENDINGS[want]) <= set(TERM_ENDINGS[have]))
+
+
+class _Entry:
+    def __init__(self, scope: dict, df: pd.DataFrame, stored_scope: Optional[dict] = None):
+        self.scope, self.df = scope, df
+        self.key = scope_key(scope)
+        self.stored_scope = stored_scope or scope
+        self.stored_key = scope_key(self.stored_scope)
+        self.firms = frozenset(scope["finance_cds"])
+        self.partitions = scope_partitions(stored_scope or scope)
+        self.cd_codes, self.cd_index = pd.factorize(df["finance_cd"]) if len(df) else (np.empty(0, int), pd.Index([]))
+        self.ln_codes, self.ln_index = pd.factorize(df["list_no"]) if len(df) else (np.empty(0, int), pd.Index([]))
+        self.yyyymm = pd.to_numeric(df["base_month"], errors="coerce").fillna(0).to_numpy(dtype=np.int64) \
+            if len(df) else np.empty(0, np.int64)
+        self.month = self.yyyymm % 100
+
+    def covers(self, scope: dict, stored_scope: Optional[dict] = None) -> bool:
+        """`stored_scope`: the request's scope in fetched terms (default: as requested)."""
+        if scope["startBaseMm"] < self.scope["startBaseMm"] or scope["endBaseMm"] > self.scope["endBaseMm"]:
+            return False
+        have, have_src = self.scope["terms_by_list"], self.stored_scope["terms_by_list"]
+        want_src = (stored_scope or scope)["terms_by_list"]
+        if any(ln not in have or not term_derivable(t, have[ln], want_src.get(ln), have_src.get(ln))
+               for ln, t in scope["terms_by_list"].items()):
+            return False
+        return self.firms.issuperset(scope["finance_cds"])
+
+    def view(self, scope: dict) -> pd.DataFrame:
+        if scope == self.scope:
+            return self.df.copy(deep=False)
+
+        keep_cd = np.zeros(len(self.cd_index) + 1, dtype=bool)
+        keep_cd[self.cd_index.get_indexer(scope["finance_cds"])] = True  # -1 (not loaded) lands on the spare slot
+        keep_cd[-1] = False
+
+        terms = scope["terms_by_list"]
+        month_ok = np.zeros((len(self.ln_index), 13), dtype=bool)
+        for i, ln in enumerate(self.ln_index):
+            if ln in terms:
+                month_ok[i, [int(e) for e in TERM_ENDINGS.get(terms[ln], ())]] = True
+
+        mask = keep_cd[self.cd_codes] & month_ok[self.ln_codes, self.month]
+        mask &= (self.yyyymm >= int(scope["startBaseMm"])) & (self.yyyymm <= int(scope["endBaseMm"]))
+        out = rows_view(self.df, np.flatnonzero(mask))  # no copy only when the rows are one run; else a gather
+
+        relabel = {ln: t for ln, t in terms.items() if self.scope["terms_by_list"].get(ln) != t}
+        if relabel:
+            out = out.copy(deep=False)
+            out["term"] = out["list_no"].map(relabel).fillna(out["term"])
+        return out.reset_index(drop=True)
+
+
+class ScopeMemo:
+    def __init__(self, max_entries: int = MASTER_STORE["memory_scopes"]):
+        self.max_entries = max(0, int(max_entries))
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = 0
+
+    def lookup(self, scope: dict, accept: Optional[Callable[[dict], bool]] = None,
+               stored_scope: Optional[dict] = None) -> Optional[Tuple[pd.DataFrame, str]]:
+        """
+        (view, scope-index key of the containing entry), or None. `stored_scope` is the
+        request in fetched terms, as for add(); `accept(entry_scope)` can veto an entry.
+        """
+        with self._lock:
+            for key in reversed(self._entries):
+                entry = self._entries[key]
+                if entry.covers(scope, stored_scope) and (accept is None or accept(entry.scope)):
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    break
+            else:
+                self.misses += 1
+                return None
+        return entry.view(scope), entry.stored_key
+
+    def add(self, scope: dict, df: pd.DataFrame, stored_scope: Optional[dict] = None) -> None:
+        """`stored_scope` is the scope as read from the store (derived terms mapped to their source)."""
+        if not self.max_entries:
+            return
+        entry = _Entry(scope, df, stored_scope)
+        with self._lock:
+            # a new entry makes the ones it contains redundant
+            for key in [k for k, e in self._entries.items() if entry.covers(e.scope, e.stored_scope)]:
+                del self._entries[key]
+            self._entries[entry.key] = entry
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, partitions: Iterable[Tuple[str, str, str]]) -> None:
+        """Drops entries that use any of the (term, list_no, finance_cd) partitions just changed."""
+        touched: Set[Tuple[str, str, str]] = set(partitions)
+        with self._lock:
+            for key in [k for k, e in self._entries.items() if not e.partitions.isdisjoint(touched)]:
+                del self._entries[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+_MEMOS: Dict[str, ScopeMemo] = {}
+_MEMOS_LOCK = threading.Lock()
+
+def get_scope_memo(store) -> ScopeMemo:
+    """One memo per store, invalidated by the store's writes."""
+    with _MEMOS_LOCK:
+        memo = _MEMOS.get(store.root)
+        if memo is None:
+            memo = _MEMOS[store.root] = ScopeMemo()
+            store.on_change.append(memo.invalidate)
+        return memo
@@ -0,0 +1,237 @@
+# sqlite_store.py
+"""
+SQLite backend for the master store (MASTER_STORE["backend"] = "sqlite").
+
+    <root>/master.db
+      fact(finance_cd, list_no, column_id, base_month, term, account_cd, value)
+          PRIMARY KEY (finance_cd, list_no, column_id, base_month, term, account_cd), WITHOUT ROWID
+      dim_list(list_no, list_nm)
+      dim_account(list_no, account_cd, account_nm)
+      dim_column(list_no, account_cd, column_id, column_nm)
+
+- names live once in the dimension tables, the fact table holds codes and values
+- write() is a bulk upsert (new values win) in one transaction
+- query() reads one slice (firms x list x column x months) from the
+  primary-key index without loading the scope; the app does not use it yet:
+  a run still reads its whole scope (read()) into the dataset registry,
+  because the sections aggregate over the market (shares, ranks), so the
+  app's memory grows with the scope either way
+- same interface as MasterStore (read / write / coverage / scopes / ...), so
+  build_master uses either backend unchanged; a "partition" is the
+  (term, list_no, finance_cd) group of fact rows
+
+The database sits in the store root next to the coverage / scope sidecars.
+(cache/cache.db is diskcache's own database and is not reused for this.)
+"""
+
+from __future__ import annotations
+import os
+import sqlite3
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+from settings import MASTER_STORE
+from _utils.coverage_manifest import CoverageManifest
+from _utils.master_store import KEY_COLUMNS, MASTER_COLUMNS, SCHEMA_VERSION, conform
+from _utils.scope_index import ScopeIndex
+
+DB_NAME = "master.db"
+_ROW_BYTES = 48  # rough on-disk bytes per fact row, for the scope index's budget
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS fact (
+    finance_cd TEXT NOT NULL, list_no TEXT NOT NULL, column_id TEXT NOT NULL, base_month TEXT NOT NULL,
+    term TEXT NOT NULL, account_cd TEXT NOT NULL, value REAL,
+    PRIMARY KEY (finance_cd, list_no, column_id, base_month, term, account_cd)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS dim_list (list_no TEXT PRIMARY KEY, list_nm TEXT) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS dim_account (
+    list_no TEXT NOT NULL, account_cd TEXT NOT NULL, account_nm TEXT, PRIMARY KEY (list_no, account_cd)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS dim_column (
+    list_no TEXT NOT NULL, account_cd TEXT NOT NULL, column_id TEXT NOT NULL, column_nm TEXT,
+    PRIMARY KEY (list_no, account_cd, column_id)
+) WITHOUT ROWID;
+"""
+
+_SELECT = """
+SELECT f.list_no, l.list_nm, f.finance_cd, f.term, f.base_month, f.account_cd, a.account_nm,
+       f.column_id, c.column_nm, f.value
+FROM fact f
+LEFT JOIN dim_list l    ON l.list_no = f.list_no
+LEFT JOIN dim_account a ON a.list_no = f.list_no AND a.account_cd = f.account_cd
+LEFT JOIN dim_column c  ON c.list_no = f.list_no AND c.account_cd = f.account_cd AND c.column_id = f.column_id
+"""
+
+
+class SqliteMasterStore:
+    fmt = "sqlite"
+
+    def __init__(self, root: str = MASTER_STORE["root"]):
+        self.root = root
+        self.path = os.path.join(root, DB_NAME)
+        os.makedirs(root, exist_ok=True)
+        self._local = threading.local()
+        self._lock = threading.RLock()
+        with self._conn() as con:
+            con.executescript(_SCHEMA)
+        self.coverage = CoverageManifest(root, SCHEMA_VERSION, self.fmt)
+        self.scopes = ScopeIndex(root)
+        self.on_change: List[Callable[[Iterable[Tuple[str, str, str]]], None]] = []
+
+    def _conn(self) -> sqlite3.Connection:
+        con = getattr(self._local, "con", None)
+        if con is None:
+            con = sqlite3.connect(self.path, timeout=30)
+            con.execute("PRAGMA journal_mode=WAL")
+            con.execute("PRAGMA synchronous=NORMAL")
+            self._local.con = con
+        return con
+
+    def _changed(self, partitions: Iterable[Tuple[str, str, str]]) -> None:
+        partitions = list(partitions)
+        for fn in self.on_change:
+            fn(partitions)
+
+    # ---------- read ----------
+    def _where(self, terms_by_list: Optional[Dict[str, str]], finance_cds: Optional[Iterable[str]],
+               startBaseMm: Optional[str], endBaseMm: Optional[str],
+               eq: Optional[Dict[str, Sequence[str]]] = None) -> Tuple[str, list]:
+        """WHERE clause and its parameters; `eq` maps a fact column to its allowed values."""
+        clauses, args = [], []
+        if terms_by_list:
+            pairs = sorted(terms_by_list.items())
+            clauses.append("(" + " OR ".join("(f.list_no = ? AND f.term = ?)" for _ in pairs) + ")")
+            args += [v for p in pairs for v in p]
+        if finance_cds is not None:
+            clauses.append("f.finance_cd IN (SELECT cd FROM temp.want_cd)")
+        if startBaseMm:
+            clauses.append("f.base_month >= ?"); args.append(startBaseMm)
+        if endBaseMm:
+            clauses.append("f.base_month <= ?"); args.append(endBaseMm)
+        for col, vals in (eq or {}).items():
+            clauses.append(f"f.{col} = ?" if len(vals) == 1 else f"f.{col} IN ({','.join('?' * len(vals))})")
+            args += list(vals)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", args
+
+    def _want(self, con: sqlite3.Connection, finance_cds: Optional[Iterable[str]]) -> None:
+        if finance_cds is None:
+            return
+        con.execute("CREATE TEMP TABLE IF NOT EXISTS want_cd (cd TEXT PRIMARY KEY)")
+        con.execute("DELETE FROM temp.want_cd")
+        con.executemany("INSERT OR IGNORE INTO temp.want_cd VALUES (?)", [(str(cd),) for cd in finance_cds])
+
+    def read(
+        self,
+        terms_by_list: Optional[Dict[str, str]] = None,
+        finance_cds: Optional[Iterable[str]] = None,
+        startBaseMm: Optional[str] = None,
+        endBaseMm: Optional[str] = None,
+        columns: Optional[Sequence[str]] = None,
+    ) -> pd.DataFrame:
+        columns = list(columns or MASTER_COLUMNS)
+        con = self._conn()
+        self._want(con, finance_cds)
+        where, args = self._where(terms_by_list, finance_cds, startBaseMm, endBaseMm)
+        df = pd.read_sql_query(_SELECT + where, con, params=args)
+        return self._typed(df)[columns]
+
+    def query(
+        self,
+        finance_cds: Optional[Iterable[str]],
+        list_no: str,
+        *,
+        column_id: Optional[str] = None,
+        term: Optional[str] = None,
+        startBaseMm: Optional[str] = None,
+        endBaseMm: Optional[str] = None,
+        account_cds: Optional[Iterable[str]] = None,
+    ) -> pd.DataFrame:
+        """One list's rows (x one column / term / accounts) for `finance_cds` (None = all) over a month window."""
+        eq = {"list_no": [list_no]}
+        if column_id:
+            eq["column_id"] = [column_id]
+        if term:
+            eq["term"] = [term]
+        if account_cds is not None:
+            eq["account_cd"] = [str(a) for a in account_cds]
+        con = self._conn()
+        self._want(con, finance_cds)
+        where, args = self._where(None, finance_cds, startBaseMm, endBaseMm, eq)
+        return self._typed(pd.read_sql_query(_SELECT + where, con, params=args))
+
+    @staticmethod
+    def _typed(df: pd.DataFrame) -> pd.DataFrame:
+        for c in MASTER_COLUMNS:
+            df[c] = df[c].astype("float64") if c == "value" else df[c].fillna("").astype(str)
+        return df
+
+    # ---------- write ----------
+    def write(self, df_new: pd.DataFrame) -> int:
+        """Bulk upsert (new values win). Returns the number of (term, list_no, finance_cd) groups touched."""
+        if df_new is None or df_new.empty:
+            return 0
+        df = conform(df_new)
+        fact = df[["finance_cd", "list_no", "column_id", "base_month", "term", "account_cd", "value"]]
+        rows = [(*r[:6], None if r[6] != r[6] else r[6]) for r in fact.itertuples(index=False, name=None)]
+        lists = df[["list_no", "list_nm"]].drop_duplicates("list_no")
+        accts = df[["list_no", "account_cd", "account_nm"]].drop_duplicates(["list_no", "account_cd"])
+        cols = df[["list_no", "account_cd", "column_id", "column_nm"]].drop_duplicates(["list_no", "account_cd", "column_id"])
+        written = list(df[["term", "list_no", "finance_cd"]].drop_duplicates().itertuples(index=False, name=None))
+        with self._lock:
+            con = self._conn()
+            with con:
+                con.executemany(
+                    "INSERT INTO fact VALUES (?,?,?,?,?,?,?) "
+                    "ON CONFLICT (finance_cd, list_no, column_id, base_month, term, account_cd) "
+                    "DO UPDATE SET value = excluded.value", rows)
+                con.executemany("INSERT OR REPLACE INTO dim_list VALUES (?,?)", lists.itertuples(index=False, name=None))
+                con.executemany("INSERT OR REPLACE INTO dim_account VALUES (?,?,?)", accts.itertuples(index=False, name=None))
+                con.executemany("INSERT OR REPLACE INTO dim_column VALUES (?,?,?,?)", cols.itertuples(index=False, name=None))
+            self.coverage.add_rows(df)
+            self.coverage.save()
+            self._changed(written)
+        return len(written)
+
+    def replace_partition(self, term: str, list_no: str, finance_cd: str, df: pd.DataFrame) -> None:
+        with self._lock:
+            self.delete_partition(term, list_no, finance_cd)
+            self.write(df)
+
+    def delete_partition(self, term: str, list_no: str, finance_cd: str) -> None:
+        with self._lock:
+            con = self._conn()
+            with con:
+                con.execute("DELETE FROM fact WHERE finance_cd = ? AND list_no = ? AND term = ?", (finance_cd, list_no, term))
+            self.coverage.forget(term, list_no, finance_cd)
+            self._changed([(term, list_no, finance_cd)])
+
+    # ---------- bookkeeping (MasterStore interface) ----------
+    def partition_sizes(self) -> Dict[Tuple[str, str, str], int]:
+        q = "SELECT term, list_no, finance_cd, COUNT(*) FROM fact GROUP BY term, list_no, finance_cd"
+        return {(t, ln, cd): n * _ROW_BYTES for t, ln, cd, n in self._conn().execute(q)}
+
+    def is_empty(self) -> bool:
+        return self._conn().execute("SELECT 1 FROM fact LIMIT 1").fetchone() is None
+
+    def ensure_coverage(self) -> None:
+        if not self.coverage.valid:
+            with self._lock:
+                self.coverage.rebuild(self.read(columns=KEY_COLUMNS))
+                self.coverage.save()
+
+    def latest_month(self, term: str) -> Optional[str]:
+        if self.coverage.valid:
+            return self.coverage.latest_month(term)
+        row = self._conn().execute("SELECT MAX(base_month) FROM fact WHERE term = ?", (term,)).fetchone()
+        return row[0] if row and row[0] else None
+
+    def import_csv(self, csv_path: str) -> int:
+        """One-time migration from the legacy master_df.csv."""
+        df = pd.read_csv(csv_path, dtype=str, encoding="utf-8-sig")
+        df["finance_cd"] = df["finance_cd"].str.strip().str.extract(r"(\d+)", expand=False).fillna("").str.zfill(7)
+        n = self.write(df)
+        print(f"[store] imported {len(df):,} rows from {csv_path} into {self.path}.")
+        return n
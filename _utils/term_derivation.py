@@ -0,0 +1,59 @@
+# term_derivation.py
+"""
+Which term to fetch for each list, and H/Y rows synthesized from quarterly ones.
+
+- TERM_DERIVATION["kinds"] marks each known list stock-like (period-end
+  balances, counts, ratios) or flow-like; a list not in it is "unknown"
+- a stock-like list that publishes Q (fisis_list_terms_map.csv) is fetched as
+  Q for H and Y requests too: the H/Y observations are its 06/12 quarter-end
+  rows, the same month selection _filter_master_data_for_section does
+- flow-like and unknown lists, and lists without Q, are fetched in the
+  requested term: a list is derived only once it is listed as stock
+
+fetch_terms() maps the requested {list_no: term} to the fetched one;
+derive_rows() turns the fetched rows back into the requested terms.
+"""
+
+from __future__ import annotations
+from typing import Dict, Optional, Set
+
+import pandas as pd
+
+from settings import TERM_DERIVATION
+from _utils.coverage_manifest import TERM_ENDINGS
+
+
+def list_kind(list_no: str, kinds: Optional[Dict[str, str]] = None) -> str:
+    """'stock', 'flow' or 'unknown' (not in TERM_DERIVATION["kinds"])."""
+    kinds = TERM_DERIVATION["kinds"] if kinds is None else kinds
+    return kinds.get(list_no, "unknown")
+
+def fetch_terms(
+    terms_by_list: Dict[str, str],
+    supported: Dict[str, Set[str]],
+    kinds: Optional[Dict[str, str]] = None,
+    enabled: bool = TERM_DERIVATION["enabled"],
+) -> Dict[str, str]:
+    """{list_no: term to fetch}; differs from the request only where the term is derived from Q."""
+    out = dict(terms_by_list)
+    if not enabled:
+        return out
+    for ln, t in terms_by_list.items():
+        if t != "Q" and t in TERM_ENDINGS and "Q" in supported.get(ln, ()) and list_kind(ln, kinds) == "stock":
+            out[ln] = "Q"
+    return out
+
+def derive_rows(df: pd.DataFrame, terms_by_list: Dict[str, str], fetched: Dict[str, str]) -> pd.DataFrame:
+    """Keeps the requested term's months of derived lists and relabels their term."""
+    derived = {ln: t for ln, t in terms_by_list.items() if fetched.get(ln, t) != t}
+    if df.empty or not derived:
+        return df
+    target = df["list_no"].map(derived)
+    is_derived = target.notna()
+    month = df["base_month"].str[4:6]
+    keep = ~is_derived
+    for t in set(derived.values()):
+        keep |= (target == t) & month.isin(TERM_ENDINGS[t])
+    out = df[keep].copy()
+    out["term"] = target[keep].fillna(out["term"])
+    return out.reset_index(drop=True)
@@ -0,0 +1,163 @@
+# xml_stream.py
+"""
+Streaming decoder for statisticsInfoSearch responses.
+
+- EUC-KR bytes are decoded incrementally and fed to an XMLPullParser chunk
+  by chunk (no full str, no full ElementTree)
+- each <row> is handled on its end event and then detached from the tree
+- unwanted accounts are dropped by set membership before any column work
+- kept cells go straight into typed column buffers (MasterColumns)
+"""
+
+from __future__ import annotations
+import codecs
+import math
+import sys
+import xml.etree.ElementTree as ET
+from array import array
+from typing import Dict, Iterable, List, Optional
+
+import pandas as pd
+
+MASTER_COLUMNS = [
+    "list_no","list_nm","finance_cd","term","base_month",
+    "account_cd","account_nm","column_id","column_nm","value"
+]
+_STR_COLUMNS = MASTER_COLUMNS[:-1]
+_NAN = math.nan
+
+
+def _intern(s: Optional[str]) -> str:
+    return sys.intern((s or "").strip())
+
+def _to_float(s: Optional[str]) -> float:
+    if s is None:
+        return _NAN
+    s = s.strip()
+    if not s:
+        return _NAN
+    try:
+        return float(s)
+    except ValueError:
+        return _NAN
+
+
+class MasterColumns:
+    """
+    Append-only columnar buffer in master-frame layout.
+    String columns hold interned str (one object per distinct code/name),
+    `value` is an array('d') with NaN for blanks.
+    """
+
+    __slots__ = ("cols", "value")
+
+    def __init__(self):
+        self.cols: Dict[str, List[str]] = {c: [] for c in _STR_COLUMNS}
+        self.value = array("d")
+
+    def __len__(self) -> int:
+        return len(self.value)
+
+    def append(self, list_no, list_nm, finance_cd, term, base_month,
+               account_cd, account_nm, column_id, column_nm, value: float) -> None:
+        c = self.cols
+        c["list_no"].append(list_no)
+        c["list_nm"].append(list_nm)
+        c["finance_cd"].append(finance_cd)
+        c["term"].append(term)
+        c["base_month"].append(base_month)
+        c["account_cd"].append(account_cd)
+        c["account_nm"].append(account_nm)
+        c["column_id"].append(column_id)
+        c["column_nm"].append(column_nm)
+        self.value.append(value)
+
+    def extend(self, other: "MasterColumns") -> "MasterColumns":
+        for k, v in other.cols.items():
+            self.cols[k].extend(v)
+        self.value.extend(other.value)
+        return self
+
+    def to_frame(self) -> pd.DataFrame:
+        data = {k: v for k, v in self.cols.items()}
+        data["value"] = pd.Series(self.value, dtype="float64") if len(self.value) else pd.Series([], dtype="float64")
+        return pd.DataFrame(data, columns=MASTER_COLUMNS)
+
+    @classmethod
+    def concat(cls, parts: Iterable["MasterColumns"]) -> "MasterColumns":
+        out = cls()
+        for p in parts:
+            out.extend(p)
+        return out
+
+
+def stream_rows(
+    chunks: Iterable[bytes],
+    *,
+    list_no: str,
+    finance_cd: str,
+    term: str,
+    list_nm: str = "",
+    acct_map: Optional[Dict[str, str]] = None,
+    col_map: Optional[Dict[str, str]] = None,
+    encoding: str = "euc-kr",
+    out: Optional[MasterColumns] = None,
+    meta: Optional[Dict[str, str]] = None,
+) -> tuple[MasterColumns, int]:
+    """
+    Parses one response body given as byte chunks.
+    Returns (buffer, rows_seen) where rows_seen counts every <row>, kept or not.
+    Accounts not in `acct_map` are skipped (no filter when the map is empty).
+    If `meta` is given, the response's err_cd / err_msg are written into it.
+    """
+    acct_map = acct_map or {}
+    col_map = col_map or {}
+    keep_accounts = frozenset(c for c in acct_map if c)
+    column_ids = [(_intern(c), _intern(col_map.get(c, ""))) for c in sorted(c for c in col_map if c)]
+
+    buf = out if out is not None else MasterColumns()
+    if not column_ids:
+        return buf, 0
+
+    list_no, list_nm, term = _intern(list_no), _intern(list_nm), _intern(term)
+    task_cd = _intern(finance_cd)
+    names: Dict[str, str] = {}
+
+    decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+    parser = ET.XMLPullParser(events=("start", "end"))
+    stack: List[ET.Element] = []
+    rows_seen = 0
+
+    def drain() -> None:
+        nonlocal rows_seen
+        for event, elem in parser.read_events():
+            if event == "start":
+                stack.append(elem)
+                continue
+            stack.pop()
+            if elem.tag != "row":
+                if meta is not None and elem.tag in ("err_cd", "err_msg"):
+                    meta[elem.tag] = (elem.text or "").strip()
+                continue
+            rows_seen += 1
+            a_cd = _intern(elem.findtext("account_cd"))
+            if not keep_accounts or not a_cd or a_cd in keep_accounts:
+                a_nm = names.get(a_cd)
+                if a_nm is None:
+                    a_nm = names[a_cd] = _intern(acct_map[a_cd] if a_cd in acct_map else elem.findtext("account_nm"))
+                base_month = _intern(elem.findtext("base_month"))
+                row_cd = _intern(elem.findtext("finance_cd")) or task_cd
+                for col_id, col_nm in column_ids:
+                    buf.append(list_no, list_nm, row_cd, term, base_month,
+                               a_cd, a_nm, col_id, col_nm, _to_float(elem.findtext(col_id)))
+            if stack:
+                stack[-1].remove(elem)
+
+    for chunk in chunks:
+        if chunk:
+            parser.feed(decoder.decode(chunk))
+            drain()
+    parser.feed(decoder.decode(b"", final=True))
+    parser.close()
+    drain()
+    return buf, rows_seen
@@ -27,6 +27,47 @@ def _calculate_delta_series(value_series: pd.Series, term: str) -> Dict[str, pd.
         "2y": delta_2y.fillna(0),
     }
 
+DELTA_STYLES = {
+    "prev": {"dash": "solid", "name": "vs Prev"},
+    "1y": {"dash": "dash", "name": "vs 1Y"},
+    "2y": {"dash": "dot", "name": "vs 2Y"},
+}
+DELTA_COLORS = ["#1f77b4", "#7f7f7f", "#ff7f0e", "#2ca02c", "#d62728", "#9467bd"]
+
+def delta_entity_style(color_idx: int) -> Dict[str, str]:
+    """The trace properties that depend on an entity's position, as {dotted.path: value}."""
+    color = DELTA_COLORS[color_idx % len(DELTA_COLORS)]
+    return {"marker.color": color, "line.color": color, "textfont.color": color}
+
+def delta_entity_traces(
+    entity_name: str,
+    values: pd.Series,
+    term: str,
+    color_idx: int,
+    is_primary_entity: bool = False,
+    view_selection: str = 'all',
+) -> List[go.Scatter]:
+    """One entity's % change lines (one per delta type shown)."""
+    deltas = _calculate_delta_series(values, term)
+    color = DELTA_COLORS[color_idx % len(DELTA_COLORS)]
+    traces = []
+    for delta_type, series in deltas.items():
+        if view_selection != 'all' and delta_type != view_selection:
+            continue
+        traces.append(go.Scatter(
+            x=series.index,
+            y=series.values,
+            name=f"{entity_name} {DELTA_STYLES[delta_type]['name']}",
+            mode='lines+markers+text' if is_primary_entity else 'lines',
+            text=[f"{y:.1f}" for y in series.values] if is_primary_entity else None,
+            textposition="top center",
+            textfont=dict(size=8, color=color),
+            marker=dict(size=5, color=color),
+            line=dict(dash=DELTA_STYLES[delta_type]['dash'], color=color),
+            hovertemplate="%{y:.2f}%<extra></extra>"
+        ))
+    return traces
+
 def make_delta_plot(
     data_by_entity: Dict[str, pd.DataFrame],
     selected_firm_name: str,
@@ -35,43 +76,14 @@ def make_delta_plot(
 ) -> go.Figure:
     """Creates the % change line chart."""
     fig = go.Figure()
-    
-    styles = {
-        "prev": {"dash": "solid", "name": "vs Prev"},
-        "1y": {"dash": "dash", "name": "vs 1Y"},
-        "2y": {"dash": "dot", "name": "vs 2Y"},
-    }
-    
-    colors = ["#1f77b4", "#7f7f7f", "#ff7f0e", "#2ca02c", "#d62728", "#9467bd"]
     color_idx = 0
 
     for entity_name, df_values in data_by_entity.items():
         if df_values.empty:
             continue
-            
-        deltas = _calculate_delta_series(df_values, term)
-        color = colors[color_idx % len(colors)]
+        is_primary_entity = entity_name in [selected_firm_name, "Market"]
+        fig.add_traces(delta_entity_traces(entity_name, df_values, term, color_idx, is_primary_entity, view_selection))
         color_idx += 1
-
-        for delta_type, series in deltas.items():
-            if view_selection != 'all' and delta_type != view_selection:
-                continue
-
-
-            is_primary_entity = entity_name in [selected_firm_name, "Market"]
-            
-            fig.add_trace(go.Scatter(
-                x=series.index,
-                y=series.values,
-                name=f"{entity_name} {styles[delta_type]['name']}",
-                mode='lines+markers+text' if is_primary_entity else 'lines',
-                text=[f"{y:.1f}" for y in series.values] if is_primary_entity else None,
-                textposition="top center",
-                textfont=dict(size=8, color=color),
-                marker=dict(size=5, color=color),
-                line=dict(dash=styles[delta_type]['dash'], color=color),
-                hovertemplate="%{y:.2f}%<extra></extra>"
-            ))
             
     fig.update_layout(
         title_text="값 증감률 vs 이전 값", font=dict(size=12),
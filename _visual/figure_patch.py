@@ -0,0 +1,92 @@
+# figure_patch.py
+"""
+Incremental figure updates for compare toggles (dash.Patch).
+
+A section figure is described by its owners: [owner, n_traces, style] in trace
+order -- which firm (or fixed entity) drew which consecutive traces, and the
+properties that depend on its position (pattern, color, offsetgroup ...) as
+{dotted.path: value}. That list is kept next to the figure in a per-section
+owners store, with a signature of every input other than the compared firms.
+
+When only the compared firms changed and the signature still matches,
+patch_owned_traces() turns old and wanted owners into a Patch: delete the
+traces of owners that left, restyle kept owners whose position changed, append
+the traces of new owners. It declines (returns None) whenever the result would
+differ from a rebuild, and the callback rebuilds instead.
+"""
+
+from __future__ import annotations
+import hashlib
+import json
+from typing import List, Optional, Tuple
+
+from dash import Patch
+
+
+def figure_sig(*parts) -> str:
+    blob = json.dumps(parts, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha1(blob.encode("utf-8")).hexdigest()[:16]
+
+def only_triggered_by(ctx, input_type: str) -> bool:
+    """True if the callback fired for `input_type` (a pattern-matching id type) alone."""
+    trig = ctx.triggered_id
+    return isinstance(trig, dict) and trig.get("type") == input_type and len(ctx.triggered) == 1
+
+def sub_state(states, i: int, sig: str) -> Optional[dict]:
+    """The owners state of sub-plot i, if it was stored for the same signature."""
+    st = states[i] if isinstance(states, list) and i < len(states) else None
+    return st if isinstance(st, dict) and st.get("sig") == sig else None
+
+
+def _assign(node, path: str, value) -> None:
+    keys = path.split(".")
+    for k in keys[:-1]:
+        node = node[k]
+    node[keys[-1]] = value
+
+def patch_owned_traces(old_owners: List[list], wanted: List[list]) -> Optional[Tuple[Patch, List[list]]]:
+    """
+    old_owners: [[owner, n_traces, style], ...] as stored with the figure
+    wanted:     [[owner, style, traces], ...] in the order a rebuild would draw them;
+                traces (plotly trace objects) only for owners not drawn yet, None for kept ones
+    Returns (patch, new_owners), or None when kept owners would change order or a
+    new owner would land between kept ones.
+    """
+    old = {o: (n, st) for o, n, st in old_owners}
+    if len(old) != len(old_owners):
+        return None
+    wanted_ids = [w[0] for w in wanted]
+    kept = [o for o in wanted_ids if o in old]
+    if kept != [o for o, _, _ in old_owners if o in set(kept)]:
+        return None
+    if any(o in old for o in wanted_ids[len(kept):]) or any(o not in old for o in wanted_ids[:len(kept)]):
+        return None
+    if any(w[2] is None for w in wanted if w[0] not in old):
+        return None
+
+    patch = Patch()
+    starts, pos = {}, 0
+    for o, n, _ in old_owners:
+        starts[o], pos = pos, pos + n
+    drop = set(old) - set(wanted_ids)
+    for o, n, _ in reversed(old_owners):  # from the end, so earlier indices stay valid
+        if o in drop:
+            for j in range(starts[o] + n - 1, starts[o] - 1, -1):
+                del patch["data"][j]
+
+    new_owners, added, pos = [], [], 0
+    for o, style, traces in wanted:
+        if o in old:
+            n, old_style = old[o]
+            for path, value in style.items():
+                if old_style.get(path) != value:
+                    for j in range(pos, pos + n):
+                        _assign(patch["data"][j], path, value)
+        else:
+            n = len(traces)
+            added.extend(t.to_plotly_json() if hasattr(t, "to_plotly_json") else t for t in traces)
+        new_owners.append([o, n, style])
+        pos += n
+    if added:
+        patch["data"].extend(added)
+    return patch, new_owners
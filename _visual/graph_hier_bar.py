@@ -6,9 +6,14 @@ from pathlib import Path
 from plotly.colors import qualitative
 
 
+import numpy as np
 import pandas as pd
 import plotly.graph_objects as go
 
+from _helpers.graph import HoverRefs
+from _helpers.master_cube import MasterCube
+from _helpers.master_index import IndexedMaster, as_frame, narrow
+
 BAR_HEIGHT = 300
 DONUT_HEIGHT = 300
 RESCALE_CHOICES = [(1_000_000_000_000, "조"), (1_000_000_000, "십억"), (1_000_000, "백만"), (1_000, "천")]
@@ -27,7 +32,9 @@ def ensure_numeric(v):
     except Exception:
         return 0.0
 
-def months_sorted(df: pd.DataFrame) -> List[str]:
+def months_sorted(df: pd.DataFrame | IndexedMaster | MasterCube) -> List[str]:
+    if isinstance(df, (IndexedMaster, MasterCube)):
+        return df.months()
     return sorted({str(x) for x in df["base_month"].unique()})
 
 
@@ -141,18 +148,21 @@ def get_children(H: dict, parent_cd: Optional[str]) -> List[str]:
     return sorted(kids, key=natural_key)
 
 
-def values_for_accounts(df_master: pd.DataFrame, account_cds: List[str], colid: str) -> pd.DataFrame:
-    m = df_master[(df_master["column_id"] == colid) & (df_master["account_cd"].isin(account_cds))].copy()
+def values_for_accounts(df_master: pd.DataFrame | IndexedMaster | MasterCube, account_cds: List[str], colid: str) -> pd.DataFrame:
+    if isinstance(df_master, MasterCube):
+        return df_master.account_values(account_cds, colid)
+    m = as_frame(narrow(df_master, column_id=colid, account_cd=list(account_cds))).copy()
     if m.empty:
         return pd.DataFrame({"base_month": [], "account_cd": [], "value": []})
     m["base_month"] = m["base_month"].astype(str)
-    m["value"] = m["value"].map(ensure_numeric)
+    if not pd.api.types.is_float_dtype(m["value"]):  # a registry frame is float64 already
+        m["value"] = m["value"].map(ensure_numeric)
     return m.groupby(["base_month", "account_cd"], as_index=False)["value"].sum()
 
 def parent_series_for_list(df_master: pd.DataFrame, Hn: dict, colid: str) -> pd.Series:
     """Total series for a list across months as sum of its top accounts."""
     list_no = Hn["list_no"]
-    df_scoped_to_list = df_master[df_master["list_no"] == list_no]
+    df_scoped_to_list = narrow(df_master, list_no=list_no)
 
     months = months_sorted(df_master)
     tops = get_top_level_accounts(Hn)
@@ -165,6 +175,40 @@ def parent_series_for_list(df_master: pd.DataFrame, Hn: dict, colid: str) -> pd.
     return ser.reindex(months).fillna(0.0)
 
 
+def _node_values(df_master: pd.DataFrame | IndexedMaster | MasterCube, nodes: List[Tuple[str, str, List[str]]],
+                 colid: str, months: List[str]) -> pd.DataFrame:
+    """
+    [base_month, node_id, value] for `nodes` = [(node_id, list_no, account_cds)],
+    each node the sum of its accounts in its list, over every month in `months`
+    (0.0 where it has no rows). One narrow and one groupby for all the nodes.
+    """
+    if not nodes:
+        return pd.DataFrame(columns=["base_month", "node_id", "value"])
+    lists = sorted({ln for _, ln, _ in nodes})
+    accts = sorted({a for _, _, accs in nodes for a in accs})
+    if isinstance(df_master, MasterCube):
+        m = narrow(df_master, list_no=lists, account_cd=accts).cells(colid)
+    else:
+        m = as_frame(narrow(df_master, list_no=lists, column_id=colid, account_cd=accts))
+        m = m[["list_no", "account_cd", "base_month", "value"]].copy()
+        m["base_month"] = m["base_month"].astype(str)
+        if not pd.api.types.is_float_dtype(m["value"]):
+            m["value"] = m["value"].map(ensure_numeric)
+    own = m.groupby(["list_no", "account_cd", "base_month"], as_index=False, observed=True)["value"].sum()
+
+    # (node, list_no, account_cd) pairs; a node's accounts are summed in account order, as the per-node groupby did
+    pairs = pd.DataFrame([(i, ln, a) for i, (_, ln, accs) in enumerate(nodes) for a in dict.fromkeys(accs)],
+                         columns=["node", "list_no", "account_cd"])
+    hits = pairs.merge(own, on=["list_no", "account_cd"]).sort_values(["node", "base_month", "account_cd"], kind="stable")
+    per_node = hits.groupby(["node", "base_month"], sort=False)["value"].sum()
+
+    grid = np.zeros((len(nodes), len(months)))
+    col = pd.Index(months).get_indexer(per_node.index.get_level_values("base_month"))
+    hit = col >= 0
+    grid[per_node.index.get_level_values("node").to_numpy()[hit], col[hit]] = per_node.to_numpy()[hit]
+    return pd.DataFrame({"base_month": list(months) * len(nodes),
+                         "node_id": [nid for nid, _, _ in nodes for _ in months], "value": grid.ravel()})
+
 def node_parent_values(
     df_master: pd.DataFrame,
     hier_by_list: Dict[str, dict],
@@ -178,31 +222,20 @@ def node_parent_values(
 
     if custom_nodes and len(level_path) == 0:
         nodes = custom_nodes[:]
-        rows = []
+        spec = []
         for key in nodes:
             if key.startswith("acc:"):
                 _, listno, acd = key.split(":")
-                scope = df_master[df_master["list_no"] == listno]
-
-                vals = values_for_accounts(scope, [acd], colid)
-
-
-                ser = (vals.groupby("base_month")["value"].sum()
-                       .reindex(months).fillna(0.0)) if not vals.empty else pd.Series(0.0, index=pd.Index(months, name="base_month"))
-                rows.append(pd.DataFrame({"base_month": months, "node_id": key, "value": ser.values}))
+                spec.append((key, listno, [acd]))
             elif key.startswith("list:"):
-                listno = key.split(":")[1]
-                ser = parent_series_for_list(df_master, hier_by_list[listno], colid)
-                rows.append(pd.DataFrame({"base_month": months, "node_id": key, "value": ser.values}))
-        parent_vals = pd.concat(rows, ignore_index=True) if rows else pd.DataFrame(columns=["base_month","node_id","value"])
+                Hn = hier_by_list[key.split(":")[1]]
+                spec.append((key, Hn["list_no"], get_top_level_accounts(Hn)))
+        parent_vals = _node_values(df_master, spec, colid, months)
         return "__CUSTOM__", nodes, parent_vals
 
     if len(list_nos) > 1 and len(level_path) == 0:
-        rows = []
-        for ln in list_nos:
-            ser = parent_series_for_list(df_master, hier_by_list[ln], colid)
-            rows.append(pd.DataFrame({"base_month": months, "node_id": ln, "value": ser.values}))
-        parent_vals = pd.concat(rows, ignore_index=True) if rows else pd.DataFrame(columns=["base_month","node_id","value"])
+        spec = [(ln, hier_by_list[ln]["list_no"], get_top_level_accounts(hier_by_list[ln])) for ln in list_nos]
+        parent_vals = _node_values(df_master, spec, colid, months)
         return "__MULTI__", list_nos[:], parent_vals
 
     if len(level_path) == 0 and len(list_nos) == 1:
@@ -269,21 +302,79 @@ def _sum_over_nodes_in_list(
     (no summing of children). If a node has no own rows for the given colid,
     it contributes zeros.
     """
-    months = months_sorted(df_master)
-    scope = df_master[df_master["list_no"] == list_no]
-    rows = []
+    return _node_values(df_master, [(nid, list_no, [nid]) for nid in node_ids], colid, months_sorted(df_master))
 
-    for nid in node_ids:
-        own = values_for_accounts(scope, [nid], colid)
-        if not own.empty:
-            ser = own.groupby("base_month")["value"].sum().reindex(months).fillna(0.0)
-        else:
-            ser = pd.Series(0.0, index=pd.Index(months, name="base_month"))
-        rows.append(pd.DataFrame({"base_month": months, "node_id": nid, "value": ser.values}))
 
-    return pd.concat(rows, ignore_index=True) if rows else pd.DataFrame(columns=["base_month","node_id","value"])
 
+def bar_color_map(first_firm_df: pd.DataFrame, hier_by_list: Dict[str, dict], list_nos: List[str], colid: str,
+                  level_path: List[str], custom_nodes: Optional[List[str]] = None) -> Dict[str, str]:
+    """Node colors of a stacked bar figure, taken from the first plotted firm's nodes."""
+    _, nodes_for_color, _ = node_parent_values(first_firm_df, hier_by_list, list_nos, colid, level_path, custom_nodes=custom_nodes)
+    return {node_id: qualitative.Plotly[i % len(qualitative.Plotly)] for i, node_id in enumerate(nodes_for_color)}
+
+def bar_firm_style(slot: int, pattern: str, firm_name: str) -> Dict[str, str]:
+    """The trace properties that depend on a firm's slot in firms_to_plot, as {dotted.path: value}."""
+    title = f"{firm_name}{' ('+pattern+')' if pattern else ''}"
+    return {"offsetgroup": str(slot), "marker.pattern.shape": pattern, "legendgroup": title, "legendgrouptitle.text": title}
+
+def hier_firm_bar_traces(
+    hier_by_list: Dict[str, dict],
+    firm_df: pd.DataFrame,
+    firm_cd: str,
+    list_nos: List[str],
+    colid: str,
+    level_path: List[str],
+    months: List[str],
+    color_map: Dict[str, str],
+    slot: int,
+    pattern: str = "",
+    namer=None,
+    custom_nodes: Optional[List[str]] = None,
+    hover_refs: Optional[HoverRefs] = None,
+) -> Tuple[List[go.Bar], List[float]]:
+    """
+    One firm's stacked bars (unscaled y) and the values that count for the unit rescaler.
+    Point customdata are ints into `hover_refs`, the figure's table (a fresh one if None).
+    """
+    hover_refs = hover_refs if hover_refs is not None else HoverRefs()
+    if firm_df.empty:
+        return [], []
+    parent_listno, nodes, parent_vals = node_parent_values(firm_df, hier_by_list, list_nos, colid, level_path, custom_nodes=custom_nodes)
+    if parent_vals.empty:
+        return [], []
+
+    yv = {nid: ser.tolist() for nid, ser in [(nid, (parent_vals[parent_vals["node_id"] == nid].set_index("base_month")["value"].reindex(months).fillna(0.0))) for nid in nodes]}
+    values_for_scaling = [val for subl in yv.values() for val in subl]
+    yv_vis = apply_min_share_matrix(yv, min_share=0.02)
+    firm_name = namer.finance_label(firm_cd, include_id=False) if namer else firm_cd
+    style = bar_firm_style(slot, pattern, firm_name)
+
+    firm_traces = []
+    for n_id in nodes:
+        node_key_for_hover = n_id
+        if parent_listno not in ("__MULTI__", "__CUSTOM__"):
+            trace_name = namer.account_label(parent_listno, n_id, descendent=False, include_id=False)
+            node_key_for_hover = f"acc:{parent_listno}:{n_id}"
+        else:
+            if n_id.startswith("acc:"): _, lst, acd = n_id.split(":"); trace_name = namer.account_label(lst, acd, descendent=False, include_id=False)
+            else: lst = n_id.split(":")[1]; trace_name = namer.list_label(lst, include_id=False)
+
+        firm_traces.append(go.Bar(
+            name=trace_name,
+            x=months,
+            y=yv_vis.get(n_id, []),
+            offsetgroup=style["offsetgroup"],
+            marker=dict(pattern=dict(shape=pattern), color=color_map.get(n_id)),
+            legendgroup=style["legendgroup"],
+            legendgrouptitle_text=style["legendgrouptitle.text"],
+            customdata=[hover_refs.ref(node_key_for_hover, firm_cd)] * len(months),
+            hovertemplate="<extra></extra>"
+        ))
+    return firm_traces, values_for_scaling
 
+def min_abs_nonzero(values) -> Optional[float]:
+    flat = [abs(ensure_numeric(v)) for v in values if ensure_numeric(v) != 0]
+    return min(flat) if flat else None
 
 def make_hier_stacked_figure(
     hier_by_list: Dict[str, dict],
@@ -294,70 +385,49 @@ def make_hier_stacked_figure(
     namer=None,
     custom_nodes: Optional[List[str]] = None,
     firms_to_plot: Optional[Dict[str, dict]] = None,
+    trace_info: Optional[dict] = None,
     ) -> go.Figure:
-    
+    """
+    `trace_info`, if given, is filled with what a compare toggle needs to patch the
+    figure instead of rebuilding it: owners ([firm_cd, n_traces, style] in trace
+    order), each firm's smallest nonzero |value|, the unit scale and the months;
+    and with hover_refs, the table the bars' customdata ints index (HoverRefs).
+    """
     firms_to_plot = firms_to_plot or {}
     months = months_sorted(df_master)
     all_traces = []
     all_values_for_scaling = []
+    owners, mins = [], {}
+    hover_refs = HoverRefs()
 
     first_firm_cd = next(iter(firms_to_plot), None)
     color_map = {}
     if first_firm_cd:
-        first_firm_df = df_master[df_master["finance_cd"] == first_firm_cd]
-        _, nodes_for_color, _ = node_parent_values(first_firm_df, hier_by_list, list_nos, colid, level_path, custom_nodes=custom_nodes)
-        
-        for i, node_id in enumerate(nodes_for_color):
-            color_map[node_id] = qualitative.Plotly[i % len(qualitative.Plotly)]
+        first_firm_df = narrow(df_master, finance_cd=first_firm_cd)
+        color_map = bar_color_map(first_firm_df, hier_by_list, list_nos, colid, level_path, custom_nodes=custom_nodes)
 
     for i, (firm_cd, style_info) in enumerate(firms_to_plot.items()):
         pattern = style_info.get("pattern", "")
-        firm_df = df_master[df_master["finance_cd"] == firm_cd]
-        if firm_df.empty: continue
-
-        parent_listno, nodes, parent_vals = node_parent_values(firm_df, hier_by_list, list_nos, colid, level_path, custom_nodes=custom_nodes)
-        if parent_vals.empty: continue
-
-        yv = {nid: ser.tolist() for nid, ser in [(nid, (parent_vals[parent_vals["node_id"] == nid].set_index("base_month")["value"].reindex(months).fillna(0.0))) for nid in nodes]}
-        all_values_for_scaling.extend([val for subl in yv.values() for val in subl])
-        yv_vis = apply_min_share_matrix(yv, min_share=0.02)
+        firm_df = narrow(df_master, finance_cd=firm_cd)
+        traces, values = hier_firm_bar_traces(hier_by_list, firm_df, firm_cd, list_nos, colid, level_path, months,
+                                              color_map, i, pattern, namer=namer, custom_nodes=custom_nodes,
+                                              hover_refs=hover_refs)
         firm_name = namer.finance_label(firm_cd, include_id=False) if namer else firm_cd
-
-        def generate_traces_for_firm(p_listno, node_list, y_values):
-            firm_traces = []
-            title = f"{firm_name}{' ('+pattern+')' if pattern else ''}"
-            
-            for n_id in node_list:
-                node_key_for_hover = n_id
-                if p_listno not in ("__MULTI__", "__CUSTOM__"):
-                    trace_name = namer.account_label(p_listno, n_id, descendent=False, include_id=False)
-                    node_key_for_hover = f"acc:{p_listno}:{n_id}"
-                else:
-                    if n_id.startswith("acc:"): _, lst, acd = n_id.split(":"); trace_name = namer.account_label(lst, acd, descendent=False, include_id=False)
-                    else: lst = n_id.split(":")[1]; trace_name = namer.list_label(lst, include_id=False)
-                
-                firm_traces.append(go.Bar(
-                    name=trace_name,
-                    x=months, 
-                    y=y_values.get(n_id, []),
-                    offsetgroup=str(i),
-                    marker=dict(pattern=dict(shape=pattern), color=color_map.get(n_id)),
-                    legendgroup=title,
-                    legendgrouptitle_text=title,
-                    customdata=[{"node_key": node_key_for_hover, "firm_cd": firm_cd}] * len(months),
-                    hovertemplate="<extra></extra>"
-                ))
-            return firm_traces
-        
-        all_traces.extend(generate_traces_for_firm(parent_listno, nodes, yv_vis))
+        owners.append([firm_cd, len(traces), bar_firm_style(i, pattern, firm_name)])
+        mins[firm_cd] = min_abs_nonzero(values)
+        all_traces.extend(traces)
+        all_values_for_scaling.extend(values)
 
     scale, unit_lab = select_rescaler_from_values(all_values_for_scaling)
     for trace in all_traces:
         trace.y = [y / scale if y is not None else None for y in trace.y]
+    if trace_info is not None:
+        trace_info.update(owners=owners, mins=mins, scale=scale, months=months, first_firm=first_firm_cd,
+                          hover_refs=hover_refs.to_json())
 
     section_list_nos = set()
     if first_firm_cd:
-        _, final_nodes, _ = node_parent_values(df_master[df_master["finance_cd"] == first_firm_cd], hier_by_list, list_nos, colid, level_path, custom_nodes=custom_nodes)
+        _, final_nodes, _ = node_parent_values(first_firm_df, hier_by_list, list_nos, colid, level_path, custom_nodes=custom_nodes)
         final_parent_listno = "__CUSTOM__"
         if level_path: 
             last_path = level_path[-1]
@@ -373,10 +443,14 @@ def make_hier_stacked_figure(
         else:
             section_list_nos.add(final_parent_listno)
 
-    df_section_specific = df_master[df_master["list_no"].isin(section_list_nos)]
+    df_section_specific = narrow(df_master, list_no=sorted(section_list_nos), column_id=colid)
     y_label = colid
-    if not df_section_specific.empty:
-        col_nm_series = df_section_specific[df_section_specific["column_id"] == colid]["column_nm"]
+    dims = getattr(df_master, "dims", None)
+    if dims is not None:
+        names = dims.column_label(section_list_nos, colid) if not df_section_specific.empty else []
+        if names: y_label = ", ".join(names)
+    elif not df_section_specific.empty and "column_nm" in df_section_specific.columns:
+        col_nm_series = as_frame(df_section_specific)["column_nm"]
         if not col_nm_series.empty: y_label = ", ".join(col_nm_series.unique())
     if unit_lab: y_label = f"{y_label} ({unit_lab})"
             
@@ -469,7 +543,7 @@ def donut_for_hovered_node(
         list_no = hovered_node_key.split(":")[1]
         Hn = hier_by_list[list_no]
         kids = get_top_level_accounts(Hn)
-        scope = df_master[df_master["list_no"] == list_no]
+        scope = narrow(df_master, list_no=list_no)
         vals = values_for_accounts(scope, kids, colid)
         total = (vals.groupby("base_month")["value"].sum().get(safe_month, 0.0)) if not vals.empty else 0.0
 
@@ -509,7 +583,7 @@ def donut_for_hovered_node(
     _, list_no, acd = hovered_node_key.split(":")
     Hn = hier_by_list[list_no]
     kids = get_children(Hn, acd)
-    scope = df_master[df_master["list_no"] == list_no]
+    scope = narrow(df_master, list_no=list_no)
 
     if kids: 
         own_vals = values_for_accounts(scope, [acd], colid)
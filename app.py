@@ -1,6 +1,4 @@
 import re
-import pickle
-from pathlib import Path
 from collections import OrderedDict
 
 import pandas as pd
@@ -8,28 +6,30 @@ from dash import (Dash, dcc, html, Input, Output, State, ALL, MATCH,
                   no_update, callback_context)
 from dash.exceptions import PreventUpdate
 
-from settings import DEFAULTS, PATHS, INDEX_STRING
+from settings import DEFAULTS, PATHS, INDEX_STRING, JOBS, WARMER, WIRE
 from _meta.naming import FISISNamer
 from _visual.graph_hier_bar import load_hierarchy
-from _sections.firm_toolbar import (load_finance_map, make_firm_toolbar,
+from _sections.firm_toolbar import (load_finance_map, make_firm_toolbar, market_finance_cds,
                                       register_firm_toolbar_callbacks)
 from _sections.hier_section import make_hier_sections, register_hier_section_callbacks
 from _sections.profit_section import (make_profit_sections,
                                         register_profit_section_callbacks)
 from _utils.build_master import load_or_build_master_for_market
-from _helpers.filter import _canon_fin_cd_series
+from _utils.cache_warmer import CacheWarmer, serving_process, start_warmer
+from _utils.datasets import put_dataset
+from _utils.jobs import get_job_runner
+from _utils.resource_cache import load_or_build as load_or_build_resources
 
 
 def load_app_resources(paths):
-    """Loads app resources like hier, FIN_MAP, and NAMER, using a cache for speed."""
-    cache_file = Path(paths["cache_master_csv"]).parent / "app_resources.pkl"
-    if cache_file.exists():
-        print("Loading cached resources...")
-        with open(cache_file, 'rb') as f:
-            resources = pickle.load(f)
-        return resources['hier'], resources['FIN_MAP'], resources['NAMER']
-    else:
-        print("Generating and caching resources...")
+    """
+    Loads app resources like hier, FIN_MAP, and NAMER, using a cache for speed.
+    The cache is rebuilt whenever one of the source files (or the resource schema) changes.
+    """
+    sources = {k: paths[k] for k in ("hier_json", "finance_map_csv", "within_naming_csv",
+                                     "list_acc_col_map_csv", "finance_xml")}
+
+    def _build():
         hier = load_hierarchy(paths["hier_json"])
         fin_map = load_finance_map(paths["finance_map_csv"])
         namer = FISISNamer.from_csvs(
@@ -37,9 +37,17 @@ def load_app_resources(paths):
             paths["list_acc_col_map_csv"],
             finance_xml=paths["finance_xml"],
         )
-        with open(cache_file, 'wb') as f:
-            pickle.dump({'hier': hier, 'FIN_MAP': fin_map, 'NAMER': namer}, f)
-        return hier, fin_map, namer
+        return {"hier": hier,
+                "FIN_MAP": {"columns": list(fin_map.columns),
+                            "rows": fin_map.astype(object).where(fin_map.notna(), None).values.tolist()},
+                "NAMER": namer.to_dict()}
+
+    payload, info = load_or_build_resources(paths["app_resources"], sources, _build)
+    fin_map = pd.DataFrame(payload["FIN_MAP"]["rows"], columns=payload["FIN_MAP"]["columns"], dtype=str)
+    namer = FISISNamer.from_dict(payload["NAMER"])
+    print(f"[resources] {'cached' if info['hit'] else 'generated (' + info['reason'] + ')'} "
+          f"in {info['seconds'] * 1000:.0f}ms")
+    return payload["hier"], fin_map, namer
 
 def lists_from_specs(cfgs):
     """Extracts all unique list numbers (e.g., 'SH001') from a list of section configs."""
@@ -52,8 +60,18 @@ def lists_from_specs(cfgs):
             if isinstance(item, str): out.update(pat.findall(item))
     return sorted(out)
 
+def _compress_enabled():
+    if not WIRE.get("compress"):
+        return False
+    try:
+        import flask_compress  # noqa: F401  (Dash(compress=True) needs it)
+    except ImportError:
+        print("[wire] flask-compress is not installed; callback responses go out uncompressed")
+        return False
+    return True
+
 def create_app():
-    app = Dash(__name__, suppress_callback_exceptions=True)
+    app = Dash(__name__, suppress_callback_exceptions=True, compress=_compress_enabled())
     app.index_string = INDEX_STRING
 
     hier, FIN_MAP, NAMER = load_app_resources(PATHS)
@@ -98,20 +116,33 @@ def create_app():
     app.layout = html.Div([
         dcc.Store(id="ft-store-master", data=None),
         dcc.Store(id="ft-store-fin-map", data=FIN_MAP.to_dict("records")),
+        dcc.Store(id="ft-store-job", data=None),
+        dcc.Interval(id="ft-job-poll", interval=JOBS["poll_ms"], disabled=True),
+        html.Div(id="ft-job-overlay", className="loading-overlay", style={"display": "none"}, children=[
+            html.Div(id="ft-job-text", className="loading-text"),
+            html.Button("취소", id="ft-job-cancel", n_clicks=0, className="btn", style={"marginTop": "12px"}),
+        ]),
         make_firm_toolbar(FIN_MAP),
+        html.Div(id="ft-job-status", style={"color": "#c62828", "fontSize": "11px", "padding": "2px 8px"}),
         dcc.Tabs(id="toplevel-tabs", value=first_toplevel_tab_value, children=toplevel_tabs),
         html.Div(id="toplevel-content-wrapper", children=toplevel_content_containers)
     ])
   
+    jobs = get_job_runner()
+
     @app.callback(
-        Output("ft-store-master", "data"),
+        Output("ft-store-job", "data"),
+        Output("ft-job-poll", "disabled"),
         Input("ft-store-run-trigger", "data"),
         State("ft-store-run-params", "data"),
         State("toplevel-tabs", "value"),
         State({"type": "inner-tabs", "group": ALL}, "value"),
+        State("ft-store-job", "data"),
+        State("ft-store-master", "data"),
         prevent_initial_call=True,
     )
-    def _on_run(trigger, params, active_toplevel_tab, active_inner_tabs):
+    def _on_run(trigger, params, active_toplevel_tab, active_inner_tabs, prev_job, prev_master):
+        """Enqueues the market load and returns at once; _poll_job delivers the result."""
         if not trigger or not params: raise PreventUpdate
         
         active_inner_tab = next((v for v in active_inner_tabs if v is not None), None)
@@ -128,13 +159,58 @@ def create_app():
 
         list_nos_to_load = lists_from_specs(visible_section_cfgs)
         print(f"Loading data for {len(list_nos_to_load)} lists required by the active tab...")
-        
-        df_master = load_or_build_master_for_market(financeCds=params.get("entireMarket", []), term=params["term"], startBaseMm=params["startBaseMm"], endBaseMm=params["endBaseMm"], listNo=list_nos_to_load, section_cfgs=all_section_configs, hierarchy_json_path=PATHS["hier_json"], cache_path=PATHS["cache_master_csv"])
-        df_master["finance_cd"] = _canon_fin_cd_series(df_master["finance_cd"])
-        df_master['base_month'] = df_master['base_month'].astype(str)
-        
-        print("Data loading complete!")
-        return df_master.to_dict("records")
+        session = (prev_master or {}).get("session")
+
+        def _load(progress, cancelled):
+            df_master = load_or_build_master_for_market(financeCds=params.get("entireMarket", []), term=params["term"], startBaseMm=params["startBaseMm"], endBaseMm=params["endBaseMm"], listNo=list_nos_to_load, section_cfgs=all_section_configs, hierarchy_json_path=PATHS["hier_json"], cache_path=PATHS["master_store"], progress=progress, cancelled=cancelled)
+            print("Data loading complete!")
+            return put_dataset(df_master, session)  # typed once and kept server-side; the store gets its token
+
+        jobs.cancel(prev_job)  # a new 조회하기 supersedes a running one
+        return jobs.submit(_load, label=f"{params['term']} {params['startBaseMm']}-{params['endBaseMm']}"), False
+
+    @app.callback(
+        Output("ft-store-master", "data"),
+        Output("ft-job-poll", "disabled", allow_duplicate=True),
+        Output("ft-job-overlay", "style"),
+        Output("ft-job-text", "children"),
+        Output("ft-job-status", "children"),
+        Input("ft-job-poll", "n_intervals"),
+        State("ft-store-job", "data"),
+        State("ft-store-master", "data"),
+        prevent_initial_call=True,
+    )
+    def _poll_job(_, job_id, current):
+        info = jobs.info(job_id)
+        if not info:
+            return no_update, True, {"display": "none"}, "", "데이터 조회 작업을 찾을 수 없습니다. 다시 조회하세요."
+        state = info["state"]
+        if state in ("queued", "running"):
+            if info.get("phase") == "fetch" and info.get("total"):
+                msg = f"데이터 조회 중... {info['done']}/{info['total']} 요청 · {info['rows']:,} 행"
+            elif info.get("phase") == "merge":
+                msg = "데이터 병합 중..."
+            else:
+                msg = "데이터 조회 준비 중..."
+            return no_update, False, {}, msg, ""
+        if state == "done":
+            result = jobs.result(job_id)
+            if result is None:  # e.g. the server restarted after the job finished: keep the loaded data
+                return no_update, True, {"display": "none"}, "", "데이터 조회 결과를 찾을 수 없습니다. 다시 조회하세요."
+            return (no_update if result == current else result), True, {"display": "none"}, "", ""
+        status = f"데이터 조회 실패: {info.get('error')}" if state == "failed" else "데이터 조회가 취소되었습니다."
+        return no_update, True, {"display": "none"}, "", status
+
+    @app.callback(
+        Output("ft-job-text", "children", allow_duplicate=True),
+        Input("ft-job-cancel", "n_clicks"),
+        State("ft-store-job", "data"),
+        prevent_initial_call=True,
+    )
+    def _cancel_job(n_clicks, job_id):
+        if not n_clicks or not job_id: raise PreventUpdate
+        jobs.cancel(job_id)
+        return "취소 중..."
 
 
     @app.callback(Output({"type": "toplevel-content", "group": ALL}, "style"), Input("toplevel-tabs", "value"), State({"type": "toplevel-content", "group": ALL}, "id"))
@@ -164,8 +240,17 @@ def create_app():
         elif group_id == "P":
             register_profit_section_callbacks(app, hier, NAMER, list_nos=auto_list_nos, colid=DEFAULTS.get("colid"), term=DEFAULTS.get("term"), section_cfgs=configs)
 
+    app.cache_warmer = None
+    if WARMER.get("enabled"):
+        # prefetches the toolbar's default scope so the first 조회하기 does not wait on FISIS;
+        # started by the entry point in the serving process (start_warmer), not here
+        app.cache_warmer = CacheWarmer(market_finance_cds(FIN_MAP), term=DEFAULTS["term"], startBaseMm=DEFAULTS["startBaseMm"], endBaseMm=DEFAULTS["endBaseMm"], list_nos=auto_list_nos, section_cfgs=all_section_configs, hierarchy_json_path=PATHS["hier_json"], cache_path=PATHS["master_store"], probe_finance_cd=DEFAULTS["target_finance_cd"])
+
     return app
 
 if __name__ == "__main__":
+    debug = False
     app = create_app()
-    app.run(debug=False, port=8055)
+    if app.cache_warmer is not None and serving_process(use_reloader=debug):
+        start_warmer(app.cache_warmer)
+    app.run(debug=debug, port=8055)
@@ -55,7 +55,105 @@ PATHS = {
     "list_acc_col_map_csv":    resource_path("_local/fisis_list_account_column_map.csv"),
     "finance_xml":             resource_path("_local/finance_cd_import_temp.txt"),
     "terms_map_csv":           resource_path("_local/fisis_list_terms_map.csv"),
-    "cache_master_csv":        resource_path("_local/master_df.csv")
+    "cache_master_csv":        resource_path("_local/master_df.csv"),   # legacy; imported once into master_store
+    "master_store":            resource_path("_local/master_store"),
+    "app_resources":           resource_path("_local/app_resources.bin"),   # load_app_resources cache
+}
+
+# partitioned master store (_utils/master_store.py)
+MASTER_STORE = {
+    "root":         PATHS["master_store"],
+    "backend":      "files",     # files (partitions below) | sqlite (indexed master.db in the root)
+    "format":       "parquet",   # parquet | feather | csv (csv is also the fallback without pyarrow)
+    "read_workers": 8,
+    "size_limit_mb": 2048,       # LRU eviction of run scopes beyond this (0 = unbounded)
+    "max_scopes":   32,
+    "memory_scopes": 3,          # loaded scopes kept in memory to answer narrower requests (scope_memo.py)
+}
+
+# fetch engine (build_master): worker pool + per-host cap + token bucket
+FETCH = {
+    "max_workers":  8,
+    "per_host":     6,      # max in-flight calls to fisis.fss.or.kr
+    "rate_per_sec": 10.0,   # token bucket refill rate
+    "burst":        10,     # token bucket capacity
+    "merge_gap_months": 6,  # planner: join windows of one cell when the cached gap between them is this small
+    "est_latency_s":    0.8,  # planner: per-call latency assumed before any call has been timed
+}
+
+# shared HTTP session (_utils/http_session.py)
+HTTP = {
+    "timeout_s":          15,
+    "pool_maxsize":       FETCH["max_workers"],
+    "retries":            3,      # retries after the first attempt (GET only)
+    "backoff_base_s":     0.5,    # full-jitter backoff: U(0, min(cap, base * 2**attempt))
+    "backoff_cap_s":      8.0,
+    "breaker_threshold":  8,      # consecutive failures before failing fast
+    "breaker_cooldown_s": 30.0,
+}
+
+# raw statisticsInfoSearch response cache (_utils/response_cache.py)
+RESPONSE_CACHE = {
+    "enabled":       True,
+    "dir":           resource_path("cache/http"),
+    "size_limit_mb": 512,          # LRU eviction beyond this
+    "recent_ttl_s":  6 * 3600,     # responses touching the last `settled_lag_quarters` quarters
+    "settled_lag_quarters": 2,     # completed quarters still treated as unpublished (FISIS lags weeks)
+}
+
+# background jobs (_utils/jobs.py): diskcache-backed queue + status, one worker thread
+JOBS = {
+    "dir":     resource_path("cache/jobs"),
+    "poll_ms": 700,     # dcc.Interval period while a job is running
+}
+
+# loaded master frames kept server-side per browser session (_utils/datasets.py);
+# ft-store-master only carries the token
+DATASETS = {
+    "per_session":  2,          # runs kept per session (older ones are superseded)
+    "max_sessions": 16,         # least-recently-used sessions beyond this are dropped
+    "size_limit_mb": 1024,      # all runs together (frame + cube bytes); older runs evicted beyond this (0 = unbounded)
+    "idle_s":       4 * 3600,   # sessions idle this long are dropped (0 = never)
+    "cube":         False,      # also keep a dense MasterCube per run for the delta / M-S aggregations
+}
+
+# client-bound payloads (_helpers/wire.py); Dash compresses callback responses
+# (brotli / gzip) when flask-compress is installed
+WIRE = {
+    "compress": True,
+}
+
+# background cache warmer (_utils/cache_warmer.py), built by create_app, started once in the serving process
+WARMER = {
+    "enabled":        True,
+    "start_delay_s":  2.0,        # let the server come up first
+    "interval_s":     6 * 3600,   # how often to probe for a newly published quarter
+    "probe_list_no":  "SH001",    # cheap list every firm reports
+}
+
+# local H/Y derivation from quarterly rows (_utils/term_derivation.py)
+# Stock-like lists that publish Q: their H/Y values are the 06/12 quarter-end rows, derived locally.
+# Flow-like lists (당분기 / period amounts) and lists not classified here are fetched per term as published.
+TERM_DERIVATION = {
+    "enabled": True,
+    # H/Y are derived from Q only for lists marked "stock"; "flow" and unlisted lists are fetched per term
+    "kinds": {
+        **{ln: "stock" for ln in (
+            "SH001", "SH002", "SH021", "SH112", "SH115", "SH116", "SH145", "SH147", "SH148",   # 인원·점포 / 비율
+            "SH003", "SH004", "SH005", "SH006", "SH150", "SH151", "SH152", "SH153",             # 재무상태표
+            "SH017", "SH161", "SH123", "SH140", "SH156",                                        # 보유계약 / 책임준비금
+            "SH111", "SH113", "SH117", "SH118", "SH119", "SH120", "SH121", "SH122", "SH128",    # 대출채권 / 건전성
+            "SH137", "SH138", "SH139", "SH144", "SH146", "SH169",
+            "SH129", "SH130", "SH131", "SH132", "SH133", "SH134", "SH135", "SH149",             # 유가증권 / 부동산
+            "SH157", "SH158", "SH159",
+        )},
+        **{ln: "flow" for ln in (
+            "SH007", "SH008", "SH016", "SH018", "SH019", "SH020", "SH023", "SH024",     # 손익 / 신계약 / 보험료 / 사업비
+            "SH026", "SH027", "SH028", "SH029", "SH114", "SH124", "SH125", "SH126",     # 형태별 보험료 / 경영효율 / 보험금·환급금
+            "SH127", "SH136", "SH141", "SH142", "SH143", "SH154", "SH155", "SH160",
+            "SH162", "SH163", "SH164", "SH165", "SH166", "SH167", "SH168",
+        )},
+    },
 }
 
 